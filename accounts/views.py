@@ -179,6 +179,7 @@ def skill_profile_view(request):
         return redirect('home')
     
     from jobs.models import UserSkillProfile, JobCategory, Skill
+    from jobs.cv_extraction import enqueue_profile_cv
     
     # Lấy hoặc tạo skill profile
     skill_profile, created = UserSkillProfile.objects.get_or_create(user=request.user)
@@ -188,15 +189,21 @@ def skill_profile_view(request):
         category_ids = request.POST.getlist('categories')
         skill_ids = request.POST.getlist('skills')
         
-        # Cập nhật profile
-        skill_profile.bio = bio
-        skill_profile.save()
-        
-        # Cập nhật categories
-        skill_profile.categories.set(category_ids)
-        
-        # Cập nhật skills
-        skill_profile.skills.set(skill_ids)
+        with transaction.atomic():
+            # Cập nhật profile
+            skill_profile.bio = bio
+            # CV mới: trích xuất text chạy nền sau khi lưu (không làm chậm request)
+            if request.FILES.get('cv_file'):
+                skill_profile.cv_file = request.FILES['cv_file']
+                skill_profile.cv_status = 'pending'
+                enqueue_profile_cv(skill_profile.pk)
+            skill_profile.save()
+            
+            # Cập nhật categories
+            skill_profile.categories.set(category_ids)
+            
+            # Cập nhật skills
+            skill_profile.skills.set(skill_ids)
         
         messages.success(request, 'Đã lưu hồ sơ kỹ năng thành công!')
         return redirect('accounts:skill_profile')
@@ -209,12 +216,20 @@ def skill_profile_view(request):
     selected_categories = list(skill_profile.categories.values_list('id', flat=True))
     selected_skills = list(skill_profile.skills.values_list('id', flat=True))
     
+    # Skill tìm thấy trong CV (gán khi trích xuất) mà hồ sơ chưa chọn
+    cv_skill_map = Skill.objects.in_bulk(skill_profile.cv_skill_ids)
+    cv_skills = [
+        cv_skill_map[skill_id] for skill_id in skill_profile.cv_skill_ids
+        if skill_id in cv_skill_map and skill_id not in selected_skills
+    ]
+    
     context = {
         'profile': skill_profile,
         'categories': categories,
         'skills': skills,
         'selected_categories': selected_categories,
         'selected_skills': selected_skills,
+        'cv_skills': cv_skills,
     }
     
     return render(request, 'accounts/skill_profile.html', context)
@@ -10,6 +10,7 @@ urlpatterns = [
     # Job Management
     path('jobs/', views.manage_jobs, name='manage_jobs'),
     path('jobs/create/', views.create_job, name='create_job'),
+    path('jobs/suggest-skills/', views.suggest_job_skills, name='suggest_job_skills'),
     path('jobs/<int:pk>/edit/', views.edit_job, name='edit_job'),
     path('jobs/<int:pk>/delete/', views.delete_job, name='delete_job'),
     path('jobs/<int:pk>/applications/', views.job_applications, name='job_applications'),
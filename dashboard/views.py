@@ -1,10 +1,15 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Count
+from django.http import JsonResponse
+from django.db import transaction
+from django.db.models import Count, Q
 from django.utils import timezone
 from datetime import timedelta
 from jobs.models import Job, Application, Company, Province, District, Ward, Skill, Requirement, JobCategory
+from jobs.cv_extraction import get_cv_match_info
+from jobs.skill_tagger import suggest_skills
+from jobs.text_utils import fold_text
 from accounts.models import UserProfile
 from accounts.decorators import employer_required
 import json
@@ -139,39 +144,42 @@ def create_job(request):
         if request.POST.get('category'):
             category = get_object_or_404(JobCategory, id=request.POST.get('category'))
         
-        job = Job.objects.create(
-            company=request.user.company,
-            title=request.POST.get('title'),
-            category=category,
-            description=request.POST.get('description'),
-            requirements=request.POST.get('requirements_text'),
-            responsibilities=request.POST.get('responsibilities'),
-            province=province,
-            district=district,
-            ward=ward,
-            address_detail=request.POST.get('address_detail', ''),
-            job_type=request.POST.get('job_type'),
-            salary_min=request.POST.get('salary_min') or None,
-            salary_max=request.POST.get('salary_max') or None,
-            experience_level=request.POST.get('experience_level'),
-        )
+        # Lưu job và các quan hệ trong 1 transaction để bảng điểm matching
+        # chỉ được tính lại 1 lần sau khi commit
+        with transaction.atomic():
+            job = Job.objects.create(
+                company=request.user.company,
+                title=request.POST.get('title'),
+                category=category,
+                description=request.POST.get('description'),
+                requirements=request.POST.get('requirements_text'),
+                responsibilities=request.POST.get('responsibilities'),
+                province=province,
+                district=district,
+                ward=ward,
+                address_detail=request.POST.get('address_detail', ''),
+                job_type=request.POST.get('job_type'),
+                salary_min=request.POST.get('salary_min') or None,
+                salary_max=request.POST.get('salary_max') or None,
+                experience_level=request.POST.get('experience_level'),
+            )
         
-        # Thêm skills
-        skill_ids = request.POST.getlist('skills')
-        if skill_ids:
-            job.required_skills.set(skill_ids)
+            # Thêm skills
+            skill_ids = request.POST.getlist('skills')
+            if skill_ids:
+                job.required_skills.set(skill_ids)
         
-        # Thêm requirements
-        requirement_ids = request.POST.getlist('job_requirements')
-        if requirement_ids:
-            job.job_requirements.set(requirement_ids)
+            # Thêm requirements
+            requirement_ids = request.POST.getlist('job_requirements')
+            if requirement_ids:
+                job.job_requirements.set(requirement_ids)
         
         messages.success(request, 'Đăng việc thành công!')
         return redirect('dashboard:manage_jobs')
     
     # Lấy dữ liệu cho form
     categories = JobCategory.objects.all().order_by('name')
-    provinces = Province.objects.all().order_by('name')
+    provinces = Province.objects.all().order_by('name_folded', 'name')
     skills = Skill.objects.all().order_by('category', 'name')
     requirements = Requirement.objects.all().order_by('requirement_type', 'name')
     experience_levels = Requirement.objects.filter(requirement_type='experience')
@@ -189,6 +197,32 @@ def create_job(request):
     
     return render(request, 'dashboard/create_job.html', context)
 
+# Gợi ý kỹ năng từ nội dung tin đang soạn (AJAX, form đăng việc)
+# Trả về các skill có trong tiêu đề / mô tả / trách nhiệm / yêu cầu mà chưa được chọn
+@login_required(login_url='accounts:login')
+def suggest_job_skills(request):
+    profile = get_object_or_404(UserProfile, user=request.user)
+    
+    if not profile.is_employer() or request.method != 'POST':
+        return JsonResponse({'skills': []}, status=403)
+    
+    skills = suggest_skills(
+        request.POST.get('title', ''),
+        request.POST.get('description', ''),
+        request.POST.get('responsibilities', ''),
+        request.POST.get('requirements_text', ''),
+        exclude=[skill_id for skill_id in request.POST.getlist('skills') if skill_id.isdigit()],
+    )
+    data = [
+        {
+            'id': s.id,
+            'name': s.name,
+            'category': s.category or 'Other',
+        }
+        for s in skills
+    ]
+    return JsonResponse({'skills': data})
+
 # Sửa việc làm
 @login_required(login_url='accounts:login')
 def edit_job(request, pk):
@@ -216,36 +250,37 @@ def edit_job(request, pk):
         if request.POST.get('category'):
             category = get_object_or_404(JobCategory, id=request.POST.get('category'))
         
-        job.title = request.POST.get('title')
-        job.category = category
-        job.description = request.POST.get('description')
-        job.requirements = request.POST.get('requirements_text')
-        job.responsibilities = request.POST.get('responsibilities')
-        job.province = province
-        job.district = district
-        job.ward = ward
-        job.address_detail = request.POST.get('address_detail', '')
-        job.job_type = request.POST.get('job_type')
-        job.salary_min = request.POST.get('salary_min') or None
-        job.salary_max = request.POST.get('salary_max') or None
-        job.experience_level = request.POST.get('experience_level')
-        job.is_active = request.POST.get('is_active') == '1'
-        job.save()
+        with transaction.atomic():
+            job.title = request.POST.get('title')
+            job.category = category
+            job.description = request.POST.get('description')
+            job.requirements = request.POST.get('requirements_text')
+            job.responsibilities = request.POST.get('responsibilities')
+            job.province = province
+            job.district = district
+            job.ward = ward
+            job.address_detail = request.POST.get('address_detail', '')
+            job.job_type = request.POST.get('job_type')
+            job.salary_min = request.POST.get('salary_min') or None
+            job.salary_max = request.POST.get('salary_max') or None
+            job.experience_level = request.POST.get('experience_level')
+            job.is_active = request.POST.get('is_active') == '1'
+            job.save()
         
-        # Cập nhật skills
-        skill_ids = request.POST.getlist('skills')
-        job.required_skills.set(skill_ids)
+            # Cập nhật skills
+            skill_ids = request.POST.getlist('skills')
+            job.required_skills.set(skill_ids)
         
-        # Cập nhật requirements
-        requirement_ids = request.POST.getlist('job_requirements')
-        job.job_requirements.set(requirement_ids)
+            # Cập nhật requirements
+            requirement_ids = request.POST.getlist('job_requirements')
+            job.job_requirements.set(requirement_ids)
         
         messages.success(request, 'Việc làm đã được cập nhật!')
         return redirect('dashboard:manage_jobs')
     
     # Lấy dữ liệu cho form
     categories = JobCategory.objects.all().order_by('name')
-    provinces = Province.objects.all().order_by('name')
+    provinces = Province.objects.all().order_by('name_folded', 'name')
     skills = Skill.objects.all().order_by('category', 'name')
     requirements = Requirement.objects.all().order_by('requirement_type', 'name')
     experience_levels = Requirement.objects.filter(requirement_type='experience')
@@ -258,9 +293,9 @@ def edit_job(request, pk):
     districts = []
     wards = []
     if job.province:
-        districts = District.objects.filter(parent_code=job.province).order_by('name')
+        districts = District.objects.filter(parent_code=job.province).order_by('name_folded', 'name')
     if job.district:
-        wards = Ward.objects.filter(parent_code=job.district).order_by('name')
+        wards = Ward.objects.filter(parent_code=job.district).order_by('name_folded', 'name')
     
     context = {
         **get_dashboard_context(request),
@@ -311,6 +346,13 @@ def all_applications(request):
     if status:
         applications = applications.filter(status=status)
     
+    # Tìm theo tên ứng viên hoặc nội dung CV (không phân biệt dấu)
+    search_query = request.GET.get('q', '').strip()
+    if search_query:
+        applications = applications.filter(
+            Q(full_name__icontains=search_query) | Q(cv_text_folded__contains=fold_text(search_query))
+        )
+    
     total_count = Application.objects.filter(job__company=company).count()
     pending_count = Application.objects.filter(job__company=company, status='Pending').count()
     reviewed_count = Application.objects.filter(job__company=company, status='Reviewed').count()
@@ -322,6 +364,7 @@ def all_applications(request):
         'active_menu': 'applications',
         'applications': applications,
         'current_status': status,
+        'search_query': search_query,
         'total_count': total_count,
         'pending_count': pending_count,
         'reviewed_count': reviewed_count,
@@ -350,6 +393,7 @@ def application_detail(request, pk):
         **get_dashboard_context(request),
         'active_menu': 'applications',
         'application': application,
+        'cv_match': get_cv_match_info(application),
     }
     
     return render(request, 'dashboard/application_detail.html', context)
@@ -1,6 +1,6 @@
 from django.contrib import admin
 from .models import (
-    Province, District, Ward, Skill, JobCategory, JobPosition, 
+    Province, District, Ward, Skill, SkillAlias, JobCategory, JobPosition, 
     Requirement, Company, Job, Application, SavedJob, UserSkillProfile
 )
 
@@ -43,13 +43,28 @@ class JobPositionAdmin(admin.ModelAdmin):
     list_filter = ['category']
     ordering = ['name']
 
+# Tên gọi khác của kỹ năng (sửa ngay trong trang kỹ năng)
+class SkillAliasInline(admin.TabularInline):
+    model = SkillAlias
+    fields = ['alias']
+    extra = 1
+
 # Quản lý kỹ năng
 @admin.register(Skill)
 class SkillAdmin(admin.ModelAdmin):
     list_display = ['name', 'category', 'created_at']
-    search_fields = ['name', 'category']
+    search_fields = ['name', 'category', 'aliases__alias']
     list_filter = ['category']
     ordering = ['name']
+    inlines = [SkillAliasInline]
+
+# Quản lý tên gọi khác của kỹ năng
+@admin.register(SkillAlias)
+class SkillAliasAdmin(admin.ModelAdmin):
+    list_display = ['alias', 'skill', 'created_at']
+    search_fields = ['alias', 'skill__name']
+    autocomplete_fields = ['skill']
+    ordering = ['alias']
 
 # Quản lý yêu cầu công việc
 @admin.register(Requirement)
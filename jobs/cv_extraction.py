@@ -0,0 +1,292 @@
+import multiprocessing
+import os
+import re
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+from xml.etree import ElementTree
+
+from django.db import close_old_connections, transaction
+
+from .models import Application, Skill, UserSkillProfile
+from .nlp_processor import import_optional, is_installed
+from .text_utils import fold_text
+from .token_store import tokenize_document
+
+
+# Số CV xử lý đồng thời trong 1 process (mỗi CV chạy trong 1 process con)
+CV_WORKERS = 2
+
+# Thời gian tối đa (giây) để trích xuất 1 CV; quá thời gian thì process con bị dừng
+CV_TIMEOUT_SECONDS = 60
+
+# Độ dài tối đa của text lưu lại cho 1 CV
+MAX_CV_TEXT_LENGTH = 100_000
+
+PYPDF_AVAILABLE = is_installed('pypdf')
+PYTESSERACT_AVAILABLE = is_installed('pytesseract')
+PDF2IMAGE_AVAILABLE = is_installed('pdf2image')
+
+
+# ============================================================
+# EXTRACTORS
+# ============================================================
+
+_WORD_NAMESPACE = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+# Text của file .docx (file zip chứa word/document.xml), chỉ dùng thư viện chuẩn.
+def extract_docx(path: str) -> str:
+    with zipfile.ZipFile(path) as archive:
+        root = ElementTree.fromstring(archive.read('word/document.xml'))
+
+    paragraphs = []
+    for paragraph in root.iter(f'{_WORD_NAMESPACE}p'):
+        parts = []
+        for node in paragraph.iter():
+            if node.tag == f'{_WORD_NAMESPACE}t':
+                parts.append(node.text or '')
+            elif node.tag in (f'{_WORD_NAMESPACE}tab', f'{_WORD_NAMESPACE}br'):
+                parts.append(' ')
+        paragraphs.append(''.join(parts))
+    return '\n'.join(paragraphs)
+
+# Text của file PDF có lớp text (cần pypdf). PDF scan (chỉ có ảnh) trả về ''.
+def extract_pdf(path: str) -> str:
+    pypdf = import_optional('pypdf') if PYPDF_AVAILABLE else None
+    if pypdf is None:
+        return ''
+    reader = pypdf.PdfReader(path)
+    return '\n'.join(page.extract_text() or '' for page in reader.pages)
+
+def extract_plain(path: str) -> str:
+    with open(path, encoding='utf-8', errors='ignore') as f:
+        return f.read(MAX_CV_TEXT_LENGTH)
+
+# Đuôi file -> hàm trích xuất. .doc (định dạng nhị phân cũ) chưa hỗ trợ.
+EXTRACTORS: Dict[str, Callable[[str], str]] = {
+    '.docx': extract_docx,
+    '.pdf': extract_pdf,
+    '.txt': extract_plain,
+}
+
+
+# ============================================================
+# OCR (TÙY CHỌN)
+# ============================================================
+
+# OCR bằng Tesseract (cần pytesseract; PDF cần thêm pdf2image + poppler).
+def tesseract_ocr(path: str) -> str:
+    pytesseract = import_optional('pytesseract')
+    if path.lower().endswith('.pdf'):
+        pdf2image = import_optional('pdf2image') if PDF2IMAGE_AVAILABLE else None
+        if pdf2image is None:
+            return ''
+        images = pdf2image.convert_from_path(path)
+    else:
+        from PIL import Image
+        images = [Image.open(path)]
+    return '\n'.join(pytesseract.image_to_string(image, lang='vie+eng') for image in images)
+
+# Hàm OCR dùng khi không trích được text (ví dụ PDF scan): nhận đường dẫn file,
+# trả về text. Mặc định Tesseract nếu đã cài; đổi bằng set_ocr_backend().
+_ocr_backend: Optional[Callable[[str], str]] = tesseract_ocr if PYTESSERACT_AVAILABLE else None
+
+def set_ocr_backend(backend: Optional[Callable[[str], str]]):
+    global _ocr_backend
+    _ocr_backend = backend
+
+
+# ============================================================
+# EXTRACTION
+# ============================================================
+
+# Trích xuất text của 1 file CV. Trả về (trạng thái, text):
+# completed / no_text / unsupported (xem Application.CV_STATUS_CHOICES).
+def extract_text(path: str) -> Tuple[str, str]:
+    extension = os.path.splitext(path)[1].lower()
+    extractor = EXTRACTORS.get(extension)
+    if extractor is None and _ocr_backend is None:
+        return 'unsupported', ''
+
+    text = extractor(path) if extractor is not None else ''
+    if not text.strip() and _ocr_backend is not None:
+        text = _ocr_backend(path)
+
+    text = re.sub(r'[ \t]+', ' ', text or '').strip()[:MAX_CV_TEXT_LENGTH]
+    return ('completed' if text else 'no_text'), text
+
+# Chạy trong process con: gửi kết quả (hoặc lỗi) về process cha qua pipe.
+def _extract_in_child(path: str, connection):
+    try:
+        connection.send(('ok', extract_text(path)))
+    except Exception as e:
+        connection.send(('error', f'{type(e).__name__}: {e}'))
+    finally:
+        connection.close()
+
+# Trích xuất text trong process con để giới hạn được thời gian (file hỏng hoặc
+# quá lớn không làm treo worker). Trả về (trạng thái, text, lỗi).
+def extract_text_with_timeout(path: str, timeout: float = CV_TIMEOUT_SECONDS) -> Tuple[str, str, str]:
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.Process(target=_extract_in_child, args=(path, sender), daemon=True)
+    process.start()
+    sender.close()
+    try:
+        if not receiver.poll(timeout):
+            return 'timeout', '', f'Quá {timeout:g}s'
+        result, value = receiver.recv()
+    except EOFError:
+        # Process con chết trước khi gửi kết quả; exit code chỉ có sau join()
+        result, value = 'exit', None
+    finally:
+        receiver.close()
+        # Kết quả đã nhận (hoặc hết giờ): process con không còn việc gì cần làm
+        if process.is_alive():
+            process.terminate()
+        process.join()
+
+    if result == 'exit':
+        return 'failed', '', f'Process trích xuất bị dừng (exit code {process.exitcode})'
+    if result == 'error':
+        return 'failed', '', value
+    status, text = value
+    return status, text, ''
+
+
+# ============================================================
+# QUEUE
+# ============================================================
+
+# Trích xuất, tách từ, gán skill và lưu text CV của 1 dòng đang chờ (đơn ứng
+# tuyển hoặc hồ sơ kỹ năng). Dòng được "nhận" bằng 1 câu UPDATE có điều kiện nên
+# web và manage.py process_cvs chạy cùng lúc cũng không xử lý 1 CV 2 lần.
+# Trả về trạng thái kết quả (None nếu CV không còn ở trạng thái pending).
+def _process_cv(model, object_id: int, timeout: float, folded: bool) -> Optional[str]:
+    from .skill_tagger import tag_text
+
+    try:
+        claimed = model.objects.filter(pk=object_id, cv_status='pending').update(cv_status='processing')
+        if not claimed:
+            return None
+
+        obj = model.objects.only('cv_file').get(pk=object_id)
+        if not obj.cv_file:
+            status, text, error = 'no_text', '', ''
+        else:
+            status, text, error = extract_text_with_timeout(obj.cv_file.path, timeout)
+
+        language, tokens = tokenize_document(text) if text else ('', '')
+        fields = {
+            'cv_status': status,
+            'cv_error': error or None,
+            'cv_text': text,
+            'cv_tokens': tokens,
+            'cv_language': language,
+            # Skill trong CV được gán 1 lần ở đây, trang chi tiết chỉ đọc lại
+            'cv_skill_ids': tag_text(text) if text else [],
+        }
+        if folded:
+            fields['cv_text_folded'] = fold_text(text)
+        model.objects.filter(pk=object_id).update(**fields)
+        return status
+    except Exception as e:
+        print(f"CV extraction error ({model.__name__} {object_id}): {e}")
+        model.objects.filter(pk=object_id).update(cv_status='failed', cv_error=str(e))
+        return 'failed'
+    finally:
+        close_old_connections()
+
+# CV của đơn ứng tuyển (kèm cv_text_folded để tìm kiếm trong dashboard).
+def process_application_cv(application_id: int, timeout: float = CV_TIMEOUT_SECONDS) -> Optional[str]:
+    return _process_cv(Application, application_id, timeout, folded=True)
+
+# CV của hồ sơ kỹ năng (media/user_cvs). Text CV là một phần văn bản hồ sơ nên
+# hồ sơ được đưa vào hàng đợi tính lại tokens và bảng điểm.
+def process_profile_cv(profile_id: int, timeout: float = CV_TIMEOUT_SECONDS) -> Optional[str]:
+    from .match_store import enqueue_match_refresh
+
+    status = _process_cv(UserSkillProfile, profile_id, timeout, folded=False)
+    if status is not None:
+        try:
+            enqueue_match_refresh(profile_ids=[profile_id])
+        finally:
+            close_old_connections()
+    return status
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=CV_WORKERS, thread_name_prefix='cv-extraction')
+        return _executor
+
+# Đưa CV của đơn ứng tuyển vào hàng đợi xử lý nền (sau khi transaction commit).
+# Request ứng tuyển trả về ngay, không chờ trích xuất.
+def enqueue_application_cv(application_id: int):
+    transaction.on_commit(
+        lambda: _get_executor().submit(process_application_cv, application_id), robust=True,
+    )
+
+# Đưa CV của hồ sơ kỹ năng vào hàng đợi xử lý nền (như enqueue_application_cv).
+def enqueue_profile_cv(profile_id: int):
+    transaction.on_commit(
+        lambda: _get_executor().submit(process_profile_cv, profile_id), robust=True,
+    )
+
+# Xử lý mọi CV đang chờ (đơn ứng tuyển và hồ sơ) với tối đa `workers` CV cùng lúc.
+# Trả về số CV theo trạng thái kết quả.
+def process_pending_cvs(workers: int = CV_WORKERS, timeout: float = CV_TIMEOUT_SECONDS,
+                        limit: Optional[int] = None) -> Dict[str, int]:
+    tasks = [
+        (process_application_cv, pk)
+        for pk in Application.objects.filter(cv_status='pending').order_by('id').values_list('id', flat=True)[:limit]
+    ]
+    if limit is None or len(tasks) < limit:
+        profile_limit = None if limit is None else limit - len(tasks)
+        tasks += [
+            (process_profile_cv, pk)
+            for pk in UserSkillProfile.objects.filter(cv_status='pending').order_by('id')
+            .values_list('id', flat=True)[:profile_limit]
+        ]
+
+    counts = {}
+    with ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix='cv-extraction') as executor:
+        for status in executor.map(lambda task: task[0](task[1], timeout), tasks):
+            if status is not None:
+                counts[status] = counts.get(status, 0) + 1
+    return counts
+
+
+# ============================================================
+# MATCHING
+# ============================================================
+
+# So khớp CV đã trích xuất với việc làm của đơn: skill đã gán khi trích xuất CV (chia
+# thành skill job yêu cầu / skill khác) và độ tương đồng text CV - job (0-100,
+# dùng IDF của index TF-IDF việc làm). None nếu CV chưa có text.
+def get_cv_match_info(application: Application) -> Optional[dict]:
+    if application.cv_status != 'completed' or not application.cv_text:
+        return None
+
+    from .match_index import get_job_text_index
+
+    job = application.job
+    required_ids = set(job.required_skills.values_list('id', flat=True))
+    skill_map = Skill.objects.in_bulk(application.cv_skill_ids)
+    skills = [skill_map[skill_id] for skill_id in application.cv_skill_ids if skill_id in skill_map]
+
+    similarity = None
+    index = get_job_text_index()
+    if index is not None and application.cv_tokens and job.tokens:
+        similarity = min(int(index.text_similarity(application.cv_tokens, job.tokens) * 100), 100)
+
+    return {
+        'matched_skills': [skill for skill in skills if skill.id in required_ids],
+        'other_skills': [skill for skill in skills if skill.id not in required_ids],
+        'missing_skills': job.required_skills.exclude(id__in=[skill.id for skill in skills]),
+        'similarity': similarity,
+    }
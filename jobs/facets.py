@@ -0,0 +1,58 @@
+import hashlib
+from typing import Dict
+
+from django.core.cache import cache
+from django.db.models import CharField, Count, QuerySet, Value
+from django.db.models.functions import Cast
+
+from .filters import apply_job_filters
+from .match_index import get_catalog_state
+from .models import Job
+
+
+# Các facet của trang danh sách việc làm: tên -> cột trong bảng Job
+FACET_FIELDS = {
+    'province': 'province_id',
+    'category': 'category_id',
+    'experience': 'experience_level',
+    'job_type': 'job_type',
+}
+
+# Thời gian giữ số đếm facet trong cache (giây)
+FACET_CACHE_TIMEOUT = 300
+
+
+# Truy vấn đếm số việc làm theo từng giá trị của 1 facet.
+# Bộ lọc của chính facet đó được bỏ qua, các bộ lọc khác vẫn áp dụng.
+def _facet_query(jobs: QuerySet, params, facet: str) -> QuerySet:
+    field = FACET_FIELDS[facet]
+    jobs = apply_job_filters(jobs, params, exclude_facet=facet).exclude(**{f'{field}__isnull': True})
+    if Job._meta.get_field(field).get_internal_type() == 'CharField':
+        jobs = jobs.exclude(**{field: ''})
+    return (
+        jobs
+        .order_by()
+        .values(facet=Value(facet, output_field=CharField()), value=Cast(field, CharField()))
+        .annotate(count=Count('id'))
+    )
+
+# Đếm số việc làm cho mọi giá trị của mọi facet bằng 1 truy vấn (UNION ALL).
+# Trả về {facet: {giá trị (str): số việc làm}}.
+def count_facets(jobs: QuerySet, params) -> Dict[str, Dict[str, int]]:
+    queries = [_facet_query(jobs, params, facet) for facet in FACET_FIELDS]
+    counts = {facet: {} for facet in FACET_FIELDS}
+    for row in queries[0].union(*queries[1:], all=True):
+        counts[row['facet']][row['value']] = row['count']
+    return counts
+
+# Số đếm facet được cache theo bộ lọc đã chuẩn hóa (filter_key) và trạng thái
+# catalog: job thêm/sửa/ẩn/xóa làm thay đổi trạng thái nên cache cũ tự hết hiệu lực.
+def get_facet_counts(jobs: QuerySet, params, filter_key: str) -> Dict[str, Dict[str, int]]:
+    digest = hashlib.md5(f'{get_catalog_state()}:{filter_key}'.encode()).hexdigest()
+    key = f'jobs:facets:{digest}'
+
+    counts = cache.get(key)
+    if counts is None:
+        counts = count_facets(jobs, params)
+        cache.set(key, counts, FACET_CACHE_TIMEOUT)
+    return counts
@@ -0,0 +1,335 @@
+import sys
+from typing import Dict, List, Optional
+
+from django.db import transaction
+from django.db.models import QuerySet
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+from .facets import FACET_FIELDS
+from .match_index import CatalogIndex
+from .models import Job
+from .pagination import KEYSET_SORTS
+
+
+# Số slot ban đầu của bitmap (tự tăng gấp đôi khi đầy)
+INITIAL_CAPACITY = 1024
+
+# Các kiểu sắp xếp index hỗ trợ: sort -> (mảng giá trị, giảm dần)
+INDEX_SORTS = {
+    'newest': ('created_at', True),
+    'oldest': ('created_at', False),
+    'salary_high': ('salary_max', True),
+    'salary_low': ('salary_min', False),
+    'city': ('province_name', False),
+}
+assert set(INDEX_SORTS) <= set(KEYSET_SORTS)
+
+if NUMPY_AVAILABLE:
+    # Số bit 1 của mỗi giá trị byte (popcount)
+    _POPCOUNT = np.array([bin(value).count('1') for value in range(256)], dtype=np.uint8)
+
+
+# ============================================================
+# BITMAP FILTER INDEX
+# ============================================================
+
+# Index bộ lọc trong bộ nhớ của process cho các job đang hoạt động.
+# Mỗi job chiếm 1 slot (vị trí bit); mỗi giá trị facet (tỉnh, ngành nghề, kinh
+# nghiệm, hình thức) có 1 bitmap nén 8 slot / byte. Tổ hợp bộ lọc bất kỳ chỉ là
+# các phép OR (trong 1 facet) và AND (giữa các facet) trên mảng byte. Lương lọc
+# bằng mảng đã sắp xếp + searchsorted. SQL chỉ còn load các job của trang hiện tại.
+class JobFilterIndex(CatalogIndex):
+    def __init__(self):
+        super().__init__()
+        self.clear()
+
+    def __len__(self):
+        return len(self.slot_by_id)
+
+    def __contains__(self, job_id):
+        return job_id in self.slot_by_id
+
+    def clear(self):
+        self.capacity = INITIAL_CAPACITY
+        self.slot_by_id: Dict[int, int] = {}
+        self.free_slots: List[int] = []
+        self.next_slot = 0
+        self.job_facets: Dict[int, tuple] = {}
+
+        self.job_ids = np.zeros(self.capacity, dtype=np.int64)
+        self.present = self._empty_bitmap()
+        self.bitmaps: Dict[str, Dict[str, 'np.ndarray']] = {facet: {} for facet in FACET_FIELDS}
+
+        # Giá trị sắp xếp/lọc theo slot (NaN = NULL)
+        self.created_at = np.full(self.capacity, np.nan)
+        self.salary_min = np.full(self.capacity, np.nan)
+        self.salary_max = np.full(self.capacity, np.nan)
+        self.province_name = np.full(self.capacity, None, dtype=object)
+
+        # Mảng lương đã sắp xếp (giá trị, slot), tính lại khi có thay đổi
+        self._salary_sorted = {}
+
+    def _empty_bitmap(self) -> 'np.ndarray':
+        return np.zeros((self.capacity + 7) // 8, dtype=np.uint8)
+
+    # Tăng gấp đôi số slot của mọi mảng và bitmap.
+    def _grow(self):
+        old_capacity = self.capacity
+        self.capacity *= 2
+        extra = self.capacity - old_capacity
+
+        self.job_ids = np.concatenate([self.job_ids, np.zeros(extra, dtype=np.int64)])
+        self.created_at = np.concatenate([self.created_at, np.full(extra, np.nan)])
+        self.salary_min = np.concatenate([self.salary_min, np.full(extra, np.nan)])
+        self.salary_max = np.concatenate([self.salary_max, np.full(extra, np.nan)])
+        self.province_name = np.concatenate([self.province_name, np.full(extra, None, dtype=object)])
+
+        padding = np.zeros(extra // 8, dtype=np.uint8)
+        self.present = np.concatenate([self.present, padding])
+        for values in self.bitmaps.values():
+            for value in values:
+                values[value] = np.concatenate([values[value], padding])
+
+    def _allocate_slot(self) -> int:
+        if self.free_slots:
+            return self.free_slots.pop()
+        if self.next_slot == self.capacity:
+            self._grow()
+        slot = self.next_slot
+        self.next_slot += 1
+        return slot
+
+    @staticmethod
+    def _set_bit(bitmap, slot: int):
+        bitmap[slot >> 3] |= 1 << (slot & 7)
+
+    @staticmethod
+    def _clear_bit(bitmap, slot: int):
+        bitmap[slot >> 3] &= ~(1 << (slot & 7)) & 0xFF
+
+    # ------------------------------------------------------------
+    # Cập nhật
+    # ------------------------------------------------------------
+
+    def update_jobs(self, jobs: QuerySet):
+        rows = jobs.values_list(
+            'id', 'is_active', 'updated_at', 'created_at', 'salary_min', 'salary_max',
+            'province__name', *FACET_FIELDS.values(),
+        )
+
+        watermark = None
+        with self.lock:
+            for job_id, is_active, updated_at, created_at, salary_min, salary_max, province_name, *facet_values in rows:
+                self.remove_job(job_id)
+                if is_active:
+                    self.add_job(job_id, facet_values, created_at, salary_min, salary_max, province_name)
+                if watermark is None or updated_at > watermark:
+                    watermark = updated_at
+        return watermark
+
+    def add_job(self, job_id: int, facet_values, created_at, salary_min, salary_max, province_name):
+        slot = self._allocate_slot()
+        self.slot_by_id[job_id] = slot
+        self.job_ids[slot] = job_id
+        self._set_bit(self.present, slot)
+
+        facet_values = tuple(
+            str(value) if value not in (None, '') else None
+            for value in facet_values
+        )
+        self.job_facets[job_id] = facet_values
+        for facet, value in zip(FACET_FIELDS, facet_values):
+            if value is not None:
+                bitmap = self.bitmaps[facet].get(value)
+                if bitmap is None:
+                    bitmap = self.bitmaps[facet][value] = self._empty_bitmap()
+                self._set_bit(bitmap, slot)
+
+        self.created_at[slot] = created_at.timestamp() if created_at else np.nan
+        self.salary_min[slot] = salary_min if salary_min is not None else np.nan
+        self.salary_max[slot] = salary_max if salary_max is not None else np.nan
+        self.province_name[slot] = province_name
+        self._salary_sorted = {}
+
+    def remove_job(self, job_id: int):
+        slot = self.slot_by_id.pop(job_id, None)
+        if slot is None:
+            return
+
+        self._clear_bit(self.present, slot)
+        for facet, value in zip(FACET_FIELDS, self.job_facets.pop(job_id)):
+            if value is not None:
+                self._clear_bit(self.bitmaps[facet][value], slot)
+
+        self.job_ids[slot] = 0
+        self.created_at[slot] = np.nan
+        self.salary_min[slot] = np.nan
+        self.salary_max[slot] = np.nan
+        self.province_name[slot] = None
+        self.free_slots.append(slot)
+        self._salary_sorted = {}
+
+    # Đọc lại một số job (sau khi transaction lưu job đã commit).
+    # Không đổi watermark vì các job khác có thể chưa được đồng bộ.
+    def refresh_jobs(self, job_ids):
+        with self.lock:
+            if self.watermark is not None:
+                self.update_jobs(Job.objects.filter(id__in=job_ids))
+
+    # ------------------------------------------------------------
+    # Truy vấn
+    # ------------------------------------------------------------
+
+    # Bitmap các job có giá trị facet thuộc values (OR).
+    def _values_bitmap(self, facet: str, values) -> 'np.ndarray':
+        result = self._empty_bitmap()
+        for value in values:
+            bitmap = self.bitmaps[facet].get(str(value))
+            if bitmap is not None:
+                np.bitwise_or(result, bitmap, out=result)
+        return result
+
+    # Bitmap các job có lương (salary_min/salary_max) >= hoặc <= bound.
+    def _salary_bitmap(self, field: str, bound: int, at_least: bool) -> 'np.ndarray':
+        if field not in self._salary_sorted:
+            values = getattr(self, field)
+            order = np.argsort(values, kind='stable')  # NaN nằm cuối
+            order = order[~np.isnan(values[order])]
+            self._salary_sorted[field] = (values[order], order)
+        sorted_values, order = self._salary_sorted[field]
+
+        if at_least:
+            slots = order[np.searchsorted(sorted_values, bound, side='left'):]
+        else:
+            slots = order[:np.searchsorted(sorted_values, bound, side='right')]
+        mask = np.zeros(self.capacity, dtype=bool)
+        mask[slots] = True
+        return np.packbits(mask, bitorder='little')
+
+    # Bitmap các job thỏa bộ lọc trong query string (giống jobs.filters.apply_job_filters).
+    def filter_bitmap(self, params, exclude_facet: str = None) -> 'np.ndarray':
+        result = self.present.copy()
+
+        if exclude_facet != 'province':
+            provinces_list = params.getlist('provinces')
+            if provinces_list:
+                np.bitwise_and(result, self._values_bitmap('province', provinces_list), out=result)
+            province_filter = params.get('province_filter', '')
+            if province_filter:
+                np.bitwise_and(result, self._values_bitmap('province', [province_filter]), out=result)
+
+        for facet, param in (('category', 'category'), ('experience', 'experience'), ('job_type', 'job_type')):
+            values = params.getlist(param)
+            if values and exclude_facet != facet:
+                np.bitwise_and(result, self._values_bitmap(facet, values), out=result)
+
+        salary_min = params.get('salary_min', '')
+        salary_max = params.get('salary_max', '')
+        if salary_min:
+            np.bitwise_and(result, self._salary_bitmap('salary_min', int(salary_min), True), out=result)
+        if salary_max:
+            np.bitwise_and(result, self._salary_bitmap('salary_max', int(salary_max), False), out=result)
+
+        return result
+
+    def _slots(self, bitmap) -> 'np.ndarray':
+        return np.flatnonzero(np.unpackbits(bitmap, bitorder='little')[:self.capacity])
+
+    @staticmethod
+    def _count(bitmap) -> int:
+        return int(_POPCOUNT[bitmap].sum(dtype=np.int64))
+
+    # Số job thỏa bộ lọc.
+    def count(self, params) -> int:
+        with self.lock:
+            return self._count(self.filter_bitmap(params))
+
+    # Số job theo từng giá trị facet, cùng định dạng với jobs.facets.count_facets.
+    def facet_counts(self, params) -> Dict[str, Dict[str, int]]:
+        counts = {}
+        with self.lock:
+            for facet in FACET_FIELDS:
+                base = self.filter_bitmap(params, exclude_facet=facet)
+                counts[facet] = {}
+                for value, bitmap in self.bitmaps[facet].items():
+                    count = self._count(np.bitwise_and(base, bitmap))
+                    if count:
+                        counts[facet][value] = count
+        return counts
+
+    # Id các job thỏa bộ lọc, sắp xếp theo sort_by (NULL cuối, id phân định
+    # các dòng bằng nhau) - cùng thứ tự với jobs.pagination.order_for_keyset.
+    def ranked_ids(self, params, sort_by: str) -> List[int]:
+        field, descending = INDEX_SORTS[sort_by]
+        with self.lock:
+            slots = self._slots(self.filter_bitmap(params))
+            ids = self.job_ids[slots]
+            if field == 'province_name':
+                names = self.province_name[slots]
+                is_null = np.array([name is None for name in names], dtype=bool)
+                keys = np.zeros(len(slots), dtype=np.int64)
+                if (~is_null).any():
+                    _, keys[~is_null] = np.unique(names[~is_null].astype(str), return_inverse=True)
+                keys = keys.astype(np.float64)
+            else:
+                keys = getattr(self, field)[slots]
+                is_null = np.isnan(keys)
+                keys = np.where(is_null, 0, keys)
+
+        if descending:
+            order = np.lexsort((-ids, -keys, is_null))
+        else:
+            order = np.lexsort((ids, keys, is_null))
+        return ids[order].tolist()
+
+    # Dung lượng bộ nhớ (bytes) của index, theo từng phần.
+    def memory_usage(self) -> Dict[str, int]:
+        with self.lock:
+            bitmap_bytes = self.present.nbytes + sum(
+                bitmap.nbytes for values in self.bitmaps.values() for bitmap in values.values()
+            )
+            array_bytes = sum(array.nbytes for array in (
+                self.job_ids, self.created_at, self.salary_min, self.salary_max, self.province_name,
+            ))
+            sorted_bytes = sum(
+                values.nbytes + order.nbytes for values, order in self._salary_sorted.values()
+            )
+            dict_bytes = (
+                sys.getsizeof(self.slot_by_id) + sys.getsizeof(self.job_facets)
+                + sum(sys.getsizeof(values) for values in self.bitmaps.values())
+            )
+        return {
+            'jobs': len(self),
+            'capacity': self.capacity,
+            'facet_values': sum(len(values) for values in self.bitmaps.values()),
+            'bitmaps': bitmap_bytes,
+            'arrays': array_bytes,
+            'salary_sorted': sorted_bytes,
+            'dicts': dict_bytes,
+            'total': bitmap_bytes + array_bytes + sorted_bytes + dict_bytes,
+        }
+
+
+_filter_index = JobFilterIndex() if NUMPY_AVAILABLE else None
+
+# Lấy index bộ lọc của process, đã đồng bộ với database (None nếu thiếu numpy).
+def get_job_filter_index(state=None) -> Optional[JobFilterIndex]:
+    if _filter_index is not None:
+        _filter_index.sync(state)
+    return _filter_index
+
+# Cập nhật job trong index khi transaction hiện tại commit.
+def schedule_filter_index_update(job_id: int):
+    if _filter_index is not None:
+        transaction.on_commit(lambda: _filter_index.refresh_jobs([job_id]), robust=True)
+
+# Bỏ job vừa bị xóa khỏi index.
+def remove_job_from_filter_index(job_id: int):
+    if _filter_index is not None:
+        with _filter_index.lock:
+            _filter_index.remove_job(job_id)
@@ -0,0 +1,42 @@
+from django.db.models import QuerySet
+
+
+# Áp dụng các bộ lọc của trang danh sách việc làm (query string) lên queryset.
+# exclude_facet: bỏ qua bộ lọc của 1 facet (để đếm số việc làm của các giá trị
+# khác trong cùng facet, ví dụ đang chọn Hà Nội vẫn thấy số lượng của Đà Nẵng).
+def apply_job_filters(jobs: QuerySet, params, exclude_facet: str = None) -> QuerySet:
+    if exclude_facet != 'province':
+        # Lọc theo nhiều tỉnh (cho thanh phan bên trái)
+        provinces_list = params.getlist('provinces')
+        if provinces_list:
+            jobs = jobs.filter(province_id__in=provinces_list)
+        
+        # Lọc theo tỉnh (cho thanh phan trên thanh menu)
+        province_filter = params.get('province_filter', '')
+        if province_filter:
+            jobs = jobs.filter(province_id=province_filter)
+    
+    # Lọc theo ngành nghề
+    category_list = params.getlist('category')
+    if category_list and exclude_facet != 'category':
+        jobs = jobs.filter(category_id__in=category_list)
+    
+    # Lọc theo kinh nghiệm
+    experience_list = params.getlist('experience')
+    if experience_list and exclude_facet != 'experience':
+        jobs = jobs.filter(experience_level__in=experience_list)
+    
+    # Lọc theo mức lương
+    salary_min = params.get('salary_min', '')
+    salary_max = params.get('salary_max', '')
+    if salary_min:
+        jobs = jobs.filter(salary_min__gte=int(salary_min))
+    if salary_max:
+        jobs = jobs.filter(salary_max__lte=int(salary_max))
+    
+    # Lọc theo loại công việc (chế độ làm việc)
+    job_types_list = params.getlist('job_type')
+    if job_types_list and exclude_facet != 'job_type':
+        jobs = jobs.filter(job_type__in=job_types_list)
+    
+    return jobs
@@ -0,0 +1,128 @@
+from typing import List, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from django.db.models import QuerySet
+
+from .match_index import JobTextIndex, get_job_text_index
+from .models import Job
+from .token_store import content_hash, load_job_tokens
+
+
+# Số từ khóa lưu cho mỗi job
+KEYWORDS_PER_JOB = 8
+
+# Cụm từ (n-gram) xuất hiện ở ít hơn chừng này job không được chọn làm từ khóa
+# (thường là cụm ghép ngẫu nhiên qua ranh giới câu); từ đơn hiếm vẫn giữ vì
+# thường là từ đặc trưng của job. 1: không lọc.
+KEYWORD_MIN_DF = 2
+
+
+# ============================================================
+# EXTRACTION
+# ============================================================
+
+# Các từ khóa có trọng số TF-IDF cao nhất của 1 vector (CSR 1 x V).
+# Bỏ qua từ mà mọi từ con đã nằm trong các từ khóa chọn trước (ví dụ "kế" khi
+# đã có "kế toán"); chọn "kế toán" sau "kế" thì thay luôn "kế". Trọng số bằng
+# nhau: cụm từ dài hơn trước, rồi theo thứ tự cột, nên kết quả không phụ thuộc
+# thứ tự lưu trong vector (hàng lúc fit và transform() của cùng văn bản khác nhau).
+# rare_terms: mask các từ không được chọn (xem rare_term_mask).
+# idf_scale: hệ số nhân trọng số theo cột (xem idf_scale).
+def top_terms(feature_names, vector, top_n: int = KEYWORDS_PER_JOB, rare_terms=None,
+              idf_scale=None) -> List[str]:
+    selected = []
+    covered = set()
+    weights = vector.data if idf_scale is None else vector.data * idf_scale[vector.indices]
+    word_counts = np.char.count(np.asarray(feature_names)[vector.indices].astype(str), ' ')
+    for position in np.lexsort((vector.indices, -word_counts, -weights)):
+        column = vector.indices[position]
+        if rare_terms is not None and rare_terms[column]:
+            continue
+        term = str(feature_names[column])
+        words = term.split()
+        if all(word in covered for word in words):
+            continue
+        if len(words) > 1:
+            selected = [chosen for chosen in selected if chosen not in words]
+        selected.append(term)
+        covered.update(words)
+        if len(selected) >= top_n:
+            break
+    # Từ ghép của bộ tách từ tiếng Việt nối bằng "_": lưu dạng để hiển thị
+    return [term.replace('_', ' ') for term in selected]
+
+# Mask các cụm từ có document frequency (hiện tại, cập nhật theo từng job thêm /
+# bỏ) nhỏ hơn min_df. Không lọc gì thì trả về None.
+def rare_term_mask(index: JobTextIndex, min_df: int = KEYWORD_MIN_DF):
+    if min_df <= 1:
+        return None
+    is_phrase = np.char.find(index.feature_names.astype(str), ' ') >= 0
+    mask = (index.document_frequency < min_df) & is_phrase
+    if not mask.any():
+        return None
+    return mask
+
+# Vector của index mang IDF lúc fit; nhân với tỉ lệ IDF hiện tại / lúc fit để
+# xếp hạng từ khóa theo thống kê mới nhất mà không phải fit lại vectorizer.
+def idf_scale(index: JobTextIndex):
+    return index.current_idf / index.fitted_idf
+
+# Từ khóa của một văn bản đã tách từ, dùng IDF của toàn bộ việc làm
+# (index TF-IDF của matching) nên không phải fit vectorizer cho mỗi lần gọi.
+def extract_keywords(tokens: str, top_n: int = KEYWORDS_PER_JOB,
+                     index: Optional[JobTextIndex] = None) -> List[str]:
+    if index is None:
+        index = get_job_text_index()
+    if index is None or index.vectorizer is None or not tokens:
+        return []
+    return top_terms(index.feature_names, index.transform(tokens), top_n,
+                     rare_term_mask(index), idf_scale(index))
+
+# Các từ khóa của job xuất hiện trong văn bản (đã tách từ) của ứng viên.
+def matched_keywords(keywords: List[str], tokens: str) -> List[str]:
+    words = (tokens or '').split()
+    terms = set(words) | {f'{first} {second}' for first, second in zip(words, words[1:])}
+    terms = {term.replace('_', ' ') for term in terms}
+    return [keyword for keyword in keywords or [] if keyword in terms]
+
+
+# ============================================================
+# BATCH
+# ============================================================
+
+# Tính và lưu từ khóa của các job (mặc định: mọi job) trong 1 lượt.
+# Job đang hoạt động dùng luôn hàng của nó trong ma trận TF-IDF; chỉ các job có
+# tokens thay đổi từ lần trước được tính lại, trừ khi force=True (sau khi index
+# fit lại). Chỉ ghi các job có từ khóa khác với đã lưu. Trả về số job đã cập nhật.
+def refresh_job_keywords(jobs: Optional[QuerySet] = None, force: bool = False) -> int:
+    index = get_job_text_index()
+    if index is None or index.vectorizer is None:
+        return 0
+
+    if jobs is None:
+        jobs = Job.objects.all()
+    stored = {job_id: (keywords_hash, keywords)
+              for job_id, keywords_hash, keywords in jobs.values_list('id', 'keywords_hash', 'keywords')}
+
+    rare_terms = rare_term_mask(index)
+    scale = idf_scale(index)
+    changed = []
+    for job_id, tokens in zip(*load_job_tokens(jobs)):
+        tokens_hash = content_hash(tokens)
+        stored_hash, stored_keywords = stored.get(job_id, (None, None))
+        if not force and stored_hash == tokens_hash:
+            continue
+
+        row = index.row_by_id.get(job_id)
+        vector = index.row_vector(row) if row is not None else index.transform(tokens)
+        keywords = top_terms(index.feature_names, vector, rare_terms=rare_terms, idf_scale=scale)
+        if stored_hash == tokens_hash and stored_keywords == keywords:
+            continue
+        changed.append(Job(id=job_id, keywords=keywords, keywords_hash=tokens_hash))
+
+    Job.objects.bulk_update(changed, ['keywords', 'keywords_hash'], batch_size=500)
+    return len(changed)
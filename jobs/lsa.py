@@ -0,0 +1,291 @@
+import os
+import pickle
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db.models import QuerySet
+from django.utils import timezone
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .match_index import SKLEARN_AVAILABLE, TFIDF_MAX_FEATURES, CatalogIndex
+from .models import Job, UserSkillProfile
+from .nlp_processor import import_optional
+from .token_store import load_job_tokens
+
+
+# Số chiều của vector LSA
+LSA_DIMENSIONS = 128
+
+# File mô hình LSA (train bằng `manage.py train_lsa`)
+LSA_MODEL_FILE = os.path.join(settings.MATCH_DATA_DIR, 'lsa_model.pkl')
+
+# Số job đang hoạt động tối thiểu để train (ít hơn thì matching 'lsa' dùng 'tfidf')
+LSA_MIN_JOBS = 2
+
+# Tăng khi đổi định dạng file mô hình (file cũ bị bỏ qua, cần train lại)
+LSA_FORMAT_VERSION = 1
+
+
+# ============================================================
+# MODEL
+# ============================================================
+
+# Mô hình LSA: TF-IDF (unigram + bigram) rồi chiếu xuống LSA_DIMENSIONS chiều
+# bằng truncated SVD. Các từ hay đi cùng nhau trong tin tuyển dụng (ví dụ
+# "kế_toán tổng_hợp" và "accountant" trong tin song ngữ) gần nhau trong không
+# gian LSA nên 2 văn bản không chung từ nào vẫn có thể giống nhau.
+class LsaModel:
+    def __init__(self, vectorizer, components, explained_variance: float = 0.0, trained_at=None):
+        self.vectorizer = vectorizer
+        # Ma trận chiếu (V x k, float32, liền bộ nhớ)
+        self.projection = np.ascontiguousarray(components.T, dtype=np.float32)
+        self.explained_variance = explained_variance
+        self.trained_at = trained_at
+
+    @property
+    def dimensions(self) -> int:
+        return self.projection.shape[1]
+
+    # Vector LSA (đã chuẩn hóa L2, float32) của các văn bản đã tách từ.
+    # Văn bản không có từ nào trong từ vựng cho vector 0.
+    def project(self, texts: List[str]) -> 'np.ndarray':
+        if not texts:
+            return np.zeros((0, self.dimensions), dtype=np.float32)
+        vectors = np.asarray(self.vectorizer.transform(texts) @ self.projection, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        np.divide(vectors, norms, out=vectors, where=norms > 0)
+        return np.ascontiguousarray(vectors)
+
+
+# Vector của các đối tượng lúc train: id, tokens_hash (để biết vector còn đúng
+# với nội dung hiện tại không) và ma trận vector (N x k).
+class StoredVectors:
+    def __init__(self, ids: List[int], hashes: List[str], vectors):
+        self.row_by_id = {object_id: row for row, object_id in enumerate(ids)}
+        self.hashes = hashes
+        self.vectors = vectors
+
+    # Vector đã lưu của object_id nếu nội dung chưa đổi, ngược lại None.
+    def get(self, object_id: int, tokens_hash: str):
+        row = self.row_by_id.get(object_id)
+        if row is None or not tokens_hash or self.hashes[row] != tokens_hash:
+            return None
+        return self.vectors[row]
+
+
+# ============================================================
+# TRAINING
+# ============================================================
+
+# Train mô hình LSA trên văn bản của các job đang hoạt động, tính sẵn vector của
+# mọi job và hồ sơ, rồi ghi ra file (ghi file tạm rồi đổi tên, nên process khác
+# không bao giờ đọc phải file dở). Trả về (mô hình, số job, số hồ sơ), hoặc None
+# nếu catalog quá nhỏ để train (file mô hình cũ, nếu có, được giữ nguyên).
+def train_lsa_model(dimensions: int = LSA_DIMENSIONS,
+                    path: str = LSA_MODEL_FILE) -> Optional[Tuple[LsaModel, int, int]]:
+    text = import_optional('sklearn.feature_extraction.text')
+    decomposition = import_optional('sklearn.decomposition')
+
+    job_ids, texts = load_job_tokens(Job.objects.filter(is_active=True))
+    if len(job_ids) < LSA_MIN_JOBS:
+        return None
+    vectorizer = text.TfidfVectorizer(
+        ngram_range=(1, 2),
+        max_features=TFIDF_MAX_FEATURES,
+        sublinear_tf=True,
+    )
+    try:
+        matrix = vectorizer.fit_transform(texts)
+    except ValueError:
+        # Không job nào có từ (tokens rỗng / chưa tách từ)
+        return None
+
+    # TruncatedSVD cần số chiều nhỏ hơn số từ và số văn bản
+    dimensions = min(dimensions, matrix.shape[1] - 1, matrix.shape[0] - 1)
+    if dimensions < 1:
+        return None
+    svd = decomposition.TruncatedSVD(n_components=dimensions, algorithm='randomized', random_state=42)
+    svd.fit(matrix)
+
+    model = LsaModel(vectorizer, svd.components_, float(svd.explained_variance_ratio_.sum()), timezone.now())
+    job_hashes = dict(Job.objects.filter(id__in=job_ids).values_list('id', 'tokens_hash'))
+    profiles = list(
+        UserSkillProfile.objects.exclude(tokens='').values_list('id', 'tokens_hash', 'tokens')
+    )
+
+    data = {
+        'version': LSA_FORMAT_VERSION,
+        'vectorizer': vectorizer,
+        'components': svd.components_.astype(np.float32),
+        'explained_variance': model.explained_variance,
+        'trained_at': model.trained_at,
+        'job_ids': job_ids,
+        'job_hashes': [job_hashes.get(job_id, '') for job_id in job_ids],
+        'job_vectors': model.project(texts),
+        'profile_ids': [profile_id for profile_id, _, _ in profiles],
+        'profile_hashes': [tokens_hash for _, tokens_hash, _ in profiles],
+        'profile_vectors': model.project([tokens for _, _, tokens in profiles]),
+    }
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    with open(temp_path, 'wb') as f:
+        pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_path, path)
+    return model, len(job_ids), len(profiles)
+
+
+# ============================================================
+# JOB VECTOR INDEX
+# ============================================================
+
+# Vector LSA của mọi job đang hoạt động trong 1 ma trận liền bộ nhớ (N x k,
+# float32), nên điểm của 1 hồ sơ với toàn bộ catalog là 1 phép nhân ma trận -
+# vector (BLAS). Đồng bộ dần với database như các index khác (CatalogIndex):
+# job mới / đã sửa được chiếu bằng mô hình hiện có, không cần train lại.
+class LsaJobIndex(CatalogIndex):
+    def __init__(self, model: LsaModel, stored_jobs: StoredVectors, stored_profiles: StoredVectors,
+                 model_mtime: float):
+        super().__init__()
+        self.model = model
+        self.stored_jobs = stored_jobs
+        self.stored_profiles = stored_profiles
+        self.model_mtime = model_mtime
+        self.job_ids: List[int] = []
+        self.row_by_id: Dict[int, int] = {}
+        self.vectors = np.zeros((0, model.dimensions), dtype=np.float32)
+
+    def __len__(self):
+        return len(self.job_ids)
+
+    def __contains__(self, job_id):
+        return job_id in self.row_by_id
+
+    def clear(self):
+        self.job_ids = []
+        self.row_by_id = {}
+        self.vectors = np.zeros((0, self.model.dimensions), dtype=np.float32)
+
+    def update_jobs(self, jobs: QuerySet):
+        rows = list(jobs.values_list('id', 'is_active', 'tokens_hash', 'updated_at'))
+        vectors = {}
+        watermark = None
+        changed = []
+        # Vector lúc train chỉ dùng khi nạp index lần đầu; job sửa sau đó luôn
+        # được chiếu lại từ văn bản (tokens được tách lại sau khi lưu job)
+        stored = self.stored_jobs if self.watermark is None else None
+        for job_id, is_active, tokens_hash, updated_at in rows:
+            if is_active:
+                vector = stored.get(job_id, tokens_hash) if stored is not None else None
+                if vector is None:
+                    changed.append(job_id)
+                else:
+                    vectors[job_id] = vector
+            if watermark is None or updated_at > watermark:
+                watermark = updated_at
+
+        if changed:
+            changed_ids, texts = load_job_tokens(Job.objects.filter(id__in=changed))
+            vectors.update(zip(changed_ids, self.model.project(texts)))
+
+        removed = {job_id for job_id, _, _, _ in rows} - set(vectors)
+        self._apply(vectors, removed)
+        return watermark
+
+    def remove_job(self, job_id: int):
+        self._apply({}, {job_id})
+
+    # Cập nhật ma trận 1 lần cho cả lô: thay vector tại chỗ, bỏ các hàng đã xóa
+    # và nối thêm các job mới (ma trận mới luôn liền bộ nhớ).
+    def _apply(self, vectors: Dict[int, 'np.ndarray'], removed):
+        removed = [job_id for job_id in removed if job_id in self.row_by_id]
+        added = [job_id for job_id in vectors if job_id not in self.row_by_id]
+        matrix = self.vectors.copy() if vectors else self.vectors
+        for job_id, vector in vectors.items():
+            if job_id in self.row_by_id:
+                matrix[self.row_by_id[job_id]] = vector
+
+        job_ids = self.job_ids
+        if removed:
+            keep = np.ones(len(job_ids), dtype=bool)
+            keep[[self.row_by_id[job_id] for job_id in removed]] = False
+            removed = set(removed)
+            job_ids = [job_id for job_id in job_ids if job_id not in removed]
+            matrix = matrix[keep]
+        if added:
+            job_ids = job_ids + added
+            matrix = np.vstack([matrix, np.stack([vectors[job_id] for job_id in added])])
+
+        self.vectors = np.ascontiguousarray(matrix, dtype=np.float32)
+        self.job_ids = job_ids
+        self.row_by_id = {job_id: row for row, job_id in enumerate(job_ids)}
+
+    # Vector LSA của hồ sơ: dùng vector lúc train nếu nội dung chưa đổi.
+    def profile_vector(self, profile: Optional[UserSkillProfile], text: str) -> 'np.ndarray':
+        if profile is not None:
+            vector = self.stored_profiles.get(profile.id, profile.tokens_hash)
+            if vector is not None:
+                return vector
+        return self.model.project([text])[0]
+
+    # Cosine giữa vector và mọi job trong index. Trả về (điểm, row_by_id)
+    # của cùng 1 phiên bản ma trận.
+    def similarities(self, vector) -> Tuple['np.ndarray', Dict[int, int]]:
+        with self.lock:
+            vectors, row_by_id = self.vectors, self.row_by_id
+        return vectors @ vector, row_by_id
+
+
+# Đọc file mô hình. None nếu chưa train hoặc file không đọc được.
+def load_lsa_index(path: str = LSA_MODEL_FILE) -> Optional[LsaJobIndex]:
+    try:
+        mtime = os.path.getmtime(path)
+        with open(path, 'rb') as f:
+            data = pickle.load(f)
+    except OSError:
+        return None
+    except Exception as e:
+        print(f"Error loading LSA model: {e}")
+        return None
+
+    if data.get('version') != LSA_FORMAT_VERSION:
+        print(f"LSA model format {data.get('version')} is outdated, run `manage.py train_lsa`")
+        return None
+
+    model = LsaModel(data['vectorizer'], data['components'], data['explained_variance'], data['trained_at'])
+    return LsaJobIndex(
+        model,
+        StoredVectors(data['job_ids'], data['job_hashes'], data['job_vectors']),
+        StoredVectors(data['profile_ids'], data['profile_hashes'], data['profile_vectors']),
+        mtime,
+    )
+
+
+_lsa_index = None
+_lsa_index_lock = threading.Lock()
+
+# Lấy index LSA của process, đã đồng bộ với database. Đọc lại file khi mô hình
+# được train lại (mtime đổi). None nếu chưa có mô hình.
+def get_lsa_index(state=None) -> Optional[LsaJobIndex]:
+    global _lsa_index
+
+    if not SKLEARN_AVAILABLE:
+        return None
+
+    try:
+        mtime = os.path.getmtime(LSA_MODEL_FILE)
+    except OSError:
+        return None
+
+    with _lsa_index_lock:
+        if _lsa_index is None or _lsa_index.model_mtime != mtime:
+            _lsa_index = load_lsa_index()
+        index = _lsa_index
+
+    if index is not None:
+        index.sync(state)
+    return index
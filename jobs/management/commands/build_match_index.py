@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from jobs.keywords import refresh_job_keywords
+from jobs.match_artifact import KEEP_VERSIONS, MATCH_INDEX_VERSIONS_DIR, build_match_artifact
+from jobs.match_index import SKLEARN_AVAILABLE
+
+
+# Build artifact index matching (jobs/match_artifact.py) từ toàn bộ việc làm đang
+# hoạt động. Các process web tự chuyển sang phiên bản mới ở request kế tiếp; job
+# đổi sau lần build được mỗi process cập nhật dần nên chỉ cần build lại định kỳ
+# (ví dụ hằng đêm) để dọn hàng bỏ và fit lại IDF, rồi tính lại từ khóa của các job.
+class Command(BaseCommand):
+    help = 'Build artifact index matching (TF-IDF + skill) dùng chung giữa các process'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep', type=int, default=KEEP_VERSIONS,
+                            help='Số phiên bản giữ lại trên đĩa')
+
+    def handle(self, *args, **options):
+        if not SKLEARN_AVAILABLE:
+            raise CommandError('Cần cài numpy, scipy và scikit-learn')
+
+        start = time.perf_counter()
+        version, index = build_match_artifact(options['keep'])
+        if version is None:
+            raise CommandError('Chưa có việc làm nào để build index')
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Đã build index {version}: {len(index)} việc làm, {index.base.shape[1]} từ, '
+            f'trong {elapsed:.1f}s -> {MATCH_INDEX_VERSIONS_DIR}'
+        ))
+
+        # IDF / từ vựng mới: tính lại từ khóa đã lưu của các job
+        count = refresh_job_keywords(force=True)
+        self.stdout.write(f'Đã cập nhật từ khóa của {count} việc làm')
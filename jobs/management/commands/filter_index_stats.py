@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.http import QueryDict
+
+from jobs.filter_index import get_job_filter_index
+
+
+# Build index bộ lọc (bitmap) cho catalog hiện tại và in dung lượng bộ nhớ
+# cùng thời gian build / thời gian lọc, để ước lượng chi phí trên mỗi worker.
+class Command(BaseCommand):
+    help = 'In dung lượng bộ nhớ và thời gian build/lọc của index bộ lọc việc làm'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--query', default='',
+                            help='Query string bộ lọc để đo thời gian, ví dụ "category=1&job_type=Remote"')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        index = get_job_filter_index()
+        if index is None:
+            raise CommandError('Cần numpy để dùng index bộ lọc')
+        build_ms = (time.perf_counter() - start) * 1000
+
+        params = QueryDict(options['query'])
+        start = time.perf_counter()
+        ranked_ids = index.ranked_ids(params, 'newest')
+        query_us = (time.perf_counter() - start) * 1000000
+
+        for name, value in index.memory_usage().items():
+            self.stdout.write(f'{name:>14}: {value:,}')
+        self.stdout.write(f'{"build":>14}: {build_ms:.1f} ms')
+        self.stdout.write(f'{"query":>14}: {query_us:.0f} µs ({len(ranked_ids):,} jobs)')
+        self.stdout.write(self.style.SUCCESS('OK'))
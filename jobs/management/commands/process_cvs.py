@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from jobs.cv_extraction import CV_TIMEOUT_SECONDS, CV_WORKERS, process_pending_cvs
+from jobs.models import Application, UserSkillProfile
+
+
+# Trích xuất text các CV đang chờ của đơn ứng tuyển và hồ sơ kỹ năng (ví dụ CV
+# upload trước khi có xử lý nền, hoặc CV còn trong hàng đợi khi server khởi động
+# lại). Dùng --retry để xử lý lại các CV lỗi / quá thời gian / đang dở.
+class Command(BaseCommand):
+    help = 'Trích xuất và tách từ text của các CV đang chờ xử lý'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=CV_WORKERS,
+                            help='Số CV xử lý đồng thời')
+        parser.add_argument('--timeout', type=float, default=CV_TIMEOUT_SECONDS,
+                            help='Thời gian tối đa (giây) cho mỗi CV')
+        parser.add_argument('--limit', type=int, default=None,
+                            help='Số CV tối đa xử lý lần này')
+        parser.add_argument('--retry', action='store_true',
+                            help='Xử lý lại các CV lỗi, quá thời gian hoặc đang dở')
+
+    def handle(self, *args, **options):
+        if options['retry']:
+            reset = sum(
+                model.objects.filter(cv_status__in=['processing', 'failed', 'timeout']).update(cv_status='pending')
+                for model in (Application, UserSkillProfile)
+            )
+            self.stdout.write(f'Đưa lại {reset} CV vào hàng đợi')
+
+        start = time.perf_counter()
+        counts = process_pending_cvs(options['workers'], options['timeout'], options['limit'])
+        elapsed = time.perf_counter() - start
+
+        summary = ', '.join(f'{status}: {count}' for status, count in sorted(counts.items())) or 'không có CV nào'
+        self.stdout.write(self.style.SUCCESS(f'Đã xử lý CV trong {elapsed:.1f}s ({summary})'))
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from jobs.match_store import process_match_refreshes
+from jobs.models import MatchRefreshTask
+
+
+# Tính lại bảng điểm của các job / hồ sơ trong hàng đợi (MatchRefreshTask), ví dụ
+# task còn lại khi server khởi động lại, hoặc khi web chạy với
+# MATCH_REFRESH_WORKERS = 0 và hàng đợi được xử lý bằng cron / worker riêng.
+class Command(BaseCommand):
+    help = 'Tính lại điểm matching của các job / hồ sơ đang chờ trong hàng đợi'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=None,
+                            help='Số task tối đa xử lý lần này')
+
+    def handle(self, *args, **options):
+        pending = MatchRefreshTask.objects.count()
+        start = time.perf_counter()
+        job_count, profile_count = process_match_refreshes(options['limit'])
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Đã tính lại điểm cho {job_count} việc làm, {profile_count} hồ sơ '
+            f'({pending} task đang chờ) trong {elapsed:.1f}s'
+        ))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from jobs.keywords import refresh_job_keywords
+
+
+# Tính từ khóa cho mọi việc làm trong 1 lượt (IDF của toàn bộ việc làm).
+# Mặc định chỉ tính lại các job có nội dung thay đổi; dùng --all sau khi
+# catalog thay đổi nhiều để từ khóa phản ánh IDF mới.
+class Command(BaseCommand):
+    help = 'Tính và lưu từ khóa nổi bật của việc làm'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', dest='force',
+                            help='Tính lại cả việc làm chưa thay đổi')
+
+    def handle(self, *args, **options):
+        count = refresh_job_keywords(force=options['force'])
+        self.stdout.write(self.style.SUCCESS(f'Đã cập nhật từ khóa của {count} việc làm'))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from jobs.match_store import refresh_profile_matches
+from jobs.models import UserSkillProfile
+
+
+# Tính lại toàn bộ bảng điểm UserJobMatch (hoặc của một số hồ sơ).
+# Dùng sau khi migrate (--missing: chỉ các hồ sơ chưa có bảng điểm) hoặc khi
+# muốn cập nhật điểm văn bản theo IDF mới.
+class Command(BaseCommand):
+    help = 'Tính lại bảng điểm matching giữa hồ sơ kỹ năng và việc làm'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profile', type=int, action='append', dest='profile_ids',
+                            help='Chỉ tính lại cho hồ sơ có ID này (có thể lặp lại)')
+        parser.add_argument('--missing', action='store_true',
+                            help='Chỉ tính cho các hồ sơ chưa có bảng điểm')
+
+    def handle(self, *args, **options):
+        profiles = UserSkillProfile.objects.all()
+        if options['profile_ids']:
+            profiles = profiles.filter(id__in=options['profile_ids'])
+        if options['missing']:
+            profiles = profiles.filter(matches_refreshed_at=None)
+
+        count = 0
+        for profile in profiles.iterator():
+            refresh_profile_matches(profile)
+            count += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Đã tính lại điểm matching cho {count} hồ sơ'))
@@ -0,0 +1,35 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from jobs.models import Job, UserSkillProfile
+from jobs.token_store import retokenize_jobs, retokenize_profiles
+
+
+# Tách từ lại toàn bộ việc làm và hồ sơ kỹ năng trên mọi CPU.
+# Mặc định chỉ xử lý văn bản đã thay đổi; dùng --force sau khi đổi bộ tách từ.
+class Command(BaseCommand):
+    help = 'Tách từ lại văn bản của việc làm và hồ sơ kỹ năng (process pool)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Số process tách từ (mặc định: số CPU)')
+        parser.add_argument('--chunksize', type=int, default=64,
+                            help='Số văn bản gửi cho mỗi process một lần')
+        parser.add_argument('--force', action='store_true',
+                            help='Tách lại cả văn bản chưa thay đổi')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        job_count = retokenize_jobs(
+            Job.objects.all(), options['workers'], options['chunksize'], options['force'],
+        )
+        profile_count = retokenize_profiles(
+            UserSkillProfile.objects.all(), options['workers'], options['chunksize'], options['force'],
+        )
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Đã tách từ {job_count} việc làm và {profile_count} hồ sơ trong {elapsed:.1f}s'
+        ))
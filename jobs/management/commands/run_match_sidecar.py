@@ -0,0 +1,42 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from jobs.sidecar_server import SIDECAR_WORKERS, SidecarServer, socket_in_use, warm_up
+
+
+# Chạy sidecar matching / tìm kiếm: 1 process giữ các index trong bộ nhớ và trả
+# lời các truy vấn top-K matching, lọc + sắp xếp và đếm facet qua Unix socket.
+# Bật trong web bằng settings.MATCH_SIDECAR_SOCKET (cùng đường dẫn); khi sidecar
+# không chạy, web tự tính trong process như trước.
+class Command(BaseCommand):
+    help = 'Chạy sidecar matching / tìm kiếm trên Unix socket'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--socket', default=None,
+                            help='Đường dẫn Unix socket (mặc định settings.MATCH_SIDECAR_SOCKET)')
+        parser.add_argument('--workers', type=int, default=SIDECAR_WORKERS,
+                            help='Số truy vấn tính đồng thời')
+
+    def handle(self, *args, **options):
+        path = options['socket'] or settings.MATCH_SIDECAR_SOCKET
+        if not path:
+            raise CommandError('Chưa có đường dẫn socket (--socket hoặc settings.MATCH_SIDECAR_SOCKET)')
+        path = str(path)
+        if socket_in_use(path):
+            raise CommandError(f'Đã có sidecar đang chạy trên {path}')
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+        start = time.perf_counter()
+        warm_up()
+        self.stdout.write(f'Đã build index trong {time.perf_counter() - start:.1f}s')
+
+        def ready():
+            self.stdout.write(self.style.SUCCESS(
+                f'Sidecar đang lắng nghe trên {path} ({options["workers"]} worker, Ctrl+C để dừng)'
+            ))
+            self.stdout.flush()
+
+        SidecarServer(path, options['workers']).run(ready)
@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from jobs.models import Job, UserSkillProfile
+from jobs.skill_tagger import (
+    apply_job_skills, apply_profile_skills, find_job_skills, find_profile_skills, get_skill_tagger,
+)
+
+
+# Gắn skill cho toàn bộ việc làm (và hồ sơ nếu dùng --profiles) từ văn bản tự do:
+# mô tả, yêu cầu, trách nhiệm của job, bio của hồ sơ. Chỉ thêm skill, không bỏ
+# skill đã chọn. Dùng --dry-run để xem trước số skill sẽ được thêm.
+class Command(BaseCommand):
+    help = 'Tìm và gắn kỹ năng từ mô tả việc làm và bio hồ sơ'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiles', action='store_true',
+                            help='Gắn cả skill cho hồ sơ kỹ năng (từ bio)')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Chỉ thống kê, không lưu')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        tagger = get_skill_tagger()
+        job_skills = find_job_skills(Job.objects.all())
+        profile_skills = find_profile_skills(UserSkillProfile.objects.all()) if options['profiles'] else {}
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(
+            f'Automaton: {len(tagger)} tên skill/alias, quét xong trong {elapsed:.2f}s'
+        )
+        job_count = sum(len(skill_ids) for skill_ids in job_skills.values())
+        profile_count = sum(len(skill_ids) for skill_ids in profile_skills.values())
+        if options['dry_run']:
+            self.stdout.write(
+                f'Sẽ thêm {job_count} skill cho {len(job_skills)} việc làm '
+                f'và {profile_count} skill cho {len(profile_skills)} hồ sơ'
+            )
+            return
+
+        # 1 transaction: bảng điểm matching chỉ tính lại 1 lần sau khi commit
+        with transaction.atomic():
+            apply_job_skills(job_skills)
+            apply_profile_skills(profile_skills)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Đã thêm {job_count} skill cho {len(job_skills)} việc làm '
+            f'và {profile_count} skill cho {len(profile_skills)} hồ sơ'
+        ))
@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from jobs.lsa import LSA_DIMENSIONS, LSA_MIN_JOBS, LSA_MODEL_FILE, train_lsa_model
+
+
+# Train lại mô hình LSA (jobs/lsa.py) trên toàn bộ việc làm đang hoạt động.
+# Các process web tự đọc lại file mô hình mới; job đăng sau lần train được
+# chiếu bằng mô hình hiện có nên chỉ cần train lại định kỳ (ví dụ hằng đêm).
+class Command(BaseCommand):
+    help = 'Train mô hình LSA (truncated SVD) cho matching theo ngữ nghĩa'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dimensions', type=int, default=LSA_DIMENSIONS,
+                            help='Số chiều của vector LSA')
+        parser.add_argument('--output', default=LSA_MODEL_FILE,
+                            help='Đường dẫn file mô hình')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        result = train_lsa_model(options['dimensions'], options['output'])
+        elapsed = time.perf_counter() - start
+        if result is None:
+            self.stdout.write(self.style.WARNING(
+                f'Chưa đủ việc làm có nội dung để train LSA (cần ít nhất {LSA_MIN_JOBS}), '
+                f'giữ nguyên mô hình cũ; nếu chưa có mô hình, matching "lsa" dùng TF-IDF'
+            ))
+            return
+
+        model, job_count, profile_count = result
+        self.stdout.write(self.style.SUCCESS(
+            f'Đã train LSA {model.dimensions} chiều trên {job_count} việc làm '
+            f'(giải thích {model.explained_variance:.1%} phương sai), '
+            f'{profile_count} hồ sơ, trong {elapsed:.1f}s -> {options["output"]}'
+        ))
@@ -0,0 +1,201 @@
+import json
+import os
+import pickle
+import shutil
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from django.conf import settings
+from django.utils import timezone
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .match_index import JobTextIndex, load_skill_pairs
+from .models import Job
+from .nlp_processor import import_optional
+
+
+# Thư mục artifact của index matching (build bằng `manage.py build_match_index`)
+MATCH_INDEX_DIR = os.path.join(settings.MATCH_DATA_DIR, 'match_index')
+MATCH_INDEX_VERSIONS_DIR = os.path.join(MATCH_INDEX_DIR, 'versions')
+
+# File chứa tên phiên bản đang dùng; đổi file này (os.replace) là đổi index của
+# mọi process cùng lúc
+MATCH_INDEX_CURRENT_FILE = os.path.join(MATCH_INDEX_DIR, 'CURRENT')
+
+# Tăng khi đổi định dạng artifact (artifact cũ bị bỏ qua, cần build lại)
+ARTIFACT_FORMAT_VERSION = 1
+
+# Số phiên bản giữ lại trên đĩa (process đang map phiên bản cũ vẫn đọc được
+# cho tới khi chuyển sang phiên bản mới)
+KEEP_VERSIONS = 2
+
+# Các mảng của 1 phiên bản (mỗi mảng 1 file .npy)
+ARRAY_NAMES = (
+    'tfidf_data', 'tfidf_indices', 'tfidf_indptr', 'job_ids', 'row_hashes',
+    'document_frequency', 'skill_indptr', 'skill_ids', 'category_ids',
+)
+
+
+# ============================================================
+# BUILD
+# ============================================================
+
+# Build artifact từ toàn bộ việc làm đang hoạt động: ma trận TF-IDF (CSR, float32),
+# id / hash văn bản của từng hàng, số job chứa từng từ, skill và ngành nghề của
+# từng job. Ghi vào thư mục tạm rồi đổi tên, sau đó mới trỏ CURRENT sang phiên
+# bản mới, nên process khác không bao giờ đọc phải artifact dở.
+# Trả về (phiên bản, index vừa fit); phiên bản None nếu chưa có job / từ nào.
+def build_match_artifact(keep: int = KEEP_VERSIONS) -> Tuple[Optional[str], JobTextIndex]:
+    index = JobTextIndex()
+    index.watermark = index.fit()
+    if index.vectorizer is None:
+        return None, index
+
+    matrix = index.base
+    index_dtype = np.int32 if matrix.nnz < 2 ** 31 else np.int64
+    job_ids = index.job_ids.tolist()
+    row_by_id = index.row_by_id
+
+    skill_lists = [[] for _ in job_ids]
+    for job_id, skill_id in load_skill_pairs(Job.objects.filter(id__in=job_ids)):
+        if job_id in row_by_id:
+            skill_lists[row_by_id[job_id]].append(skill_id)
+    categories = dict(Job.objects.filter(id__in=job_ids).values_list('id', 'category_id'))
+
+    arrays = {
+        'tfidf_data': matrix.data.astype(np.float32),
+        'tfidf_indices': matrix.indices.astype(index_dtype),
+        'tfidf_indptr': matrix.indptr.astype(index_dtype),
+        'job_ids': index.job_ids,
+        'row_hashes': np.array([index.row_hashes[job_id] for job_id in job_ids], dtype='S40'),
+        'document_frequency': index.document_frequency.astype(np.int64),
+        'skill_indptr': np.concatenate([[0], np.cumsum([len(skills) for skills in skill_lists])]).astype(np.int64),
+        'skill_ids': np.array([skill for skills in skill_lists for skill in skills], dtype=np.int64),
+        'category_ids': np.array([
+            categories.get(job_id) if categories.get(job_id) is not None else -1 for job_id in job_ids
+        ], dtype=np.int64),
+    }
+
+    version = timezone.now().strftime('%Y%m%d%H%M%S%f')
+    meta = {
+        'format': ARTIFACT_FORMAT_VERSION,
+        'version': version,
+        'created_at': timezone.now().isoformat(),
+        'watermark': index.watermark.isoformat() if index.watermark else None,
+        'job_count': len(job_ids),
+        'feature_count': matrix.shape[1],
+    }
+
+    os.makedirs(MATCH_INDEX_VERSIONS_DIR, exist_ok=True)
+    temp_dir = os.path.join(MATCH_INDEX_VERSIONS_DIR, f'.{version}.{os.getpid()}.tmp')
+    os.makedirs(temp_dir)
+    for name, array in arrays.items():
+        np.save(os.path.join(temp_dir, f'{name}.npy'), np.ascontiguousarray(array))
+    with open(os.path.join(temp_dir, 'vectorizer.pkl'), 'wb') as f:
+        pickle.dump(index.vectorizer, f, protocol=pickle.HIGHEST_PROTOCOL)
+    with open(os.path.join(temp_dir, 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=2)
+    os.rename(temp_dir, os.path.join(MATCH_INDEX_VERSIONS_DIR, version))
+
+    temp_current = f'{MATCH_INDEX_CURRENT_FILE}.{os.getpid()}.tmp'
+    with open(temp_current, 'w') as f:
+        f.write(version)
+    os.replace(temp_current, MATCH_INDEX_CURRENT_FILE)
+
+    remove_old_versions(keep)
+    index.artifact_version = version
+    return version, index
+
+# Các phiên bản đã build (cũ -> mới).
+def list_versions() -> List[str]:
+    try:
+        names = os.listdir(MATCH_INDEX_VERSIONS_DIR)
+    except OSError:
+        return []
+    return sorted(name for name in names if not name.startswith('.'))
+
+# Xóa các phiên bản cũ, giữ lại `keep` phiên bản mới nhất và phiên bản đang dùng.
+def remove_old_versions(keep: int = KEEP_VERSIONS) -> List[str]:
+    current = read_current_version()
+    versions = list_versions()
+    removed = [version for version in versions[:-max(keep, 1)] if version != current]
+    for version in removed:
+        shutil.rmtree(os.path.join(MATCH_INDEX_VERSIONS_DIR, version), ignore_errors=True)
+    return removed
+
+
+# ============================================================
+# LOAD
+# ============================================================
+
+def read_current_version() -> Optional[str]:
+    try:
+        with open(MATCH_INDEX_CURRENT_FILE) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+# (khóa stat của CURRENT, phiên bản) lần đọc gần nhất
+_current = (None, None)
+
+# Phiên bản artifact đang dùng, None nếu chưa build. Mỗi lần gọi chỉ stat file
+# CURRENT; chỉ đọc lại nội dung khi file đổi (os.replace đổi inode).
+def current_artifact_version() -> Optional[str]:
+    global _current
+    try:
+        stat = os.stat(MATCH_INDEX_CURRENT_FILE)
+    except OSError:
+        return None
+
+    key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    if key != _current[0]:
+        _current = (key, read_current_version())
+    return _current[1]
+
+# Nạp 1 phiên bản artifact. Các mảng lớn (ma trận TF-IDF) được map từ file
+# (numpy memmap, chỉ đọc): mọi process dùng chung 1 bản trong page cache của hệ
+# điều hành thay vì mỗi process giữ 1 bản. Trả về (index TF-IDF, mảng cho
+# JobInvertedIndex.load_arrays) hoặc None nếu artifact không đọc được.
+def load_match_artifact(version: str):
+    path = os.path.join(MATCH_INDEX_VERSIONS_DIR, version)
+    try:
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        if meta.get('format') != ARTIFACT_FORMAT_VERSION:
+            print(f"Match index artifact format {meta.get('format')} is outdated, run `manage.py build_match_index`")
+            return None
+        arrays = {
+            name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r')
+            for name in ARRAY_NAMES
+        }
+        with open(os.path.join(path, 'vectorizer.pkl'), 'rb') as f:
+            vectorizer = pickle.load(f)
+    except Exception as e:
+        print(f"Error loading match index artifact {version}: {e}")
+        return None
+
+    sparse = import_optional('scipy.sparse')
+    job_ids = np.asarray(arrays['job_ids'])
+    index = JobTextIndex()
+    index.vectorizer = vectorizer
+    # csr_matrix giữ nguyên các mảng memmap (không copy) khi kiểu dữ liệu đã đúng
+    index.base = sparse.csr_matrix(
+        (arrays['tfidf_data'], arrays['tfidf_indices'], arrays['tfidf_indptr']),
+        shape=(len(job_ids), meta['feature_count']),
+    )
+    index.job_ids = job_ids
+    index.row_by_id = {job_id: row for row, job_id in enumerate(job_ids.tolist())}
+    index.row_hashes = dict(zip(job_ids.tolist(), np.char.decode(arrays['row_hashes'], 'ascii').tolist()))
+    # Bản sao trong process: được cập nhật khi job thay đổi
+    index.document_frequency = np.array(arrays['document_frequency'])
+    index.fitted_idf = vectorizer.idf_
+    index.watermark = datetime.fromisoformat(meta['watermark']) if meta['watermark'] else None
+    index.artifact_version = version
+    index._update_drift()
+
+    skill_arrays = (job_ids, arrays['skill_indptr'], arrays['skill_ids'], arrays['category_ids'])
+    return index, skill_arrays
@@ -0,0 +1,840 @@
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from django.db import close_old_connections
+from django.db.models import Count, Max, QuerySet
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .models import Job
+from .nlp_processor import import_optional, is_installed
+from .token_store import content_hash, load_job_tokens
+
+
+# Số feature tối đa của vectorizer fit trên toàn bộ việc làm
+TFIDF_MAX_FEATURES = 50000
+
+# Fit lại index TF-IDF khi IDF lệch quá ngưỡng này so với lúc fit (xem
+# JobTextIndex._update_drift); dọn hàng bỏ khi chúng chiếm quá tỉ lệ này
+TFIDF_REFIT_DRIFT = 0.1
+TFIDF_COMPACT_RATIO = 0.25
+
+# Tham số BM25: k1 - mức bão hòa theo số lần xuất hiện của từ, b - mức chuẩn hóa
+# theo độ dài văn bản (0: không chuẩn hóa, 1: chuẩn hóa hoàn toàn)
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Số chiều cố định của không gian hashing (HashingVectorizer), không phụ thuộc
+# số từ của corpus; bộ nhớ cho df là HASHING_FEATURES số int32 (4 MB)
+HASHING_FEATURES = 2 ** 20
+
+# scipy và sklearn chỉ được import khi build index lần đầu
+SKLEARN_AVAILABLE = np is not None and is_installed('scipy') and is_installed('sklearn')
+
+
+# ============================================================
+# JOB DOCUMENTS
+# ============================================================
+
+# Các cặp (job_id, skill_id) của cả queryset trong 1 query.
+def load_skill_pairs(jobs: QuerySet) -> List[Tuple[int, int]]:
+    return list(
+        Job.required_skills.through.objects
+        .filter(job__in=jobs.values('id'))
+        .values_list('job_id', 'skill_id')
+    )
+
+# Trạng thái của tập việc làm đang hoạt động: (số lượng, lần cập nhật gần nhất).
+# Dùng để biết index trong bộ nhớ đã cũ hay chưa (1 query).
+def get_catalog_state() -> Tuple[int, Optional[object]]:
+    state = Job.objects.filter(is_active=True).aggregate(
+        count=Count('id'),
+        last_updated=Max('updated_at'),
+    )
+    return state['count'], state['last_updated']
+
+
+# ============================================================
+# INCREMENTAL CATALOG INDEX
+# ============================================================
+
+# Lớp cơ sở cho các index trong bộ nhớ của process.
+# Index được đồng bộ dần theo Job.updated_at: mỗi lần sync chỉ đọc lại các job
+# đã thay đổi kể từ lần trước; nếu số job không khớp (job bị xóa ở process khác)
+# thì build lại toàn bộ.
+class CatalogIndex:
+    def __init__(self):
+        self.state = None
+        self.watermark = None
+        self.lock = threading.RLock()
+
+    def __len__(self):
+        raise NotImplementedError
+
+    def __contains__(self, job_id):
+        raise NotImplementedError
+
+    # Xóa toàn bộ dữ liệu của index.
+    def clear(self):
+        raise NotImplementedError
+
+    # Thêm/cập nhật các job đang hoạt động và bỏ các job đã ẩn trong queryset.
+    # Trả về updated_at lớn nhất đã xử lý.
+    def update_jobs(self, jobs: QuerySet):
+        raise NotImplementedError
+
+    def remove_job(self, job_id: int):
+        raise NotImplementedError
+
+    def rebuild(self):
+        with self.lock:
+            self.clear()
+            self.watermark = self.update_jobs(Job.objects.filter(is_active=True))
+
+    def sync(self, state=None):
+        if state is None:
+            state = get_catalog_state()
+
+        with self.lock:
+            if state == self.state:
+                return
+
+            if self.watermark is None:
+                self.rebuild()
+            else:
+                watermark = self.update_jobs(Job.objects.filter(updated_at__gte=self.watermark))
+                if watermark is not None:
+                    self.watermark = max(self.watermark, watermark)
+                if len(self) != state[0]:
+                    self.rebuild()
+
+            self.state = state
+
+
+# ============================================================
+# INVERTED INDEX
+# ============================================================
+
+# Inverted index: Skill.id / JobCategory.id -> tập id các job đang hoạt động.
+# Dùng để loại trước các job không có skill hay ngành nghề chung với ứng viên.
+class JobInvertedIndex(CatalogIndex):
+    def __init__(self):
+        super().__init__()
+        self.skill_postings: Dict[int, Set[int]] = {}
+        self.category_postings: Dict[int, Set[int]] = {}
+        self.job_skills: Dict[int, Tuple[int, ...]] = {}
+        self.job_category: Dict[int, Optional[int]] = {}
+
+    def __len__(self):
+        return len(self.job_category)
+
+    def __contains__(self, job_id):
+        return job_id in self.job_category
+
+    def clear(self):
+        self.skill_postings = {}
+        self.category_postings = {}
+        self.job_skills = {}
+        self.job_category = {}
+
+    def update_jobs(self, jobs: QuerySet):
+        rows = list(jobs.values_list('id', 'category_id', 'is_active', 'updated_at'))
+        skill_ids = {}
+        for job_id, skill_id in load_skill_pairs(jobs):
+            skill_ids.setdefault(job_id, []).append(skill_id)
+
+        watermark = None
+        for job_id, category_id, is_active, updated_at in rows:
+            self.remove_job(job_id)
+            if is_active:
+                self.add_job(job_id, skill_ids.get(job_id, []), category_id)
+            if watermark is None or updated_at > watermark:
+                watermark = updated_at
+        return watermark
+
+    # Nạp từ các mảng của artifact (match_artifact): skill của job tại hàng row là
+    # skill_ids[skill_indptr[row]:skill_indptr[row + 1]], category_ids = -1 nếu
+    # job không có ngành nghề. Sau đó chỉ cần đồng bộ các job đổi từ watermark.
+    def load_arrays(self, job_ids, skill_indptr, skill_ids, category_ids, watermark):
+        self.clear()
+        skill_indptr = skill_indptr.tolist()
+        skill_ids = skill_ids.tolist()
+        for row, (job_id, category_id) in enumerate(zip(job_ids.tolist(), category_ids.tolist())):
+            self.add_job(
+                job_id, skill_ids[skill_indptr[row]:skill_indptr[row + 1]],
+                category_id if category_id >= 0 else None,
+            )
+        self.state = None
+        self.watermark = watermark
+
+    def add_job(self, job_id: int, skill_ids: Iterable[int], category_id: Optional[int]):
+        skill_ids = tuple(skill_ids)
+        self.job_skills[job_id] = skill_ids
+        self.job_category[job_id] = category_id
+        for skill_id in skill_ids:
+            self.skill_postings.setdefault(skill_id, set()).add(job_id)
+        if category_id is not None:
+            self.category_postings.setdefault(category_id, set()).add(job_id)
+
+    def remove_job(self, job_id: int):
+        if job_id not in self.job_category:
+            return
+        for skill_id in self.job_skills.pop(job_id):
+            self.skill_postings[skill_id].discard(job_id)
+        category_id = self.job_category.pop(job_id)
+        if category_id is not None:
+            self.category_postings[category_id].discard(job_id)
+
+    # Hợp các posting list của skills và categories - O(tổng độ dài posting).
+    def candidates(self, skill_ids: Iterable[int], category_ids: Iterable[int]) -> Set[int]:
+        result = set()
+        for skill_id in skill_ids:
+            result.update(self.skill_postings.get(skill_id, ()))
+        for category_id in category_ids:
+            result.update(self.category_postings.get(category_id, ()))
+        return result
+
+    # Các cặp (job_id, skill_id) của các job trong index, không cần query.
+    def skill_pairs(self, job_ids: Iterable[int]) -> List[Tuple[int, int]]:
+        return [
+            (job_id, skill_id)
+            for job_id in job_ids
+            for skill_id in self.job_skills.get(job_id, ())
+        ]
+
+
+# ============================================================
+# SKILL INCIDENCE
+# ============================================================
+
+# Ma trận job x skill (CSR, giá trị 1) của một tập job.
+# Hàng theo thứ tự job_ids, cột theo thứ tự skill_ids.
+class SkillIncidence:
+    def __init__(self, job_ids: List[int], skill_ids, matrix):
+        self.job_ids = np.asarray(job_ids, dtype=np.int64)
+        self.skill_ids = np.asarray(skill_ids, dtype=np.int64)
+        self.matrix = matrix
+
+    @classmethod
+    def from_pairs(cls, job_ids: List[int], pairs: List[Tuple[int, int]]) -> 'SkillIncidence':
+        row_by_id = {job_id: row for row, job_id in enumerate(job_ids)}
+        pairs = [(row_by_id[job_id], skill_id) for job_id, skill_id in pairs if job_id in row_by_id]
+
+        rows = np.fromiter((row for row, _ in pairs), dtype=np.int64, count=len(pairs))
+        skills = np.fromiter((skill for _, skill in pairs), dtype=np.int64, count=len(pairs))
+        skill_ids, cols = np.unique(skills, return_inverse=True)
+
+        sparse = import_optional('scipy.sparse')
+        matrix = sparse.csr_matrix(
+            (np.ones(len(pairs), dtype=np.int32), (rows, cols.reshape(-1))),
+            shape=(len(job_ids), len(skill_ids)),
+        )
+        matrix.sum_duplicates()
+        matrix.data[:] = 1
+        return cls(job_ids, skill_ids, matrix)
+
+    # Số skill yêu cầu của từng job.
+    def totals(self) -> 'np.ndarray':
+        return np.diff(self.matrix.indptr)
+
+    # Ma trận chỉ giữ lại các skill mà user có (job x skill).
+    def matched(self, user_skill_ids) -> 'scipy.sparse.csr_matrix':
+        mask = np.isin(self.skill_ids, list(user_skill_ids)).astype(np.int32)
+        matched = self.matrix.multiply(mask.reshape(1, -1)).tocsr()
+        matched.eliminate_zeros()
+        return matched
+
+    # Các skill id của job tại hàng row trong ma trận (CSR) bất kỳ cùng cột.
+    def row_skill_ids(self, matrix, row: int) -> List[int]:
+        start, end = matrix.indptr[row], matrix.indptr[row + 1]
+        return self.skill_ids[matrix.indices[start:end]].tolist()
+
+
+# ============================================================
+# CORPUS TF-IDF INDEX
+# ============================================================
+
+# TF-IDF fit trên văn bản đã tách từ (Job.tokens) của toàn bộ việc làm đang
+# hoạt động. Mỗi job có 1 hàng (đã chuẩn hóa L2) trong ma trận sparse, nên độ
+# tương đồng cosine giữa user và mọi job chỉ là 1 phép nhân ma trận - vector.
+#
+# Index được cập nhật dần (CatalogIndex) với từ vựng và IDF đã fit:
+# - chỉ job có văn bản thay đổi (hash của tokens, tức của tiêu đề / mô tả / yêu
+#   cầu / trách nhiệm / skills) được vector hóa lại và nối vào cuối ma trận
+# - hàng cũ của job đã sửa, đã ẩn hoặc đã xóa thành "hàng bỏ" (tombstone): không
+#   còn trong row_by_id, được dọn ở nền khi chiếm quá TFIDF_COMPACT_RATIO
+# - số job chứa từng từ được theo dõi để tính độ lệch IDF so với lúc fit; quá
+#   TFIDF_REFIT_DRIFT thì fit lại toàn bộ ở nền (từ mới chỉ có sau khi fit lại)
+#
+# Ma trận gồm 2 phần: base (các hàng lúc fit, có thể map từ file artifact dùng
+# chung giữa các process - xem match_artifact) và delta (các hàng thêm sau đó,
+# trong bộ nhớ của process). Số thứ tự hàng của delta tiếp nối sau base.
+class JobTextIndex(CatalogIndex):
+    def __init__(self):
+        super().__init__()
+        self.vectorizer = None
+        self._feature_names = None
+        self.clear()
+
+    def __len__(self):
+        return len(self.row_by_id)
+
+    def __contains__(self, job_id):
+        return job_id in self.row_by_id
+
+    def clear(self):
+        # job_id của từng hàng trong ma trận (kể cả hàng bỏ)
+        self.job_ids = np.zeros(0, dtype=np.int64)
+        self.row_by_id: Dict[int, int] = {}
+        # job_id -> hash của văn bản đã vector hóa
+        self.row_hashes: Dict[int, str] = {}
+        self.base = None
+        self.delta = None
+        self.document_frequency = None
+        self.fitted_idf = None
+        self.tombstones = 0
+        self.drift = 0.0
+        # Phiên bản artifact của base (None: fit trong process). Index dùng chung
+        # không tự fit lại / dọn hàng bỏ: việc đó do `manage.py build_match_index`.
+        self.artifact_version = None
+
+    # Fit lại vectorizer trên toàn bộ job đang hoạt động. Trả về watermark.
+    def fit(self):
+        jobs = Job.objects.filter(is_active=True)
+        watermark = jobs.aggregate(last_updated=Max('updated_at'))['last_updated']
+        job_ids, texts = load_job_tokens(jobs)
+
+        self.clear()
+        vectorizer = import_optional('sklearn.feature_extraction.text').TfidfVectorizer(
+            ngram_range=(1, 2),
+            min_df=1,
+            max_features=TFIDF_MAX_FEATURES
+        )
+        try:
+            matrix = vectorizer.fit_transform(texts).tocsr()
+        except ValueError:
+            # Chưa có job nào hoặc không có từ nào hợp lệ
+            self.vectorizer = None
+            return watermark
+
+        self.vectorizer = vectorizer
+        self._feature_names = None
+        self.base = matrix
+        self.job_ids = np.asarray(job_ids, dtype=np.int64)
+        self.row_by_id = {job_id: row for row, job_id in enumerate(job_ids)}
+        self.row_hashes = {job_id: content_hash(text) for job_id, text in zip(job_ids, texts)}
+        self.document_frequency = np.bincount(matrix.indices, minlength=matrix.shape[1])
+        self.fitted_idf = vectorizer.idf_.copy()
+        return watermark
+
+    # Lần đầu (chưa fit): fit. Sau đó (số job không khớp, ví dụ job bị xóa ở
+    # process khác): bỏ các job không còn hoạt động và thêm các job còn thiếu,
+    # không fit lại.
+    def rebuild(self):
+        with self.lock:
+            if self.vectorizer is None:
+                self.watermark = self.fit()
+                return
+
+            active_ids = set(Job.objects.filter(is_active=True).values_list('id', flat=True))
+            for job_id in set(self.row_by_id) - active_ids:
+                self.remove_job(job_id)
+            missing = active_ids - set(self.row_by_id)
+            if missing:
+                self.update_jobs(Job.objects.filter(id__in=missing))
+
+    def update_jobs(self, jobs: QuerySet):
+        rows = list(jobs.values_list('id', 'is_active', 'updated_at'))
+        watermark = max((updated_at for _, _, updated_at in rows), default=None)
+        if self.vectorizer is None:
+            return watermark
+
+        active_ids = []
+        for job_id, is_active, _ in rows:
+            if is_active:
+                active_ids.append(job_id)
+            else:
+                self.remove_job(job_id)
+
+        changed = []
+        if active_ids:
+            for job_id, text in zip(*load_job_tokens(Job.objects.filter(id__in=active_ids))):
+                text_hash = content_hash(text)
+                if self.row_hashes.get(job_id) != text_hash:
+                    changed.append((job_id, text, text_hash))
+        if changed:
+            self._append(changed)
+        self._update_drift()
+        return watermark
+
+    # Vector hóa các job đã đổi (với từ vựng / IDF hiện tại) và nối vào cuối ma
+    # trận; hàng cũ của chúng thành hàng bỏ.
+    def _append(self, changed: List[Tuple[int, str, str]]):
+        sparse = import_optional('scipy.sparse')
+        rows = self.vectorizer.transform([text for _, text, _ in changed]).tocsr()
+        for job_id, _, _ in changed:
+            self.remove_job(job_id)
+
+        start = self.row_count
+        # Gán ma trận trước row_by_id: hàng nào có trong row_by_id cũng đã có trong ma trận
+        self.delta = rows if self.delta is None else sparse.vstack([self.delta, rows], format='csr')
+        self.job_ids = np.concatenate([self.job_ids, [job_id for job_id, _, _ in changed]])
+        for offset, (job_id, _, text_hash) in enumerate(changed):
+            self.row_by_id[job_id] = start + offset
+            self.row_hashes[job_id] = text_hash
+        self.document_frequency += np.bincount(rows.indices, minlength=rows.shape[1])
+
+    def remove_job(self, job_id: int):
+        row = self.row_by_id.pop(job_id, None)
+        if row is None:
+            return
+        self.row_hashes.pop(job_id, None)
+        self.document_frequency[self.row_vector(row).indices] -= 1
+        self.tombstones += 1
+
+    # Độ lệch IDF hiện tại (theo các job còn trong index) so với lúc fit:
+    # tổng |idf mới - idf lúc fit| / tổng idf lúc fit.
+    def _update_drift(self):
+        self.drift = float(np.abs(self.current_idf - self.fitted_idf).sum() / self.fitted_idf.sum())
+
+    # IDF theo các job hiện có trong index (cùng công thức smooth_idf của
+    # TfidfVectorizer); khác fitted_idf khi đã thêm / bỏ job sau lần fit.
+    @property
+    def current_idf(self):
+        return np.log((1 + len(self.row_by_id)) / (1 + self.document_frequency)) + 1
+
+    def needs_refit(self) -> bool:
+        return self.artifact_version is None and self.vectorizer is not None and self.drift > TFIDF_REFIT_DRIFT
+
+    def needs_compaction(self) -> bool:
+        return self.artifact_version is None and self.tombstones > TFIDF_COMPACT_RATIO * self.row_count
+
+    # Số hàng của ma trận (base + delta, kể cả hàng bỏ).
+    @property
+    def row_count(self) -> int:
+        base_rows = self.base.shape[0] if self.base is not None else 0
+        return base_rows + (self.delta.shape[0] if self.delta is not None else 0)
+
+    # Hàng row của ma trận (1 x V).
+    def row_vector(self, row: int):
+        base_rows = self.base.shape[0]
+        return self.base[row] if row < base_rows else self.delta[row - base_rows]
+
+    # Bản sao của index chỉ gồm các hàng còn dùng (cùng vectorizer, watermark).
+    def compacted(self) -> 'JobTextIndex':
+        with self.lock:
+            index = JobTextIndex()
+            job_ids = list(self.row_by_id)
+            rows = np.fromiter(self.row_by_id.values(), dtype=np.int64, count=len(job_ids))
+            index.vectorizer = self.vectorizer
+            index._feature_names = self._feature_names
+            matrix = self.base
+            if self.delta is not None:
+                matrix = import_optional('scipy.sparse').vstack([matrix, self.delta], format='csr')
+            index.base = matrix[rows]
+            index.job_ids = np.asarray(job_ids, dtype=np.int64)
+            index.row_by_id = {job_id: row for row, job_id in enumerate(job_ids)}
+            index.row_hashes = dict(self.row_hashes)
+            index.document_frequency = self.document_frequency.copy()
+            index.fitted_idf = self.fitted_idf
+            index.drift = self.drift
+            index.state = self.state
+            index.watermark = self.watermark
+            return index
+
+    # Từ/cụm từ tương ứng với các cột của ma trận.
+    @property
+    def feature_names(self):
+        if self._feature_names is None:
+            self._feature_names = self.vectorizer.get_feature_names_out()
+        return self._feature_names
+
+    # Vector TF-IDF (1 x V) của một văn bản (đã tách từ) theo từ vựng của corpus.
+    def transform(self, text: str):
+        return self.vectorizer.transform([text])
+
+    # Độ tương đồng cosine giữa văn bản và từng hàng của ma trận (theo thứ tự
+    # self.job_ids, kể cả hàng bỏ), hoặc chỉ với các hàng trong rows.
+    def similarities(self, text: str, rows=None) -> 'np.ndarray':
+        base, delta = self.base, self.delta
+        if self.vectorizer is None or not text:
+            return np.zeros(self.row_count if rows is None else len(rows))
+        vector = self.transform(text).T
+
+        if rows is None:
+            parts = [base] if delta is None else [base, delta]
+            return np.concatenate([(part @ vector).toarray().ravel() for part in parts])
+
+        rows = np.asarray(rows, dtype=np.int64)
+        result = np.zeros(len(rows))
+        in_base = rows < base.shape[0]
+        if in_base.any():
+            result[in_base] = (base[rows[in_base]] @ vector).toarray().ravel()
+        if not in_base.all():
+            result[~in_base] = (delta[rows[~in_base] - base.shape[0]] @ vector).toarray().ravel()
+        return result
+
+    # Độ tương đồng giữa 2 văn bản bất kỳ, dùng IDF của corpus (không fit lại).
+    def text_similarity(self, text1: str, text2: str) -> float:
+        if self.vectorizer is None or not text1 or not text2:
+            return 0.0
+        vectors = self.vectorizer.transform([text1, text2])
+        return float((vectors[0] @ vectors[1].T).toarray()[0][0])
+
+
+# ============================================================
+# HASHED COUNT VECTORS
+# ============================================================
+
+# Vector đếm từ (unigram + bigram) không cần từ vựng của các job đang hoạt
+# động: từ / cụm từ được hash vào HASHING_FEATURES chiều cố định
+# (HashingVectorizer không fit), nên mỗi job được vector hóa độc lập ngay khi
+# đăng và không bao giờ phải fit lại. Số job chứa từng feature (df) được cập
+# nhật khi thêm / bỏ job. Lớp con tính ma trận trọng số (snapshot) từ các vector
+# đã lưu ở lần tính điểm đầu tiên sau khi tập job thay đổi, không đọc database.
+class HashedCountIndex(CatalogIndex):
+    def __init__(self, n_features: int = HASHING_FEATURES):
+        super().__init__()
+        self.n_features = n_features
+        self.hasher = None
+        # job_id -> (indices, counts) của vector đếm từ
+        self.rows: Dict[int, Tuple['np.ndarray', 'np.ndarray']] = {}
+        self._document_frequency = None
+        self._snapshot = None
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __contains__(self, job_id):
+        return job_id in self.rows
+
+    # Mảng df (n_features phần tử int32, 4MB) chỉ được cấp phát ở lần dùng đầu
+    # tiên (lần sync đầu), không phải khi import module tạo index của process.
+    @property
+    def document_frequency(self) -> 'np.ndarray':
+        if self._document_frequency is None:
+            self._document_frequency = np.zeros(self.n_features, dtype=np.int32)
+        return self._document_frequency
+
+    @document_frequency.setter
+    def document_frequency(self, value):
+        self._document_frequency = value
+
+    def clear(self):
+        self.rows = {}
+        if self._document_frequency is not None:
+            self._document_frequency[:] = 0
+        self._snapshot = None
+
+    # Ma trận đếm từ (văn bản x HASHING_FEATURES) của các văn bản đã tách từ.
+    def vectorize(self, texts: List[str]) -> 'scipy.sparse.csr_matrix':
+        if self.hasher is None:
+            self.hasher = import_optional('sklearn.feature_extraction.text').HashingVectorizer(
+                n_features=self.n_features,
+                ngram_range=(1, 2),
+                alternate_sign=False,
+                norm=None,
+                dtype=np.float32,
+            )
+        matrix = self.hasher.transform(texts).tocsr()
+        matrix.sum_duplicates()
+        return matrix
+
+    def update_jobs(self, jobs: QuerySet):
+        rows = list(jobs.values_list('id', 'is_active', 'updated_at'))
+        active_ids = [job_id for job_id, is_active, _ in rows if is_active]
+        job_ids, texts = load_job_tokens(Job.objects.filter(id__in=active_ids)) if active_ids else ([], [])
+        counts = self.vectorize(texts) if texts else None
+
+        watermark = None
+        for job_id, _, updated_at in rows:
+            self.remove_job(job_id)
+            if watermark is None or updated_at > watermark:
+                watermark = updated_at
+        for row, job_id in enumerate(job_ids):
+            start, end = counts.indptr[row], counts.indptr[row + 1]
+            self.add_job(job_id, counts.indices[start:end].copy(), counts.data[start:end].copy())
+        return watermark
+
+    def add_job(self, job_id: int, indices, counts):
+        self.remove_job(job_id)
+        self.rows[job_id] = (indices, counts)
+        self.document_frequency[indices] += 1
+        self._snapshot = None
+
+    def remove_job(self, job_id: int):
+        row = self.rows.pop(job_id, None)
+        if row is not None:
+            self.document_frequency[row[0]] -= 1
+            self._snapshot = None
+
+    # Ma trận đếm từ (job x HASHING_FEATURES) ghép từ các vector đã lưu.
+    # Trả về (row_by_id, ma trận).
+    def count_matrix(self):
+        sparse = import_optional('scipy.sparse')
+        job_ids = list(self.rows)
+        lengths = np.fromiter((len(self.rows[job_id][0]) for job_id in job_ids),
+                              dtype=np.int64, count=len(job_ids))
+        indptr = np.concatenate([[0], np.cumsum(lengths)])
+        indices = np.concatenate([self.rows[job_id][0] for job_id in job_ids] or [np.zeros(0, np.int32)])
+        counts = np.concatenate([self.rows[job_id][1] for job_id in job_ids] or [np.zeros(0, np.float32)])
+        matrix = sparse.csr_matrix((counts, indices, indptr), shape=(len(job_ids), self.n_features))
+        return {job_id: row for row, job_id in enumerate(job_ids)}, matrix
+
+
+# ============================================================
+# HASHING INDEX
+# ============================================================
+
+# TF-IDF trên vector đếm từ của HashedCountIndex: IDF và độ dài vector của job
+# tính lại (1 phép nhân ma trận sparse - vector) ở lần tính điểm đầu tiên sau
+# khi tập job thay đổi. Điểm bằng cosine TF-IDF (smooth idf như
+# TfidfVectorizer), chỉ khác ở các từ bị trùng hash.
+class JobHashingIndex(HashedCountIndex):
+    # Ma trận TF-IDF (chưa chuẩn hóa) của các job, IDF và độ dài từng hàng,
+    # tính 1 lần cho mỗi phiên bản của tập job.
+    def snapshot(self):
+        with self.lock:
+            if self._snapshot is None:
+                row_by_id, matrix = self.count_matrix()
+                idf = np.log((1 + len(row_by_id)) / (1 + self.document_frequency.astype(np.float32))) + 1
+                # Feature không có job nào chứa bị bỏ (như từ ngoài từ vựng của TfidfVectorizer)
+                idf[self.document_frequency == 0] = 0
+                matrix.data *= idf[matrix.indices]
+                norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+                self._snapshot = (row_by_id, matrix, idf.astype(np.float32), norms)
+            return self._snapshot
+
+    # Vector TF-IDF (đã chuẩn hóa L2, dạng cột) của văn bản với IDF hiện tại.
+    def _query(self, text: str, idf):
+        vector = self.vectorize([text])
+        vector.data *= idf[vector.indices]
+        norm = np.sqrt(vector.multiply(vector).sum())
+        if norm > 0:
+            vector.data /= norm
+        return vector.T
+
+    # Cosine giữa văn bản và mọi job trong index. Trả về (điểm, row_by_id).
+    def similarities(self, text: str) -> Tuple['np.ndarray', Dict[int, int]]:
+        row_by_id, matrix, idf, norms = self.snapshot()
+        if not text or not row_by_id:
+            return np.zeros(len(row_by_id), dtype=np.float32), row_by_id
+        scores = (matrix @ self._query(text, idf)).toarray().ravel()
+        np.divide(scores, norms, out=scores, where=norms > 0)
+        return scores, row_by_id
+
+    # Cosine giữa văn bản và các văn bản khác không có trong index (ví dụ job đã
+    # ẩn), dùng IDF hiện tại của index.
+    def score_documents(self, text: str, documents: List[str]) -> 'np.ndarray':
+        if not text or not documents:
+            return np.zeros(len(documents), dtype=np.float32)
+        _, _, idf, _ = self.snapshot()
+        matrix = self.vectorize(documents)
+        matrix.data *= idf[matrix.indices]
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        scores = (matrix @ self._query(text, idf)).toarray().ravel()
+        np.divide(scores, norms, out=scores, where=norms > 0)
+        return scores
+
+
+# ============================================================
+# CORPUS BM25 INDEX
+# ============================================================
+
+# BM25 (Okapi) trên vector đếm từ của HashedCountIndex. Ngoài df, tổng độ dài
+# các job cũng được cập nhật khi thêm / bỏ job (độ dài trung bình không cần
+# đọc lại catalog); trọng số BM25 của mọi cặp (job, từ) tính lại từ các vector
+# đã lưu ở lần tính điểm đầu tiên sau khi tập job thay đổi, nên điểm của 1 hồ
+# sơ với toàn bộ catalog là 1 phép nhân ma trận - vector. Khác cosine TF-IDF,
+# điểm BM25 không bị chặn trên.
+class JobBM25Index(HashedCountIndex):
+    def __init__(self, n_features: int = HASHING_FEATURES, k1: float = BM25_K1, b: float = BM25_B):
+        super().__init__(n_features)
+        self.k1 = k1
+        self.b = b
+        self.total_length = 0.0
+
+    def clear(self):
+        super().clear()
+        self.total_length = 0.0
+
+    def add_job(self, job_id: int, indices, counts):
+        super().add_job(job_id, indices, counts)
+        self.total_length += float(counts.sum())
+
+    def remove_job(self, job_id: int):
+        row = self.rows.get(job_id)
+        if row is not None:
+            self.total_length -= float(row[1].sum())
+        super().remove_job(job_id)
+
+    @property
+    def avg_length(self) -> float:
+        return self.total_length / len(self.rows) if self.rows else 0.0
+
+    # idf của Lucene: log(1 + (N - df + 0.5) / (df + 0.5)), luôn dương
+    def idf(self) -> 'np.ndarray':
+        document_frequency = self.document_frequency.astype(np.float32)
+        return np.log1p((len(self.rows) - document_frequency + 0.5) / (document_frequency + 0.5))
+
+    # Trọng số BM25 của ma trận đếm (văn bản x từ):
+    # idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * độ dài / độ dài trung bình))
+    def weigh(self, counts, idf, avg_length: float) -> 'scipy.sparse.csr_matrix':
+        counts = counts.tocsr().astype(np.float32)
+        lengths = np.asarray(counts.sum(axis=1)).ravel()
+        row_lengths = np.repeat(lengths, np.diff(counts.indptr))
+        tf = counts.data
+        norm = self.k1 * (1 - self.b + self.b * row_lengths / (avg_length or 1.0))
+        counts.data = idf[counts.indices] * tf * (self.k1 + 1) / (tf + norm)
+        return counts
+
+    # Ma trận trọng số BM25 của các job, idf và độ dài trung bình, tính 1 lần
+    # cho mỗi phiên bản của tập job.
+    def snapshot(self):
+        with self.lock:
+            if self._snapshot is None:
+                row_by_id, counts = self.count_matrix()
+                idf, avg_length = self.idf(), self.avg_length
+                self._snapshot = (row_by_id, self.weigh(counts, idf, avg_length), idf, avg_length)
+            return self._snapshot
+
+    # Vector truy vấn (dạng cột): mỗi từ của văn bản tính 1 lần.
+    def _query(self, text: str):
+        vector = self.vectorize([text])
+        vector.data[:] = 1
+        return vector.T
+
+    # Điểm BM25 của văn bản với mọi job trong index. Trả về (điểm, row_by_id).
+    def scores(self, text: str) -> Tuple['np.ndarray', Dict[int, int]]:
+        row_by_id, weights, _, _ = self.snapshot()
+        if not text or not row_by_id:
+            return np.zeros(len(row_by_id), dtype=np.float32), row_by_id
+        return (weights @ self._query(text)).toarray().ravel(), row_by_id
+
+    # Điểm BM25 của văn bản với các văn bản khác không có trong index (ví dụ job
+    # đã ẩn), dùng df và độ dài trung bình hiện tại của index.
+    def score_documents(self, text: str, documents: List[str]) -> 'np.ndarray':
+        if not text or not documents:
+            return np.zeros(len(documents), dtype=np.float32)
+        _, _, idf, avg_length = self.snapshot()
+        weights = self.weigh(self.vectorize(documents), idf, avg_length)
+        return (weights @ self._query(text)).toarray().ravel()
+
+
+_text_index = JobTextIndex() if np is not None else None
+_text_index_lock = threading.Lock()
+_text_index_worker = None
+_failed_artifact_version = None
+
+# Dùng artifact mới nhất (nếu có) làm index TF-IDF của process. Mỗi lần gọi chỉ
+# tốn 1 lần stat file CURRENT; chỉ đọc lại khi có phiên bản mới.
+def _refresh_from_artifact():
+    global _text_index, _failed_artifact_version
+    from .match_artifact import current_artifact_version, load_match_artifact
+
+    version = current_artifact_version()
+    if version is None or version in (_text_index.artifact_version, _failed_artifact_version):
+        return
+
+    with _text_index_lock:
+        if version == _text_index.artifact_version:
+            return
+        loaded = load_match_artifact(version)
+        if loaded is None:
+            _failed_artifact_version = version
+            return
+        _text_index, skill_arrays = loaded
+
+    # Inverted index chưa build thì nạp luôn từ artifact (không cần query)
+    with _inverted_index.lock:
+        if _inverted_index.watermark is None:
+            _inverted_index.load_arrays(*skill_arrays, _text_index.watermark)
+
+# Lấy index TF-IDF của process, đã đồng bộ với database. Dọn hàng bỏ / fit lại
+# chạy ở thread nền rồi thay index; trong lúc đó vẫn dùng index hiện tại.
+def get_job_text_index(state=None) -> Optional[JobTextIndex]:
+    if not SKLEARN_AVAILABLE:
+        return None
+
+    _refresh_from_artifact()
+    index = _text_index
+    index.sync(state)
+    if index.needs_refit() or index.needs_compaction():
+        _schedule_text_index_maintenance(index)
+    return index
+
+def _schedule_text_index_maintenance(index: JobTextIndex):
+    global _text_index_worker
+    with _text_index_lock:
+        if _text_index_worker is not None and _text_index_worker.is_alive():
+            return
+        _text_index_worker = threading.Thread(
+            target=_maintain_text_index, args=(index,), name='tfidf-maintenance', daemon=True,
+        )
+        _text_index_worker.start()
+
+# Fit lại (IDF lệch quá ngưỡng) hoặc dọn hàng bỏ, rồi thay index của process.
+# Thay đổi của catalog trong lúc đó được index mới đồng bộ lại từ watermark.
+def _maintain_text_index(index: JobTextIndex):
+    global _text_index
+    try:
+        if index.needs_refit():
+            replacement = JobTextIndex()
+            replacement.sync()
+        else:
+            replacement = index.compacted()
+        with _text_index_lock:
+            if _text_index is not index:
+                return
+            _text_index = replacement
+        if index.needs_refit():
+            # Từ vựng / IDF mới: tính lại từ khóa đã lưu của các job
+            from .keywords import refresh_job_keywords
+            refresh_job_keywords(force=True)
+    except Exception as e:
+        print(f"TF-IDF index maintenance error: {e}")
+    finally:
+        close_old_connections()
+
+_bm25_index = JobBM25Index() if np is not None else None
+
+# Lấy index BM25 của process, đã đồng bộ với database (chỉ đọc lại các job mới
+# / đã sửa kể từ lần trước).
+def get_job_bm25_index(state=None) -> Optional[JobBM25Index]:
+    if not SKLEARN_AVAILABLE:
+        return None
+    _bm25_index.sync(state)
+    return _bm25_index
+
+
+_hashing_index = JobHashingIndex() if np is not None else None
+
+# Lấy index hashing của process, đã đồng bộ với database (chỉ vector hóa các job
+# mới / đã sửa kể từ lần trước).
+def get_job_hashing_index(state=None) -> Optional[JobHashingIndex]:
+    if not SKLEARN_AVAILABLE:
+        return None
+    _hashing_index.sync(state)
+    return _hashing_index
+
+
+_inverted_index = JobInvertedIndex()
+
+# Lấy inverted index của process, đã đồng bộ với database.
+def get_job_inverted_index(state=None) -> JobInvertedIndex:
+    if SKLEARN_AVAILABLE:
+        _refresh_from_artifact()
+    _inverted_index.sync(state)
+    return _inverted_index
+
+# Bỏ job khỏi các index của process (job vừa bị xóa).
+def remove_job_from_indexes(job_id: int):
+    with _inverted_index.lock:
+        _inverted_index.remove_job(job_id)
+    for index in (_text_index, _hashing_index, _bm25_index):
+        if index is not None:
+            with index.lock:
+                index.remove_job(job_id)
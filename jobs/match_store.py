@@ -0,0 +1,285 @@
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+from django.db.models import OuterRef, Q, QuerySet, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .keywords import refresh_job_keywords
+from .match_index import get_catalog_state
+from .models import Job, MatchRefreshTask, UserJobMatch, UserSkillProfile
+from .sidecar import remote_match_scores
+from .token_store import refresh_job_tokens, refresh_profile_tokens
+
+
+# Thời gian giữ danh sách id đã xếp hạng trong cache (giây)
+RANKED_IDS_TIMEOUT = 300
+
+# Số thread tính lại bảng điểm ở nền trong mỗi process web. 0: chỉ đưa vào hàng
+# đợi (MatchRefreshTask), xử lý bằng `manage.py process_match_refreshes`
+MATCH_REFRESH_WORKERS = 1
+
+# Số task lấy ra khỏi hàng đợi mỗi lượt
+MATCH_REFRESH_BATCH = 100
+
+
+# ============================================================
+# REFRESH
+# ============================================================
+
+# Tạo các dòng UserJobMatch (điểm > 0) từ kết quả của JobMatcher.
+def _build_rows(profile: UserSkillProfile, batch) -> list:
+    rows = []
+    for row, job_id in enumerate(batch.job_ids):
+        matching_score = int(batch.matching_scores[row])
+        if matching_score <= 0:
+            continue
+        rows.append(UserJobMatch(
+            profile=profile,
+            job_id=job_id,
+            matching_score=matching_score,
+            skill_score=int(batch.skill_scores[row]),
+            text_score=int(batch.text_scores[row]),
+        ))
+    return rows
+
+# Tính lại điểm của một hồ sơ với toàn bộ việc làm đang hoạt động (ở sidecar
+# nếu đang chạy, ngược lại trong process).
+def refresh_profile_matches(profile: UserSkillProfile):
+    from .matching_service import JobMatcher
+
+    batch = remote_match_scores(profile.pk)
+    if batch is None:
+        batch = JobMatcher(profile).score_jobs(Job.objects.filter(is_active=True))
+    rows = _build_rows(profile, batch)
+
+    now = timezone.now()
+    with transaction.atomic():
+        UserJobMatch.objects.filter(profile=profile).delete()
+        UserJobMatch.objects.bulk_create(rows, batch_size=500)
+        UserSkillProfile.objects.filter(pk=profile.pk).update(matches_refreshed_at=now)
+    profile.matches_refreshed_at = now
+
+# Tính lại điểm của các job với những hồ sơ có skill hoặc ngành nghề chung.
+# Job đã ẩn hoặc đã xóa thì chỉ cần xóa các dòng cũ. Mỗi hồ sơ được ghi trong
+# 1 transaction riêng (không giữ khóa ghi trong lúc tính điểm các hồ sơ khác).
+def refresh_job_matches(job_ids: Iterable[int]):
+    from .matching_service import JobMatcher
+
+    job_ids = list(job_ids)
+    active_jobs = Job.objects.filter(id__in=job_ids, is_active=True)
+    active_ids = list(active_jobs.values_list('id', flat=True))
+
+    UserJobMatch.objects.filter(job_id__in=set(job_ids) - set(active_ids)).delete()
+    if not active_ids:
+        return
+
+    skill_ids = Job.required_skills.through.objects.filter(job_id__in=active_ids).values('skill_id')
+    category_ids = active_jobs.exclude(category=None).values('category_id')
+    profiles = UserSkillProfile.objects.filter(
+        Q(skills__in=skill_ids) | Q(categories__in=category_ids)
+    ).exclude(matches_refreshed_at=None).distinct()
+    profile_ids = set()
+
+    for profile in profiles:
+        rows = _build_rows(profile, JobMatcher(profile).score_jobs(active_jobs))
+        profile_ids.add(profile.pk)
+        with transaction.atomic():
+            UserJobMatch.objects.filter(profile=profile, job_id__in=active_ids).delete()
+            UserJobMatch.objects.bulk_create(rows, batch_size=500)
+
+    # Hồ sơ không còn skill / ngành nghề chung với job: bỏ điểm cũ
+    UserJobMatch.objects.filter(job_id__in=active_ids).exclude(profile_id__in=profile_ids).delete()
+
+# Hồ sơ chưa có bảng điểm (tạo trước khi có bảng UserJobMatch, hoặc vừa tạo):
+# đưa vào hàng đợi tính ở nền, trong lúc chờ trang hiển thị như chưa có điểm.
+def ensure_profile_matches(profile: UserSkillProfile):
+    if profile.matches_refreshed_at is None:
+        enqueue_match_refresh(profile_ids=[profile.pk])
+
+
+# ============================================================
+# READ
+# ============================================================
+
+# Top K job đang hoạt động có điểm cao nhất của hồ sơ (sắp xếp bằng SQL + index).
+def get_top_matches(profile: UserSkillProfile, k: int = 6) -> List[UserJobMatch]:
+    return list(
+        UserJobMatch.objects
+        .filter(profile=profile, job__is_active=True)
+        .select_related('job', 'job__company', 'job__province', 'job__district')
+        .order_by('-matching_score', '-job__created_at')[:k]
+    )
+
+# Điểm của hồ sơ với các job (job không có dòng nào -> điểm 0).
+def get_match_scores(profile: UserSkillProfile, job_ids: Iterable[int]) -> Dict[int, Dict]:
+    job_ids = list(job_ids)
+    scores = {
+        job_id: {'matching_score': 0, 'skill_score': 0, 'text_score': 0}
+        for job_id in job_ids
+    }
+    rows = UserJobMatch.objects.filter(profile=profile, job_id__in=job_ids).values_list(
+        'job_id', 'matching_score', 'skill_score', 'text_score'
+    )
+    for job_id, matching_score, skill_score, text_score in rows:
+        scores[job_id] = {
+            'matching_score': matching_score,
+            'skill_score': skill_score,
+            'text_score': text_score,
+        }
+    return scores
+
+# Thông tin matching đầy đủ của 1 job (điểm + các skill trùng khớp).
+def get_job_match(profile: UserSkillProfile, job: Job) -> Dict:
+    match_info = get_match_scores(profile, [job.pk])[job.pk]
+    matched_skills = list(job.required_skills.filter(user_profiles=profile).values('id', 'name'))
+    match_info.update({
+        'matched_skills': matched_skills,
+        'matched_skill_count': len(matched_skills),
+        'total_required_skills': job.required_skills.count(),
+    })
+    return match_info
+
+# Thêm cột match_score (0 nếu không có) để sắp xếp/lọc theo điểm bằng SQL.
+def annotate_match_score(jobs: QuerySet, profile: UserSkillProfile) -> QuerySet:
+    score = UserJobMatch.objects.filter(profile=profile, job=OuterRef('pk')).values('matching_score')[:1]
+    return jobs.annotate(match_score=Coalesce(Subquery(score), Value(0)))
+
+# Danh sách id các job (đã lọc) xếp theo điểm matching giảm dần.
+# Chỉ đọc cột id nên rẻ hơn nhiều so với load cả model, và được cache theo
+# hồ sơ + bộ lọc + trạng thái catalog để các trang sau không phải sắp xếp lại.
+def get_ranked_job_ids(profile: UserSkillProfile, jobs: QuerySet, filter_key: str) -> List[int]:
+    version = f'{profile.matches_refreshed_at}:{get_catalog_state()}'
+    digest = hashlib.md5(f'{version}:{filter_key}'.encode()).hexdigest()
+    key = f'jobs:ranked_ids:{profile.pk}:{digest}'
+
+    ranked_ids = cache.get(key)
+    if ranked_ids is None:
+        ranked_ids = list(
+            annotate_match_score(jobs, profile)
+            .order_by('-match_score', '-created_at')
+            .values_list('id', flat=True)
+        )
+        cache.set(key, ranked_ids, RANKED_IDS_TIMEOUT)
+    return ranked_ids
+
+
+# ============================================================
+# QUEUE
+# ============================================================
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MATCH_REFRESH_WORKERS, thread_name_prefix='match-refresh')
+        return _executor
+
+# Thêm job / hồ sơ vào hàng đợi tính lại (trùng thì bỏ qua) và báo thread nền.
+def enqueue_match_refresh(job_ids: Iterable[int] = (), profile_ids: Iterable[int] = ()):
+    tasks = [MatchRefreshTask(kind='job', object_id=job_id) for job_id in job_ids]
+    tasks += [MatchRefreshTask(kind='profile', object_id=profile_id) for profile_id in profile_ids]
+    if not tasks:
+        return
+    MatchRefreshTask.objects.bulk_create(tasks, ignore_conflicts=True)
+    if MATCH_REFRESH_WORKERS > 0:
+        _get_executor().submit(process_match_refreshes)
+
+# Lấy tối đa `limit` task khỏi hàng đợi. Task được "nhận" bằng cách xóa dòng của
+# nó nên web và manage.py process_match_refreshes chạy cùng lúc cũng không xử
+# lý 1 task 2 lần. Trả về (job ids, profile ids).
+def _claim_tasks(limit: int) -> Tuple[List[int], List[int]]:
+    claimed = {'job': [], 'profile': []}
+    for task_id, kind, object_id in MatchRefreshTask.objects.order_by('id').values_list(
+        'id', 'kind', 'object_id'
+    )[:limit]:
+        if MatchRefreshTask.objects.filter(pk=task_id).delete()[0]:
+            claimed[kind].append(object_id)
+    return claimed['job'], claimed['profile']
+
+# Xử lý hàng đợi cho tới khi hết (hoặc tối đa `limit` task): tách từ lại và
+# tính từ khóa của job đã sửa trước khi tính điểm. Lỗi thì trả task về hàng đợi.
+# Trả về (số job, số hồ sơ) đã tính lại.
+def process_match_refreshes(limit: Optional[int] = None) -> Tuple[int, int]:
+    job_count = profile_count = 0
+    try:
+        while limit is None or job_count + profile_count < limit:
+            batch_size = MATCH_REFRESH_BATCH
+            if limit is not None:
+                batch_size = min(batch_size, limit - job_count - profile_count)
+            job_ids, profile_ids = _claim_tasks(batch_size)
+            if not job_ids and not profile_ids:
+                break
+            try:
+                if job_ids:
+                    refresh_job_tokens(job_ids)
+                    refresh_job_keywords(Job.objects.filter(id__in=job_ids))
+                    refresh_job_matches(job_ids)
+                if profile_ids:
+                    refresh_profile_tokens(profile_ids)
+                for profile in UserSkillProfile.objects.filter(id__in=profile_ids):
+                    refresh_profile_matches(profile)
+            except Exception as e:
+                print(f"Match refresh error: {e}")
+                MatchRefreshTask.objects.bulk_create(
+                    [MatchRefreshTask(kind='job', object_id=job_id) for job_id in job_ids]
+                    + [MatchRefreshTask(kind='profile', object_id=profile_id) for profile_id in profile_ids],
+                    ignore_conflicts=True,
+                )
+                break
+            job_count += len(job_ids)
+            profile_count += len(profile_ids)
+    finally:
+        close_old_connections()
+    return job_count, profile_count
+
+
+# ============================================================
+# SCHEDULING
+# ============================================================
+
+_local = threading.local()
+
+# Các hồ sơ/job cần tính lại, đưa vào hàng đợi 1 lần khi transaction hiện tại
+# commit. Một form lưu hồ sơ (save + categories.set + skills.set) chỉ thêm 1 task.
+class _PendingRefresh:
+    def __init__(self):
+        self.profile_ids = set()
+        self.job_ids = set()
+
+    def __call__(self):
+        if getattr(_local, 'pending', None) is self:
+            _local.pending = None
+        enqueue_match_refresh(self.job_ids, self.profile_ids)
+
+def _get_pending() -> _PendingRefresh:
+    pending = getattr(_local, 'pending', None)
+    connection = transaction.get_connection()
+    # Callback cũ bị bỏ khi transaction rollback - tạo mới
+    if pending is not None and connection.in_atomic_block and any(
+        hook[1] is pending for hook in connection.run_on_commit
+    ):
+        return pending
+
+    pending = _local.pending = _PendingRefresh()
+    return pending
+
+def _schedule(kind: str, pk: int):
+    pending = _get_pending()
+    is_new = not pending.profile_ids and not pending.job_ids
+    getattr(pending, kind).add(pk)
+    if is_new:
+        transaction.on_commit(pending, robust=True)
+
+def schedule_profile_refresh(profile_id: int):
+    _schedule('profile_ids', profile_id)
+
+def schedule_job_refresh(job_id: int):
+    _schedule('job_ids', job_id)
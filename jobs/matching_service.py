@@ -1,15 +1,34 @@
-from typing import Dict, List, Set, Optional
+from typing import Callable, Dict, List, Set, Optional, Tuple
 from django.db.models import QuerySet
 
 try:
-    from sklearn.feature_extraction.text import TfidfVectorizer
-    from sklearn.metrics.pairwise import cosine_similarity
-    SKLEARN_AVAILABLE = True
+    import numpy as np
 except ImportError:
-    SKLEARN_AVAILABLE = False
-    print("Error: Chưa cài đặt sklearn")
+    np = None
 
-from .models import Job, Skill, UserSkillProfile
+from .models import Job, UserSkillProfile
+from .match_index import (
+    SKLEARN_AVAILABLE, JobInvertedIndex, JobTextIndex, SkillIncidence,
+    get_catalog_state, get_job_bm25_index, get_job_hashing_index, get_job_inverted_index,
+    get_job_text_index, load_skill_pairs,
+)
+from .keywords import matched_keywords
+from .lsa import get_lsa_index
+from .nlp_processor import import_optional
+from .token_store import get_profile_tokens, load_job_tokens
+from .match_store import ensure_profile_matches, get_job_match
+
+
+# Cách tính điểm văn bản (40% điểm matching):
+# - 'tfidf': cosine TF-IDF với index của toàn bộ việc làm (0-1)
+# - 'bm25': BM25 với df / độ dài văn bản của toàn bộ việc làm, chia cho điểm
+#   BM25 cao nhất của hồ sơ trong catalog (job khớp nhất = 100)
+# - 'lsa': cosine giữa vector LSA (manage.py train_lsa) của hồ sơ và job; dùng
+#   'tfidf' nếu chưa train mô hình
+# - 'hashing': cosine TF-IDF trong không gian hashing cố định, không cần từ
+#   vựng; job mới được vector hóa riêng, không build lại index
+TEXT_SCORERS = ('tfidf', 'bm25', 'lsa', 'hashing')
+TEXT_SCORER = 'tfidf'
 
 
 # ============================================================
@@ -45,7 +64,7 @@ def calculate_text_similarity(text1: str, text2: str) -> float:
     
     try:
         # TF-IDF Vectorization
-        vectorizer = TfidfVectorizer(
+        vectorizer = import_optional('sklearn.feature_extraction.text').TfidfVectorizer(
             ngram_range=(1, 2),
             min_df=1,
             max_features=5000
@@ -53,8 +72,8 @@ def calculate_text_similarity(text1: str, text2: str) -> float:
         
         tfidf_matrix = vectorizer.fit_transform([text1.lower(), text2.lower()])
         
-        # Cosine Similarity
-        similarity = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:2])[0][0]
+        # Cosine Similarity (các hàng đã chuẩn hóa L2 nên chỉ là tích vô hướng)
+        similarity = (tfidf_matrix[0] @ tfidf_matrix[1].T).toarray()[0][0]
         
         return float(similarity)
         
@@ -68,11 +87,24 @@ def calculate_text_similarity(text1: str, text2: str) -> float:
 # ============================================================
 
 # Service để tính điểm matching giữa User Skill Profile và Job.
+# Điểm văn bản dùng index fit trên toàn bộ việc làm (match_index), nên không
+# phải fit lại vectorizer cho từng cặp (user, job). text_scorer: xem
+# TEXT_SCORER; có thể chọn lại cho từng lần gọi score_jobs().
 class JobMatcher:
-    def __init__(self, user_profile: Optional[UserSkillProfile] = None):
+    def __init__(self, user_profile: Optional[UserSkillProfile] = None, text_scorer: Optional[str] = None):
         self.user_profile = user_profile
+        self.text_scorer = text_scorer or TEXT_SCORER
         self._user_skill_ids = set()
+        self._user_skill_names = {}
+        self._user_category_ids = set()
         self._user_text = ""
+        self._catalog_state = None
+        self._text_index = None
+        self._text_similarities = None
+        self._bm25_scores = None
+        self._lsa_vector = None
+        self._lsa_scores = None
+        self._hashing_scores = None
         
         if user_profile:
             self._load_profile_data()
@@ -82,59 +114,299 @@ class JobMatcher:
         if not self.user_profile:
             return
         
-        self._user_skill_ids = set(self.user_profile.skills.values_list('id', flat=True))
+        self._user_skill_names = dict(self.user_profile.skills.values_list('id', 'name'))
+        self._user_skill_ids = set(self._user_skill_names)
+        self._user_category_ids = set(self.user_profile.categories.values_list('id', flat=True))
+        
+        # Văn bản đã tách từ, lưu sẵn trong hồ sơ (tách lại ở hàng đợi tính lại
+        # điểm khi bio / skills / ngành nghề đổi, không tách trong request)
+        self._user_text = get_profile_tokens(self.user_profile)
+    
+    # Trạng thái catalog chỉ đọc 1 lần cho mỗi matcher, dùng chung cho các index.
+    def _get_catalog_state(self):
+        if self._catalog_state is None:
+            self._catalog_state = get_catalog_state()
+        return self._catalog_state
+    
+    def _get_text_index(self) -> Optional[JobTextIndex]:
+        if self._text_index is None:
+            self._text_index = get_job_text_index(self._get_catalog_state())
+        return self._text_index
+    
+    def _get_inverted_index(self) -> JobInvertedIndex:
+        return get_job_inverted_index(self._get_catalog_state())
+    
+    # Độ tương đồng giữa user và các hàng của index. Khi cần phần lớn catalog thì
+    # tính 1 lần cho mọi job và dùng lại trong matcher; khi chỉ cần vài job thì
+    # chỉ nhân với các hàng đó.
+    def _get_text_similarities(self, index: JobTextIndex, rows):
+        if self._text_similarities is None and len(rows) * 2 < len(index):
+            return index.similarities(self._user_text, rows)
+        if self._text_similarities is None:
+            self._text_similarities = index.similarities(self._user_text)
+        return self._text_similarities[rows]
+    
+    # Điểm văn bản (0-100) cho các job, theo thứ tự job_ids.
+    def _calculate_text_scores(self, job_ids: List[int], text_scorer: str):
+        scores = np.zeros(len(job_ids), dtype=np.int64)
+        if not self._user_text or not job_ids:
+            return scores
+        
+        if text_scorer == 'bm25':
+            return self._calculate_bm25_scores(job_ids, scores)
+        if text_scorer == 'hashing':
+            return self._calculate_hashing_scores(job_ids, scores)
+        if text_scorer == 'lsa':
+            lsa_scores = self._calculate_lsa_scores(job_ids, scores)
+            if lsa_scores is not None:
+                return lsa_scores
+        elif text_scorer != 'tfidf':
+            raise ValueError(f"Unknown text scorer: {text_scorer}")
+        
+        index = self._get_text_index()
+        if index is not None and index.vectorizer is not None:
+            rows = np.array([index.row_by_id.get(job_id, -1) for job_id in job_ids], dtype=np.int64)
+            in_index = rows >= 0
+            similarities = self._get_text_similarities(index, rows[in_index])
+            scores[in_index] = (similarities * 100).astype(np.int64)
+            missing = [job_id for job_id, found in zip(job_ids, in_index) if not found]
+        else:
+            missing = list(job_ids)
+        
+        if missing:
+            # Job không có trong index (ví dụ: đã ẩn) - tính riêng theo văn bản
+            position = {job_id: i for i, job_id in enumerate(job_ids)}
+            missing_ids, texts = load_job_tokens(Job.objects.filter(id__in=missing))
+            for job_id, job_text in zip(missing_ids, texts):
+                if index is not None and index.vectorizer is not None:
+                    similarity = index.text_similarity(self._user_text, job_text)
+                else:
+                    similarity = calculate_text_similarity(self._user_text, job_text)
+                scores[position[job_id]] = int(similarity * 100)
         
-        parts = []
-        if self.user_profile.bio:
-            parts.append(self.user_profile.bio)
-        parts.append(self.user_profile.get_skills_text())
-        parts.append(self.user_profile.get_categories_text())
+        return scores
+    
+    # Điểm (chưa đổi thang) của các job theo thứ tự job_ids, lấy từ điểm của
+    # toàn bộ catalog (catalog_scores theo row_by_id). Job không có trong index
+    # (ví dụ: đã ẩn) được tính riêng bằng score_documents(văn bản các job đó).
+    def _lookup_scores(self, job_ids: List[int], catalog_scores, row_by_id: Dict[int, int],
+                       score_documents: Callable[[List[str]], 'np.ndarray']):
+        rows = np.array([row_by_id.get(job_id, -1) for job_id in job_ids], dtype=np.int64)
+        in_index = rows >= 0
+        raw = np.zeros(len(job_ids), dtype=np.float32)
+        raw[in_index] = catalog_scores[rows[in_index]]
+        
+        missing = [job_id for job_id, found in zip(job_ids, in_index) if not found]
+        if missing:
+            position = {job_id: i for i, job_id in enumerate(job_ids)}
+            missing_ids, texts = load_job_tokens(Job.objects.filter(id__in=missing))
+            for job_id, value in zip(missing_ids, score_documents(texts)):
+                raw[position[job_id]] = value
+        return raw
+    
+    # Điểm BM25 của user với toàn bộ catalog được tính 1 lần (1 phép nhân ma trận
+    # sparse - vector) và dùng lại trong matcher; điểm cao nhất là mốc 100.
+    def _calculate_bm25_scores(self, job_ids: List[int], scores):
+        index = get_job_bm25_index(self._get_catalog_state())
+        if index is None:
+            return scores
         
-        self._user_text = ' '.join(parts)
+        if self._bm25_scores is None:
+            self._bm25_scores = index.scores(self._user_text)
+        catalog_scores, row_by_id = self._bm25_scores
+        best = float(catalog_scores.max()) if len(catalog_scores) else 0.0
+        if best <= 0:
+            return scores
+        
+        raw = self._lookup_scores(
+            job_ids, catalog_scores, row_by_id,
+            lambda texts: index.score_documents(self._user_text, texts),
+        )
+        scores[:] = np.minimum(raw / best * 100, 100).astype(np.int64)
+        return scores
     
-    def calculate_job_match(self, job: Job) -> Dict:
+    # Cosine LSA của user với toàn bộ catalog (1 phép nhân ma trận - vector,
+    # tính 1 lần cho matcher). None nếu chưa train mô hình LSA.
+    def _calculate_lsa_scores(self, job_ids: List[int], scores):
+        index = get_lsa_index(self._get_catalog_state())
+        if index is None:
+            return None
+        
+        if self._lsa_scores is None:
+            self._lsa_vector = index.profile_vector(self.user_profile, self._user_text)
+            self._lsa_scores = index.similarities(self._lsa_vector)
+        similarities, row_by_id = self._lsa_scores
+        
+        raw = self._lookup_scores(
+            job_ids, similarities, row_by_id,
+            lambda texts: index.model.project(texts) @ self._lsa_vector,
+        )
+        scores[:] = (np.clip(raw, 0, 1) * 100).astype(np.int64)
+        return scores
+    
+    # Cosine TF-IDF trong không gian hashing với toàn bộ catalog (tính 1 lần cho
+    # matcher).
+    def _calculate_hashing_scores(self, job_ids: List[int], scores):
+        index = get_job_hashing_index(self._get_catalog_state())
+        if index is None:
+            return scores
+        
+        if self._hashing_scores is None:
+            self._hashing_scores = index.similarities(self._user_text)
+        similarities, row_by_id = self._hashing_scores
+        
+        raw = self._lookup_scores(
+            job_ids, similarities, row_by_id,
+            lambda texts: index.score_documents(self._user_text, texts),
+        )
+        scores[:] = (np.clip(raw, 0, 1) * 100).astype(np.int64)
+        return scores
+    
+    def calculate_job_match(self, job: Job, text_scorer: Optional[str] = None) -> Dict:
         """
         Tính điểm matching cho một job.
         """
-        job_skill_ids = set(job.required_skills.values_list('id', flat=True))
+        return self.score_jobs(Job.objects.filter(pk=job.pk), prune=False, text_scorer=text_scorer).result(job.pk)
+    
+    # Tính điểm matching cho nhiều jobs.
+    def calculate_jobs_match(self, jobs: QuerySet, prune: bool = True,
+                             text_scorer: Optional[str] = None) -> Dict[int, Dict]:
+        return self.score_jobs(jobs, prune, text_scorer).results()
+    
+    # Lấy K job có điểm cao nhất (điểm >= min_score), sắp xếp giảm dần.
+    # Chỉ K job thắng được load từ database.
+    def top_matches(self, k: int = 6, min_score: int = 1, jobs: Optional[QuerySet] = None,
+                    text_scorer: Optional[str] = None) -> List[Tuple[Job, Dict]]:
+        if jobs is None:
+            jobs = Job.objects.filter(is_active=True)
         
-        job_text_parts = [job.title, job.description or '']
-        if job.requirements:
-            job_text_parts.append(job.requirements)
-        if job.responsibilities:
-            job_text_parts.append(job.responsibilities)
-
-        job_skills_text = ' '.join([s.name for s in job.required_skills.all()])
-        job_text_parts.append(job_skills_text)
-        job_text = ' '.join(job_text_parts)
+        batch = self.score_jobs(jobs, text_scorer=text_scorer)
+        ranked_ids = batch.ranked_ids(k, min_score)
+        job_map = jobs.in_bulk(ranked_ids)
+        return [(job_map[job_id], batch.result(job_id)) for job_id in ranked_ids if job_id in job_map]
+    
+    # Tính điểm cho các job trong queryset, trả về dạng mảng (MatchBatch).
+    # Quan hệ job -> skill được lấy từ inverted index (hoặc 1 query cho các job
+    # không có trong index) thành ma trận job x skill, nên số query không phụ
+    # thuộc vào số job. Với prune=True, các job đang hoạt động không có skill
+    # hay ngành nghề chung với ứng viên được trả về điểm 0 mà không cần tính.
+    def score_jobs(self, jobs: QuerySet, prune: bool = True,
+                   text_scorer: Optional[str] = None) -> 'MatchBatch':
+        job_ids = list(jobs.values_list('id', flat=True))
+        index = self._get_inverted_index()
+        
+        pruned = {}
+        if prune:
+            candidates = index.candidates(self._user_skill_ids, self._user_category_ids)
+            scored_ids = []
+            for job_id in job_ids:
+                if job_id in index and job_id not in candidates:
+                    pruned[job_id] = len(index.job_skills[job_id])
+                else:
+                    scored_ids.append(job_id)
+            job_ids = scored_ids
         
-        skill_score = calculate_skill_match_score(self._user_skill_ids, job_skill_ids)
+        pairs = index.skill_pairs(job_id for job_id in job_ids if job_id in index)
+        unindexed_ids = [job_id for job_id in job_ids if job_id not in index]
+        if unindexed_ids:
+            pairs += load_skill_pairs(Job.objects.filter(id__in=unindexed_ids))
         
-        text_score = 0
-        if self._user_text:
-            similarity = calculate_text_similarity(self._user_text, job_text)
-            text_score = int(similarity * 100)
+        incidence = SkillIncidence.from_pairs(job_ids, pairs)
+        matched = incidence.matched(self._user_skill_ids)
         
-        combined_score = int(skill_score * 0.6 + text_score * 0.4)
+        totals = incidence.totals()
+        matched_counts = np.diff(matched.indptr)
+        skill_scores = np.zeros(len(job_ids), dtype=np.int64)
+        has_skills = totals > 0
+        skill_scores[has_skills] = (matched_counts[has_skills] / totals[has_skills] * 100).astype(np.int64)
         
-        matched_skill_ids = get_matched_skills(self._user_skill_ids, job_skill_ids)
-        matched_skills = list(Skill.objects.filter(id__in=matched_skill_ids).values('id', 'name'))
+        text_scores = self._calculate_text_scores(job_ids, text_scorer or self.text_scorer)
+        combined_scores = (skill_scores * 0.6 + text_scores * 0.4).astype(np.int64)
+        
+        return MatchBatch(
+            job_ids, combined_scores, skill_scores, text_scores,
+            incidence, matched, self._user_skill_names, pruned,
+        )
+
+
+# Điểm matching của một tập job ở dạng mảng (theo thứ tự job_ids).
+# Dict kết quả chỉ được tạo khi cần, nên lấy top-K không phải tạo N dict.
+class MatchBatch:
+    def __init__(self, job_ids: List[int], matching_scores, skill_scores, text_scores,
+                 incidence: SkillIncidence, matched, skill_names: Dict[int, str],
+                 pruned: Dict[int, int]):
+        self.job_ids = job_ids
+        self.row_by_id = {job_id: row for row, job_id in enumerate(job_ids)}
+        self.matching_scores = matching_scores
+        self.skill_scores = skill_scores
+        self.text_scores = text_scores
+        self.incidence = incidence
+        self.matched = matched
+        self.totals = incidence.totals()
+        self.skill_names = skill_names
+        # job_id -> số skill yêu cầu của các job bị loại trước (điểm 0)
+        self.pruned = pruned
+    
+    def result(self, job_id: int) -> Dict:
+        if job_id in self.pruned:
+            return empty_match(self.pruned[job_id])
+        
+        row = self.row_by_id[job_id]
+        matched_skills = [
+            {'id': skill_id, 'name': self.skill_names[skill_id]}
+            for skill_id in self.incidence.row_skill_ids(self.matched, row)
+        ]
+        matched_skills.sort(key=lambda skill: skill['name'])
         
         return {
-            'matching_score': combined_score,
-            'skill_score': skill_score,
-            'text_score': text_score,
+            'matching_score': int(self.matching_scores[row]),
+            'skill_score': int(self.skill_scores[row]),
+            'text_score': int(self.text_scores[row]),
             'matched_skills': matched_skills,
-            'matched_skill_count': len(matched_skill_ids),
-            'total_required_skills': len(job_skill_ids),
+            'matched_skill_count': len(matched_skills),
+            'total_required_skills': int(self.totals[row]),
         }
     
-    # Tính điểm matching cho nhiều jobs.
-    def calculate_jobs_match(self, jobs: QuerySet) -> Dict[int, Dict]:
-        results = {}
-        for job in jobs:
-            results[job.id] = self.calculate_job_match(job)
+    def results(self) -> Dict[int, Dict]:
+        results = {job_id: empty_match(total) for job_id, total in self.pruned.items()}
+        for job_id in self.job_ids:
+            results[job_id] = self.result(job_id)
         return results
+    
+    # Id các job sắp xếp theo điểm giảm dần; điểm bằng nhau thì job mới hơn
+    # (id lớn hơn) đứng trước. Với k, chỉ chọn K phần tử lớn nhất bằng
+    # argpartition (O(N)) rồi sắp xếp K phần tử đó.
+    def ranked_ids(self, k: Optional[int] = None, min_score: int = 0) -> List[int]:
+        job_ids = np.asarray(self.job_ids, dtype=np.int64)
+        scores = np.asarray(self.matching_scores, dtype=np.int64)
+        if min_score <= 0 and self.pruned:
+            job_ids = np.concatenate([job_ids, np.fromiter(self.pruned, dtype=np.int64)])
+            scores = np.concatenate([scores, np.zeros(len(self.pruned), dtype=np.int64)])
+        
+        keep = scores >= min_score
+        job_ids, scores = job_ids[keep], scores[keep]
+        if not len(job_ids):
+            return []
+        
+        keys = scores * (int(job_ids.max()) + 1) + job_ids
+        if k is not None and k < len(keys):
+            top = np.argpartition(-keys, k - 1)[:k]
+        else:
+            top = np.arange(len(keys))
+        order = top[np.argsort(-keys[top])]
+        return job_ids[order].tolist()
+
+
+# Kết quả matching của job không được tính điểm.
+def empty_match(total_required_skills: int = 0) -> Dict:
+    return {
+        'matching_score': 0,
+        'skill_score': 0,
+        'text_score': 0,
+        'matched_skills': [],
+        'matched_skill_count': 0,
+        'total_required_skills': total_required_skills,
+    }
 
 
 # ============================================================
@@ -161,9 +433,15 @@ def get_job_matching_info(job: Job, user) -> Dict:
             'matched_skills': [],
         }
     
-    matcher = JobMatcher(profile)
-    match_info = matcher.calculate_job_match(job)
+    if job.is_active:
+        # Đọc điểm đã tính sẵn trong bảng UserJobMatch
+        ensure_profile_matches(profile)
+        match_info = get_job_match(profile, job)
+    else:
+        match_info = JobMatcher(profile).calculate_job_match(job)
     match_info['has_profile'] = True
+    # Từ khóa của job có trong hồ sơ (giải thích điểm nội dung)
+    match_info['matched_keywords'] = matched_keywords(job.keywords, get_profile_tokens(profile))
     
     return match_info
 
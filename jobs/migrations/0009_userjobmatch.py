@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0008_company_company_size'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userskillprofile',
+            name='matches_refreshed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='UserJobMatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('matching_score', models.PositiveSmallIntegerField(default=0)),
+                ('skill_score', models.PositiveSmallIntegerField(default=0)),
+                ('text_score', models.PositiveSmallIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='user_matches', to='jobs.job')),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='job_matches', to='jobs.userskillprofile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['profile', '-matching_score'], name='jobs_match_profile_score_idx')],
+                'unique_together': {('profile', 'job')},
+            },
+        ),
+    ]
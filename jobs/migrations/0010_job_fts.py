@@ -0,0 +1,45 @@
+from django.db import OperationalError, migrations
+
+
+# Bảng FTS5 cho tìm kiếm việc làm (chỉ tạo trên SQLite có hỗ trợ FTS5)
+def create_job_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        try:
+            cursor.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS jobs_job_fts USING fts5("
+                "title, description, requirements, responsibilities, skills, "
+                "tokenize = 'unicode61 remove_diacritics 2')"
+            )
+        except OperationalError:
+            # SQLite không có FTS5: bỏ qua, tìm kiếm dùng các cột đã bỏ dấu
+            return
+
+        cursor.execute(
+            "INSERT INTO jobs_job_fts (rowid, title, description, requirements, responsibilities, skills) "
+            "SELECT j.id, j.title, j.description, COALESCE(j.requirements, ''), "
+            "COALESCE(j.responsibilities, ''), "
+            "COALESCE((SELECT group_concat(name, ' ') FROM ("
+            "  SELECT s.name FROM jobs_job_required_skills js "
+            "  JOIN jobs_skill s ON s.id = js.skill_id "
+            "  WHERE js.job_id = j.id ORDER BY s.name)), '') "
+            "FROM jobs_job j"
+        )
+
+
+def drop_job_fts(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS jobs_job_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0009_userjobmatch'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_job_fts, drop_job_fts),
+    ]
@@ -0,0 +1,96 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:07
+
+from django.db import migrations, models
+
+from jobs.text_utils import fold_text
+
+
+# Tính các cột không dấu cho dữ liệu có sẵn
+def fill_folded_columns(apps, schema_editor):
+    for model_name in ('Province', 'District', 'Ward', 'Skill'):
+        model = apps.get_model('jobs', model_name)
+        objects = list(model.objects.only('pk', 'name'))
+        for obj in objects:
+            obj.name_folded = fold_text(obj.name)
+        model.objects.bulk_update(objects, ['name_folded'], batch_size=500)
+
+    Job = apps.get_model('jobs', 'Job')
+    jobs = list(Job.objects.only('pk', 'title', 'description'))
+    for job in jobs:
+        job.title_folded = fold_text(job.title)
+        job.description_folded = fold_text(job.description)
+    Job.objects.bulk_update(jobs, ['title_folded', 'description_folded'], batch_size=500)
+
+
+# Nội dung bảng FTS chuyển sang dạng không dấu (để "da nang" khớp "Đà Nẵng")
+def fold_job_fts(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite' or 'jobs_job_fts' not in connection.introspection.table_names():
+        return
+
+    Job = apps.get_model('jobs', 'Job')
+    skill_names = {}
+    skill_rows = (
+        Job.required_skills.through.objects
+        .order_by('skill__name')
+        .values_list('job_id', 'skill__name')
+    )
+    for job_id, skill_name in skill_rows:
+        skill_names.setdefault(job_id, []).append(skill_name)
+
+    rows = [
+        (job_id, fold_text(title), fold_text(description), fold_text(requirements),
+         fold_text(responsibilities), fold_text(' '.join(skill_names.get(job_id, []))))
+        for job_id, title, description, requirements, responsibilities in Job.objects.values_list(
+            'id', 'title', 'description', 'requirements', 'responsibilities'
+        )
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute("DELETE FROM jobs_job_fts")
+        cursor.executemany(
+            "INSERT INTO jobs_job_fts (rowid, title, description, requirements, responsibilities, skills) "
+            "VALUES (%s, %s, %s, %s, %s, %s)",
+            rows,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0010_job_fts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='district',
+            name='name_folded',
+            field=models.CharField(blank=True, db_index=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='description_folded',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='title_folded',
+            field=models.CharField(blank=True, db_index=True, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='province',
+            name='name_folded',
+            field=models.CharField(blank=True, db_index=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='skill',
+            name='name_folded',
+            field=models.CharField(blank=True, db_index=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='ward',
+            name='name_folded',
+            field=models.CharField(blank=True, db_index=True, max_length=100),
+        ),
+        migrations.RunPython(fill_folded_columns, migrations.RunPython.noop),
+        migrations.RunPython(fold_job_fts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0011_job_folded_columns'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='language',
+            field=models.CharField(blank=True, max_length=2),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='tokens',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='tokens_hash',
+            field=models.CharField(blank=True, max_length=40),
+        ),
+        migrations.AddField(
+            model_name='userskillprofile',
+            name='language',
+            field=models.CharField(blank=True, max_length=2),
+        ),
+        migrations.AddField(
+            model_name='userskillprofile',
+            name='tokens',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='userskillprofile',
+            name='tokens_hash',
+            field=models.CharField(blank=True, max_length=40),
+        ),
+    ]
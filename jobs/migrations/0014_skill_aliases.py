@@ -0,0 +1,71 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from jobs.text_utils import fold_text
+
+
+# Tên gọi khác phổ biến của các kỹ năng có sẵn (chỉ thêm khi skill tồn tại)
+DEFAULT_ALIASES = {
+    'JavaScript': ['JS'],
+    'NodeJS': ['Node.js'],
+    'ReactJS': ['React', 'React.js'],
+    'HTML/CSS': ['HTML', 'CSS', 'HTML5', 'CSS3'],
+    'Chăm sóc khách hàng': ['CSKH', 'Customer Service'],
+    'C&B': ['Compensation & Benefits'],
+    'Phần mềm MISA': ['MISA'],
+    'Phần mềm FAST': ['FAST Accounting'],
+    'Facebook Ads': ['Quảng cáo Facebook'],
+    'Google Ads': ['Quảng cáo Google', 'Google Adwords'],
+    'Content Writing': ['Viết content', 'Content Marketing'],
+    'UI Design': ['Thiết kế UI'],
+    'UX Design': ['Thiết kế UX'],
+    'Photoshop': ['Adobe Photoshop'],
+    'Illustrator': ['Adobe Illustrator'],
+    'Leadership': ['Lãnh đạo', 'Kỹ năng lãnh đạo'],
+    'Tuyển dụng': ['Recruitment'],
+}
+
+
+def add_default_aliases(apps, schema_editor):
+    Skill = apps.get_model('jobs', 'Skill')
+    SkillAlias = apps.get_model('jobs', 'SkillAlias')
+    skills = dict(Skill.objects.filter(name__in=DEFAULT_ALIASES).values_list('name', 'id'))
+    existing = set(SkillAlias.objects.values_list('alias', flat=True))
+    SkillAlias.objects.bulk_create([
+        SkillAlias(skill_id=skills[name], alias=alias, alias_folded=fold_text(alias))
+        for name, aliases in DEFAULT_ALIASES.items() if name in skills
+        for alias in aliases if alias not in existing
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0013_job_keywords'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='skill',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.CreateModel(
+            name='SkillAlias',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('alias', models.CharField(max_length=100, unique=True)),
+                ('alias_folded', models.CharField(blank=True, db_index=True, max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('skill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='aliases', to='jobs.skill')),
+            ],
+            options={
+                'verbose_name_plural': 'Skill Aliases',
+                'ordering': ['alias'],
+            },
+        ),
+        migrations.RunPython(add_default_aliases, migrations.RunPython.noop),
+    ]
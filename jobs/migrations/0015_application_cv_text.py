@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:28
+
+from django.db import migrations, models
+
+
+# Các CV đã upload trước đây chờ được trích xuất (manage.py process_cvs)
+def mark_uploaded_cvs_pending(apps, schema_editor):
+    Application = apps.get_model('jobs', 'Application')
+    Application.objects.exclude(cv_file='').exclude(cv_file__isnull=True).update(cv_status='pending')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0014_skill_aliases'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='application',
+            name='cv_error',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='application',
+            name='cv_language',
+            field=models.CharField(blank=True, default='', max_length=2),
+        ),
+        migrations.AddField(
+            model_name='application',
+            name='cv_status',
+            field=models.CharField(blank=True, choices=[('', 'Không có CV'), ('pending', 'Đang chờ xử lý'), ('processing', 'Đang xử lý'), ('completed', 'Hoàn thành'), ('no_text', 'Không trích xuất được text'), ('unsupported', 'Định dạng chưa hỗ trợ'), ('timeout', 'Quá thời gian xử lý'), ('failed', 'Thất bại')], db_index=True, default='', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='application',
+            name='cv_text',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='application',
+            name='cv_text_folded',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='application',
+            name='cv_tokens',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.RunPython(mark_uploaded_cvs_pending, migrations.RunPython.noop),
+    ]
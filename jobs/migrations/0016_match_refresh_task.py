@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:55
+
+from django.db import migrations, models
+
+
+# Đưa các hồ sơ chưa có bảng điểm vào hàng đợi (trang chủ / danh sách việc làm
+# không còn tự tính điểm trong request)
+def queue_missing_profiles(apps, schema_editor):
+    UserSkillProfile = apps.get_model('jobs', 'UserSkillProfile')
+    MatchRefreshTask = apps.get_model('jobs', 'MatchRefreshTask')
+    profile_ids = UserSkillProfile.objects.filter(matches_refreshed_at=None).values_list('id', flat=True)
+    MatchRefreshTask.objects.bulk_create(
+        [MatchRefreshTask(kind='profile', object_id=profile_id) for profile_id in profile_ids],
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0015_application_cv_text'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MatchRefreshTask',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('job', 'Việc làm'), ('profile', 'Hồ sơ kỹ năng')], max_length=10)),
+                ('object_id', models.BigIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'unique_together': {('kind', 'object_id')},
+            },
+        ),
+        migrations.RunPython(queue_missing_profiles, migrations.RunPython.noop),
+    ]
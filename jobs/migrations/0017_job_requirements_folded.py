@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:10
+
+from django.db import migrations, models
+
+from jobs.text_utils import fold_text
+
+
+# Tính cột yêu cầu không dấu cho các job có sẵn
+def fill_requirements_folded(apps, schema_editor):
+    Job = apps.get_model('jobs', 'Job')
+    jobs = list(Job.objects.only('pk', 'requirements'))
+    for job in jobs:
+        job.requirements_folded = fold_text(job.requirements)
+    Job.objects.bulk_update(jobs, ['requirements_folded'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0016_match_refresh_task'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='requirements_folded',
+            field=models.TextField(blank=True),
+        ),
+        migrations.RunPython(fill_requirements_folded, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:25
+
+from django.db import migrations, models
+
+from jobs.skill_tagger import SkillTagger
+
+
+# Gán skill cho CV ứng tuyển đã trích xuất trước đây (trang chi tiết đơn chỉ đọc cv_skill_ids)
+def tag_extracted_cvs(apps, schema_editor):
+    Skill = apps.get_model('jobs', 'Skill')
+    SkillAlias = apps.get_model('jobs', 'SkillAlias')
+    Application = apps.get_model('jobs', 'Application')
+
+    patterns = list(Skill.objects.values_list('name_folded', 'id'))
+    patterns.extend(SkillAlias.objects.values_list('alias_folded', 'skill_id'))
+    tagger = SkillTagger(patterns)
+
+    applications = list(Application.objects.filter(cv_status='completed').only('pk', 'cv_text'))
+    for application in applications:
+        application.cv_skill_ids = tagger.tag(application.cv_text)
+    Application.objects.bulk_update(applications, ['cv_skill_ids'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0017_job_requirements_folded'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='application',
+            name='cv_skill_ids',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='userskillprofile',
+            name='cv_error',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='userskillprofile',
+            name='cv_file',
+            field=models.FileField(blank=True, null=True, upload_to='user_cvs/'),
+        ),
+        migrations.AddField(
+            model_name='userskillprofile',
+            name='cv_language',
+            field=models.CharField(blank=True, default='', max_length=2),
+        ),
+        migrations.AddField(
+            model_name='userskillprofile',
+            name='cv_skill_ids',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='userskillprofile',
+            name='cv_status',
+            field=models.CharField(blank=True, choices=[('', 'Không có CV'), ('pending', 'Đang chờ xử lý'), ('processing', 'Đang xử lý'), ('completed', 'Hoàn thành'), ('no_text', 'Không trích xuất được text'), ('unsupported', 'Định dạng chưa hỗ trợ'), ('timeout', 'Quá thời gian xử lý'), ('failed', 'Thất bại')], db_index=True, default='', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='userskillprofile',
+            name='cv_text',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='userskillprofile',
+            name='cv_tokens',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.RunPython(tag_extracted_cvs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:05
+
+import importlib
+
+from django.db import migrations
+
+
+# Alias "Excel" của skill "Excel kế toán" làm mọi CV / tin có nhắc tới Excel bị
+# gán skill kế toán. Xóa alias này khỏi các database đã chạy 0014, rồi gán lại
+# skill cho các CV đã trích xuất (0018 đã gán khi alias còn tồn tại).
+def remove_excel_alias(apps, schema_editor):
+    SkillAlias = apps.get_model('jobs', 'SkillAlias')
+    deleted, _ = SkillAlias.objects.filter(alias='Excel', skill__name='Excel kế toán').delete()
+    if deleted:
+        tag_extracted_cvs = importlib.import_module('jobs.migrations.0018_cv_skill_ids_profile_cv').tag_extracted_cvs
+        tag_extracted_cvs(apps, schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0018_cv_skill_ids_profile_cv'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_excel_alias, migrations.RunPython.noop),
+    ]
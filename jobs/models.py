@@ -1,10 +1,23 @@
 from django.db import models
 from django.conf import settings
 
+from .text_utils import fold_text
+
+
+# Cập nhật các cột không dấu (target) từ cột gốc (source) trước khi lưu.
+# Nếu save(update_fields=...) có cột gốc thì thêm cả cột không dấu tương ứng.
+def set_folded_fields(instance, fields, kwargs):
+    update_fields = kwargs.get('update_fields')
+    for source, target in fields:
+        setattr(instance, target, fold_text(getattr(instance, source)))
+        if update_fields is not None and source in update_fields:
+            kwargs['update_fields'] = set(kwargs['update_fields']) | {target}
+
 # Model lưu Tỉnh/Thành phố
 class Province(models.Model):
     code = models.CharField(max_length=10, unique=True, primary_key=True)
     name = models.CharField(max_length=100)
+    name_folded = models.CharField(max_length=100, blank=True, db_index=True)  # tên không dấu để tìm kiếm
     slug = models.CharField(max_length=100, blank=True, null=True)
     type = models.CharField(max_length=50)  # tinh, thanh-pho
     name_with_type = models.CharField(max_length=150)
@@ -15,6 +28,10 @@ class Province(models.Model):
         verbose_name = 'Tỉnh/Thành phố'
         verbose_name_plural = 'Tỉnh/Thành phố'
     
+    def save(self, *args, **kwargs):
+        set_folded_fields(self, [('name', 'name_folded')], kwargs)
+        super().save(*args, **kwargs)
+    
     def __str__(self):
         return self.name_with_type
 
@@ -22,6 +39,7 @@ class Province(models.Model):
 class District(models.Model):
     code = models.CharField(max_length=10, unique=True, primary_key=True)
     name = models.CharField(max_length=100)
+    name_folded = models.CharField(max_length=100, blank=True, db_index=True)  # tên không dấu để tìm kiếm
     slug = models.CharField(max_length=100, blank=True, null=True)
     type = models.CharField(max_length=50)  # quan, huyen, thi-xa, thanh-pho
     name_with_type = models.CharField(max_length=150)
@@ -35,6 +53,10 @@ class District(models.Model):
         verbose_name = 'Quận/Huyện'
         verbose_name_plural = 'Quận/Huyện'
     
+    def save(self, *args, **kwargs):
+        set_folded_fields(self, [('name', 'name_folded')], kwargs)
+        super().save(*args, **kwargs)
+    
     def __str__(self):
         return self.name_with_type
 
@@ -42,6 +64,7 @@ class District(models.Model):
 class Ward(models.Model):
     code = models.CharField(max_length=10, unique=True, primary_key=True)
     name = models.CharField(max_length=100)
+    name_folded = models.CharField(max_length=100, blank=True, db_index=True)  # tên không dấu để tìm kiếm
     slug = models.CharField(max_length=100, blank=True, null=True)
     type = models.CharField(max_length=50)  # phuong, xa, thi-tran
     name_with_type = models.CharField(max_length=150)
@@ -55,22 +78,52 @@ class Ward(models.Model):
         verbose_name = 'Xã/Phường'
         verbose_name_plural = 'Xã/Phường'
     
+    def save(self, *args, **kwargs):
+        set_folded_fields(self, [('name', 'name_folded')], kwargs)
+        super().save(*args, **kwargs)
+    
     def __str__(self):
         return self.name_with_type
 
 # Model lưu các kỹ năng
 class Skill(models.Model):
     name = models.CharField(max_length=100, unique=True)
+    name_folded = models.CharField(max_length=100, blank=True, db_index=True)  # tên không dấu để tìm kiếm
     category = models.CharField(max_length=100, blank=True, null=True)  # IT, Marketing, etc.
     description = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)  # để bộ gắn skill biết khi nào cần build lại
     
     class Meta:
         ordering = ['name']
     
+    def save(self, *args, **kwargs):
+        set_folded_fields(self, [('name', 'name_folded')], kwargs)
+        super().save(*args, **kwargs)
+    
     def __str__(self):
         return self.name
 
+# Model lưu tên gọi khác của kỹ năng (viết tắt, cách viết khác: "JS", "Node.js", "CSKH")
+# dùng khi tìm skill trong văn bản tự do của tin tuyển dụng / hồ sơ
+class SkillAlias(models.Model):
+    skill = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name='aliases')
+    alias = models.CharField(max_length=100, unique=True)
+    alias_folded = models.CharField(max_length=100, blank=True, db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['alias']
+        verbose_name_plural = 'Skill Aliases'
+    
+    def save(self, *args, **kwargs):
+        set_folded_fields(self, [('alias', 'alias_folded')], kwargs)
+        super().save(*args, **kwargs)
+    
+    def __str__(self):
+        return f"{self.alias} -> {self.skill.name}"
+
 # Model lưu danh mục ngành nghề
 class JobCategory(models.Model):
     name = models.CharField(max_length=200, unique=True)
@@ -164,11 +217,14 @@ class Job(models.Model):
     ]
     
     title = models.CharField(max_length=200)
+    title_folded = models.CharField(max_length=200, blank=True, db_index=True)  # tiêu đề không dấu để tìm kiếm
     category = models.ForeignKey(JobCategory, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
     position = models.ForeignKey(JobPosition, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
     company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='jobs')
     description = models.TextField()
+    description_folded = models.TextField(blank=True)  # mô tả không dấu để tìm kiếm
     requirements = models.TextField(blank=True, null=True)
+    requirements_folded = models.TextField(blank=True)  # yêu cầu không dấu để tìm kiếm
     responsibilities = models.TextField(blank=True, null=True)
     # Location fields - phân cấp địa chỉ
     province = models.ForeignKey(Province, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
@@ -186,10 +242,26 @@ class Job(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     expiration_date = models.DateField(blank=True, null=True)
+    # Văn bản job (title, mô tả, yêu cầu, trách nhiệm, skills) đã tách từ + ngôn ngữ,
+    # tính lại khi nội dung (tokens_hash) thay đổi
+    tokens = models.TextField(blank=True)
+    language = models.CharField(max_length=2, blank=True)
+    tokens_hash = models.CharField(max_length=40, blank=True)
+    # Từ khóa nổi bật (TF-IDF với IDF của toàn bộ việc làm), tính từ tokens có hash keywords_hash
+    keywords = models.JSONField(default=list, blank=True)
+    keywords_hash = models.CharField(max_length=40, blank=True)
     
     class Meta:
         ordering = ['-created_at']
     
+    def save(self, *args, **kwargs):
+        set_folded_fields(self, [
+            ('title', 'title_folded'),
+            ('description', 'description_folded'),
+            ('requirements', 'requirements_folded'),
+        ], kwargs)
+        super().save(*args, **kwargs)
+    
     def __str__(self):
         return self.title
     
@@ -243,6 +315,18 @@ class Application(models.Model):
         ('Rejected', 'Rejected'),
     ]
     
+    # Trạng thái trích xuất text từ CV (chạy nền, xem jobs/cv_extraction.py)
+    CV_STATUS_CHOICES = [
+        ('', 'Không có CV'),
+        ('pending', 'Đang chờ xử lý'),
+        ('processing', 'Đang xử lý'),
+        ('completed', 'Hoàn thành'),
+        ('no_text', 'Không trích xuất được text'),
+        ('unsupported', 'Định dạng chưa hỗ trợ'),
+        ('timeout', 'Quá thời gian xử lý'),
+        ('failed', 'Thất bại'),
+    ]
+    
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
@@ -259,6 +343,15 @@ class Application(models.Model):
     cv_file = models.FileField(upload_to='applications/cv/', blank=True, null=True)
     introduction = models.TextField(blank=True, null=True, help_text='Giới thiệu bản thân ngắn gọn')
     
+    # Text trích xuất từ CV: dùng để tìm kiếm (cv_text_folded) và so khớp (cv_tokens)
+    cv_status = models.CharField(max_length=20, choices=CV_STATUS_CHOICES, blank=True, default='', db_index=True)
+    cv_error = models.TextField(blank=True, null=True)
+    cv_text = models.TextField(blank=True, default='')
+    cv_text_folded = models.TextField(blank=True, default='')
+    cv_tokens = models.TextField(blank=True, default='')
+    cv_language = models.CharField(max_length=2, blank=True, default='')
+    cv_skill_ids = models.JSONField(default=list, blank=True)  # skill tìm thấy trong CV, gán khi trích xuất xong
+    
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='Pending')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -287,6 +380,25 @@ class UserSkillProfile(models.Model):
     # Mô tả bản thân (optional) - dùng để TF-IDF matching với job description
     bio = models.TextField(blank=True, null=True, help_text="Mô tả ngắn về kinh nghiệm và kỹ năng của bạn")
     
+    # CV của hồ sơ (optional): text trích xuất chạy nền như CV ứng tuyển và được
+    # ghép vào văn bản hồ sơ khi matching; skill tìm thấy được gợi ý trên trang hồ sơ
+    cv_file = models.FileField(upload_to='user_cvs/', blank=True, null=True)
+    cv_status = models.CharField(max_length=20, choices=Application.CV_STATUS_CHOICES, blank=True, default='',
+                                 db_index=True)
+    cv_error = models.TextField(blank=True, null=True)
+    cv_text = models.TextField(blank=True, default='')
+    cv_tokens = models.TextField(blank=True, default='')
+    cv_language = models.CharField(max_length=2, blank=True, default='')
+    cv_skill_ids = models.JSONField(default=list, blank=True)
+    
+    # Thời điểm tính lại bảng UserJobMatch của hồ sơ (None = chưa tính)
+    matches_refreshed_at = models.DateTimeField(blank=True, null=True)
+    
+    # Văn bản hồ sơ đã tách từ + ngôn ngữ, tính lại khi nội dung (tokens_hash) thay đổi
+    tokens = models.TextField(blank=True)
+    language = models.CharField(max_length=2, blank=True)
+    tokens_hash = models.CharField(max_length=40, blank=True)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -303,4 +415,44 @@ class UserSkillProfile(models.Model):
     
     def get_categories_text(self):
         """Trả về text của tất cả categories"""
-        return ' '.join([cat.name for cat in self.categories.all()])
\ No newline at end of file
+        return ' '.join([cat.name for cat in self.categories.all()])
+
+# Model lưu điểm matching đã tính sẵn giữa hồ sơ kỹ năng và việc làm.
+# Được cập nhật bởi signals khi UserSkillProfile hoặc Job thay đổi, để các trang
+# đọc điểm bằng SQL thay vì chạy JobMatcher trong request.
+# Chỉ lưu các cặp có điểm > 0; không có dòng nghĩa là điểm 0.
+class UserJobMatch(models.Model):
+    profile = models.ForeignKey(UserSkillProfile, on_delete=models.CASCADE, related_name='job_matches')
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='user_matches')
+    matching_score = models.PositiveSmallIntegerField(default=0)
+    skill_score = models.PositiveSmallIntegerField(default=0)
+    text_score = models.PositiveSmallIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ('profile', 'job')
+        indexes = [
+            models.Index(fields=['profile', '-matching_score'], name='jobs_match_profile_score_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.profile.user.username} - {self.job.title}: {self.matching_score}%"
+
+# Hàng đợi tính lại bảng điểm UserJobMatch: mỗi dòng là 1 job hoặc 1 hồ sơ cần
+# tính lại. Lưu job / hồ sơ chỉ thêm dòng vào đây; việc tính điểm chạy ở nền
+# (jobs.match_store) hoặc bằng `manage.py process_match_refreshes`.
+class MatchRefreshTask(models.Model):
+    KIND_CHOICES = [
+        ('job', 'Việc làm'),
+        ('profile', 'Hồ sơ kỹ năng'),
+    ]
+    
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        unique_together = ('kind', 'object_id')
+    
+    def __str__(self):
+        return f"{self.kind} {self.object_id}"
@@ -1,139 +1,265 @@
+import importlib
+import importlib.util
+import os
 import re
-from typing import List, Tuple, Optional
+import string
+import unicodedata
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from itertools import islice
+from typing import Iterable, Iterator, List, Tuple, Optional
 
 # =================================================================
 # IMPORT LIBRARIES
 # =================================================================
 
-try:
-    from sklearn.feature_extraction.text import TfidfVectorizer
-    from sklearn.metrics.pairwise import cosine_similarity
-    SKLEARN_AVAILABLE = True
-except ImportError:
-    SKLEARN_AVAILABLE = False
-    print("Error: Chưa cài đặt sklearn")
+# sklearn, underthesea và textblob import mất từ vài trăm ms đến vài giây, nên chỉ
+# được import khi dùng lần đầu. Kiểm tra đã cài đặt hay chưa bằng find_spec
+# (không import module).
+def is_installed(module_name: str) -> bool:
+    try:
+        return importlib.util.find_spec(module_name) is not None
+    except (ImportError, ValueError):
+        return False
+
+SKLEARN_AVAILABLE = is_installed('sklearn')
+UNDERTHESEA_AVAILABLE = is_installed('underthesea')  # Tiếng Việt
+TEXTBLOB_AVAILABLE = is_installed('textblob')  # Tiếng Anh
+
+# Phiên bản của quy trình làm sạch + tách từ; đổi khi thay đổi kết quả tách từ
+# để các tokens đã lưu (Job.tokens, UserSkillProfile.tokens) được tách lại.
+TOKENIZER_VERSION = '7'
+
+# Import module khi dùng lần đầu (kết quả được cache); None nếu import lỗi.
+@lru_cache(maxsize=None)
+def import_optional(module_name: str):
+    try:
+        return importlib.import_module(module_name)
+    except ImportError as e:
+        print(f"Error: Không import được {module_name}: {e}")
+        return None
+
+
+# =================================================================
+# TEXT NORMALIZATION
+# =================================================================
+
+# Các ký tự đặc trưng tiếng Việt (chữ thường; văn bản được lower() trước khi đếm)
+VIETNAMESE_CHARS = frozenset('àáảãạăằắẳẵặâầấẩẫậèéẻẽẹêềếểễệìíỉĩịòóỏõọôồốổỗộơờớởỡợùúủũụưừứửữựỳýỷỹỵđ')
+
+# Tỉ lệ ký tự tiếng Việt tối thiểu để coi là văn bản tiếng Việt
+VIETNAMESE_CHAR_RATIO = 0.02
+
+# Đếm ký tự tiếng Việt bằng 1 regex (lớp ký tự dựng sẵn)
+_VIETNAMESE_CHAR = re.compile('[' + ''.join(sorted(VIETNAMESE_CHARS)) + ']')
 
-# Underthesea - Tiếng Việt
-try:
-    from underthesea import word_tokenize as vi_tokenize
-    UNDERTHESEA_AVAILABLE = True
-except ImportError:
-    UNDERTHESEA_AVAILABLE = False
-    print("Error: Chưa cài đặt underthesea")
+# URL (từ "http"/"www" đến hết cụm) và email (cụm chứa "@")
+_URL_OR_EMAIL = re.compile(r'http\S+|www\S+|\S+@\S+')
 
-# TextBlob - Tiếng Anh
-try:
-    from textblob import TextBlob
-    TEXTBLOB_AVAILABLE = True
-except ImportError:
-    TEXTBLOB_AVAILABLE = False
-    print("Error: Chưa cài đặt textblob")
+# Ký tự không phải chữ / "_" / khoảng trắng / chữ có dấu -> khoảng trắng
+_PUNCTUATION = re.compile(r'[^\w\s\u00C0-\u1EF9]+')
 
+# Chữ số (gồm cả số điện thoại) bị xóa
+_DIGITS = re.compile(r'\d+')
+
+# Phát hiện ngôn ngữ của văn bản đã lower() (VI hoặc EN) theo tỉ lệ ký tự
+# tiếng Việt; length: độ dài dùng làm mẫu số (mặc định độ dài văn bản).
+def _detect_lowered(lowered: str, length: Optional[int] = None) -> str:
+    length = len(lowered) if length is None else length
+    if not length:
+        return 'vi'
+    if lowered.isascii():
+        return 'en'
+    vietnamese_char_count = len(_VIETNAMESE_CHAR.findall(lowered))
+    return 'vi' if vietnamese_char_count / length > VIETNAMESE_CHAR_RATIO else 'en'
 
 # Phát hiện ngôn ngữ của văn bản (VI hoặc EN)
-# Dựa trên việc đếm ký tự tiếng Việt đặc trưng
+# Nếu có nhiều hơn 2% ký tự tiếng Việt -> tiếng Việt. Tỉ lệ tính trên dạng NFC
+# nên văn bản NFD (dấu tách rời) cho cùng kết quả.
 def detect_language(text: str) -> str:
     if not text:
         return 'vi'  # Default to Vietnamese
-    
-    # Các ký tự đặc trưng tiếng Việt
-    vietnamese_chars = set('àáảãạăằắẳẵặâầấẩẫậèéẻẽẹêềếểễệìíỉĩịòóỏõọôồốổỗộơờớởỡợùúủũụưừứửữựỳýỷỹỵđ')
-    vietnamese_chars.update([c.upper() for c in vietnamese_chars])
-    
-    text_lower = text.lower()
-    vietnamese_char_count = sum(1 for c in text_lower if c in vietnamese_chars)
-    
-    # Nếu có nhiều hơn 2% ký tự tiếng Việt -> tiếng Việt
-    if len(text) > 0 and (vietnamese_char_count / len(text)) > 0.02:
-        return 'vi'
-    
-    return 'en'
+    text = unicodedata.normalize('NFC', text)
+    return _detect_lowered(text.lower(), len(text))
+
+# Chuẩn hóa văn bản trong 1 bước: NFC, chữ thường, bỏ URL / email / số điện
+# thoại, bỏ dấu câu và chữ số, gộp khoảng trắng, đồng thời phát hiện ngôn ngữ.
+# Mọi regex / bảng ký tự được dựng sẵn ở module; mỗi bước chạy trong C.
+# Trả về (ngôn ngữ, văn bản đã làm sạch).
+def normalize_text(text: str) -> Tuple[str, str]:
+    if not text:
+        return 'vi', ''
+    text = unicodedata.normalize('NFC', text)
+    lowered = text.lower()
+    language = _detect_lowered(lowered, len(text))
+    # Phần lớn văn bản không có URL / email: bỏ qua regex đắt nhất
+    if '@' in lowered or 'http' in lowered or 'www' in lowered:
+        lowered = _URL_OR_EMAIL.sub('', lowered)
+    cleaned = _DIGITS.sub('', _PUNCTUATION.sub(' ', lowered))
+    return language, ' '.join(cleaned.split())
+
+# Chuẩn hóa nhiều văn bản (generator, dùng cho xử lý hàng loạt).
+def normalize_iter(texts: Iterable[str]) -> Iterator[Tuple[str, str]]:
+    for text in texts:
+        yield normalize_text(text)
+
+# Làm sạch văn bản
+def clean_text(text: str) -> str:
+    return normalize_text(text)[1]
 
 
 # =================================================================
-# TEXT CLEANING
+# ENGLISH TOKENIZATION
 # =================================================================
 
-# Làm sạch văn bản
-def clean_text(text: str) -> str:
+# Bộ tách từ tiếng Anh mặc định: 'fast' (có sẵn, không cần thư viện) hoặc
+# 'textblob' (chậm hơn nhiều, cần cài textblob + dữ liệu NLTK).
+ENGLISH_TOKENIZER = 'fast'
+
+# Bỏ stopwords / đưa từ về gốc (stem_english) khi tách từ văn bản tiếng Anh của
+# job và hồ sơ. Mặc định tắt: chỉ chữ thường, giữ nguyên từ như trước; bật thì
+# tăng TOKENIZER_VERSION để tokens đã lưu được tách lại.
+ENGLISH_REMOVE_STOPWORDS = False
+ENGLISH_STEM = False
+
+# Dấu câu ASCII -> khoảng trắng (1 lượt str.translate, không dùng regex)
+_ENGLISH_PUNCTUATION = str.maketrans({char: ' ' for char in string.punctuation})
+
+# Stopwords tiếng Anh phổ biến (không mang nghĩa khi so khớp việc làm)
+ENGLISH_STOPWORDS = frozenset("""
+a about above after again against all am an and any are as at be because been before being below
+between both but by can could did do does doing down during each few for from further had has have
+having he her here hers herself him himself his how i if in into is it its itself just me more most
+my myself no nor not now of off on once only or other our ours ourselves out over own same she should
+so some such than that the their theirs them themselves then there these they this those through to
+too under until up very was we were what when where which while who whom why will with would you
+your yours yourself yourselves also etc via per within without must may might shall us
+s t d ll m re ve
+""".split())
+
+# Stemmer nhẹ (bỏ đuôi số nhiều, -ing, -ed, -e) để "skills"/"skill",
+# "managing"/"managed"/"manage" về cùng 1 gốc. Kết quả được cache theo từ.
+@lru_cache(maxsize=65536)
+def stem_english(word: str) -> str:
+    if len(word) <= 3 or not word.isascii():
+        return word
+
+    if word.endswith('ies') and len(word) > 4:
+        word = word[:-3] + 'y'
+    elif word.endswith('sses'):
+        word = word[:-2]
+    elif word.endswith('s') and not word.endswith(('ss', 'us', 'is')):
+        word = word[:-1]
+
+    for suffix in ('ing', 'ed'):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            stem = word[:-len(suffix)]
+            if not any(vowel in stem for vowel in 'aeiouy') or (suffix == 'ed' and stem.endswith('e')):
+                break
+            # running -> run, planned -> plan
+            if len(stem) > 3 and stem[-1] == stem[-2] and stem[-1] not in 'lsz':
+                stem = stem[:-1]
+            word = stem
+            break
+
+    if word.endswith('e') and len(word) > 4 and not word.endswith('ee'):
+        word = word[:-1]
+    return word
+
+# Tách từ tiếng Anh.
+# mode: 'fast' (mặc định, xem ENGLISH_TOKENIZER) hoặc 'textblob' (TextBlob.words;
+# tự chuyển về 'fast' nếu chưa cài). Có thể bỏ stopwords và đưa từ về gốc.
+def tokenize_english(text: str, mode: Optional[str] = None,
+                     remove_stopwords: bool = False, stem: bool = False) -> List[str]:
     if not text:
-        return ""
-    
-    # Chuyển thành chữ thường
-    text = text.lower()
-    
-    # Loại bỏ URLs
-    text = re.sub(r'http\S+|www\S+|https\S+', '', text)
-    
-    # Loại bỏ email
-    text = re.sub(r'\S+@\S+', '', text)
-    
-    # Loại bỏ số điện thoại
-    text = re.sub(r'\b\d{9,11}\b', '', text)
-    
-    # Giữ lại ký tự chữ cái (bao gồm tiếng Việt) và khoảng trắng
-    text = re.sub(r'[^\w\s\u00C0-\u1EF9]', ' ', text)
-    
-    # Loại bỏ số
-    text = re.sub(r'\d+', '', text)
+        return []
     
-    # Chuẩn hóa khoảng trắng
-    text = re.sub(r'\s+', ' ', text).strip()
+    words = None
+    if (mode or ENGLISH_TOKENIZER) == 'textblob':
+        textblob = import_optional('textblob') if TEXTBLOB_AVAILABLE else None
+        if textblob is not None:
+            try:
+                words = [str(word).lower() for word in textblob.TextBlob(text).words]
+            except Exception as e:
+                print(f"English tokenization error: {e}")
+    if words is None:
+        words = text.lower().translate(_ENGLISH_PUNCTUATION).split()
     
-    return text
+    if remove_stopwords:
+        words = [word for word in words if word not in ENGLISH_STOPWORDS]
+    if stem:
+        words = [stem_english(word) for word in words]
+    return words
 
 
 # =================================================================
 # TOKENIZATION
 # =================================================================
 
-# Tách từ tiếng Việt sử dụng Underthesea
-def tokenize_vietnamese(text: str) -> List[str]:
-    if not UNDERTHESEA_AVAILABLE or not text:
-        return text.split() if text else []
-    
-    try:
-        tokens = vi_tokenize(text, format="text")
-        return tokens.split()
-    except Exception as e:
-        print(f"Vietnamese tokenization error: {e}")
-        return text.split() if text else []
+# Bộ tách từ tiếng Việt mặc định:
+# - 'underthesea': CRF, chính xác nhất nhưng chậm (chưa cài thì tách theo khoảng trắng như trước)
+# - 'dictionary': khớp dài nhất theo từ điển (jobs/vi_segmenter.py), nhanh hơn nhiều lần;
+#   chỉ dùng khi chọn rõ, sau khi so độ chính xác bằng scripts/compare_vi_segmenters.py
+# - 'whitespace': chỉ tách theo khoảng trắng (mỗi âm tiết 1 token)
+VIETNAMESE_TOKENIZER = 'underthesea'
 
+def _segment_by_dictionary(text: str) -> List[str]:
+    from .vi_segmenter import get_vietnamese_segmenter
+    return get_vietnamese_segmenter().segment(text)
 
-def tokenize_english(text: str) -> List[str]:
-    """
-    Tách từ tiếng Anh sử dụng TextBlob.
+# Tách từ tiếng Việt (mode: xem VIETNAMESE_TOKENIZER)
+def tokenize_vietnamese(text: str, mode: Optional[str] = None) -> List[str]:
+    if not text:
+        return []
+    
+    mode = mode or VIETNAMESE_TOKENIZER
+    if mode == 'whitespace':
+        return text.split()
     
-    Args:
-        text: Văn bản tiếng Anh
+    if mode == 'dictionary':
+        try:
+            return _segment_by_dictionary(text)
+        except Exception as e:
+            print(f"Vietnamese tokenization error: {e}")
+            return text.split()
     
-    Returns:
-        List các từ đã được tách
-    """
-    if not TEXTBLOB_AVAILABLE or not text:
-        return text.split() if text else []
+    underthesea = import_optional('underthesea') if UNDERTHESEA_AVAILABLE else None
+    if underthesea is None:
+        return text.split()
     
     try:
-        blob = TextBlob(text)
-        return [str(word) for word in blob.words]
+        tokens = underthesea.word_tokenize(text, format="text")
+        return tokens.split()
     except Exception as e:
-        print(f"English tokenization error: {e}")
-        return text.split() if text else []
+        print(f"Vietnamese tokenization error: {e}")
+        return text.split()
+
+# Chuẩn bị bộ tách từ trước khi tạo process pool: process con (fork) dùng luôn
+# từ điển đã build, không phải query database.
+def _prepare_vietnamese_tokenizer():
+    if VIETNAMESE_TOKENIZER == 'dictionary':
+        try:
+            from .vi_segmenter import get_vietnamese_segmenter
+            get_vietnamese_segmenter()
+        except Exception as e:
+            print(f"Error preparing Vietnamese tokenizer: {e}")
+
 
+# Tách từ văn bản đã chuẩn hóa (normalize_text) theo ngôn ngữ.
+def tokenize_cleaned(cleaned: str, language: str) -> List[str]:
+    if language == 'vi':
+        return tokenize_vietnamese(cleaned)
+    else:
+        return tokenize_english(cleaned, remove_stopwords=ENGLISH_REMOVE_STOPWORDS, stem=ENGLISH_STEM)
 
 def tokenize_text(text: str, language: Optional[str] = None) -> List[str]:
     if not text:
         return []
     
-    if language is None:
-        language = detect_language(text)
-    
-    cleaned = clean_text(text)
-    
-    if language == 'vi':
-        return tokenize_vietnamese(cleaned)
-    else:
-        return tokenize_english(cleaned)
+    detected, cleaned = normalize_text(text)
+    return tokenize_cleaned(cleaned, language or detected)
 
 # Tách từ và trả về text đã tokenize.
 def get_tokenized_text(text: str, language: Optional[str] = None) -> str:
@@ -141,13 +267,127 @@ def get_tokenized_text(text: str, language: Optional[str] = None) -> str:
     return ' '.join(tokens)
 
 
+# =================================================================
+# BATCH TOKENIZATION
+# =================================================================
+
+# Tách từ 1 chunk văn bản (chạy trong process con).
+def _tokenize_chunk(texts: List[str], language: Optional[str] = None) -> List[str]:
+    return [get_tokenized_text(text, language) for text in texts]
+
+# Process pool mới; None nếu môi trường không tạo được process con / semaphore
+# (ví dụ không có /dev/shm), khi đó tách từ ngay trong process hiện tại.
+def _create_pool(workers: int) -> Optional[ProcessPoolExecutor]:
+    try:
+        return ProcessPoolExecutor(max_workers=workers)
+    except (OSError, NotImplementedError) as e:
+        print(f"Tokenization pool unavailable, tokenizing in-process: {e}")
+        return None
+
+# Future đã có kết quả tách từ (chạy trong process hiện tại).
+def _tokenize_in_process(texts: List[str], language: Optional[str]) -> Future:
+    future = Future()
+    future.set_result(_tokenize_chunk(texts, language))
+    return future
+
+# Tách từ lại từng văn bản của chunk bị lỗi trong pool mới; văn bản vẫn làm
+# process con bị crash thì chỉ làm sạch và tách theo khoảng trắng.
+def _retry_chunk(texts: List[str], language: Optional[str]) -> List[str]:
+    results = []
+    executor = _create_pool(1)
+    try:
+        for text in texts:
+            if executor is None:
+                results.extend(_tokenize_chunk([text], language))
+                continue
+            try:
+                results.append(executor.submit(_tokenize_chunk, [text], language).result()[0])
+            except BrokenProcessPool:
+                print(f"Tokenization worker crashed on text: {text[:50]!r}")
+                results.append(clean_text(text))
+                executor.shutdown(wait=False, cancel_futures=True)
+                executor = _create_pool(1)
+            except Exception as e:
+                print(f"Tokenization error: {e}")
+                results.append(clean_text(text))
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+    return results
+
+# Tách từ nhiều văn bản song song bằng process pool (underthesea dùng CRF, tốn CPU
+# và chạy 1 luồng). Kết quả được trả về dần (generator) theo đúng thứ tự đầu vào,
+# giống get_tokenized_text cho từng văn bản. Chỉ giữ tối đa 2 chunk / worker đang
+# chờ nên dùng được với iterable rất dài. Không tạo được pool thì tách từ tuần tự
+# trong process hiện tại.
+def tokenize_many(texts: Iterable[str], workers: Optional[int] = None, chunksize: int = 64,
+                  language: Optional[str] = None) -> Iterator[str]:
+    if workers is None:
+        workers = os.cpu_count() or 1
+    texts = iter(texts)
+    chunks = iter(lambda: list(islice(texts, chunksize)), [])
+
+    if workers <= 1:
+        for chunk in chunks:
+            yield from _tokenize_chunk(chunk, language)
+        return
+
+    if language != 'en':
+        _prepare_vietnamese_tokenizer()
+    executor = _create_pool(workers)
+
+    # 1 process con bị crash làm hỏng cả pool: tạo pool mới và gửi lại
+    def submit(chunk):
+        nonlocal executor
+        if executor is not None:
+            try:
+                return executor.submit(_tokenize_chunk, chunk, language)
+            except BrokenProcessPool:
+                executor.shutdown(wait=False, cancel_futures=True)
+                executor = _create_pool(workers)
+                if executor is not None:
+                    return executor.submit(_tokenize_chunk, chunk, language)
+            except OSError as e:
+                # Không fork / spawn được process con
+                print(f"Tokenization pool unavailable, tokenizing in-process: {e}")
+                executor.shutdown(wait=False, cancel_futures=True)
+                executor = None
+        return _tokenize_in_process(chunk, language)
+
+    try:
+        pending = deque((chunk, submit(chunk), False) for chunk in islice(chunks, workers * 2))
+        while pending:
+            chunk, future, retried = pending.popleft()
+            try:
+                results = future.result()
+            except BrokenProcessPool:
+                # Mọi chunk đang chạy trong pool hỏng đều lỗi: gửi lại 1 lần vào pool mới,
+                # lỗi lần nữa thì tách từng văn bản để cô lập văn bản gây crash
+                if not retried:
+                    pending.appendleft((chunk, submit(chunk), True))
+                    continue
+                results = _retry_chunk(chunk, language)
+            except Exception as e:
+                print(f"Tokenization error: {e}")
+                results = _retry_chunk(chunk, language)
+
+            next_chunk = next(chunks, None)
+            if next_chunk is not None:
+                pending.append((next_chunk, submit(next_chunk), False))
+            yield from results
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
 # =================================================================
 # TF-IDF VECTORIZATION & COSINE SIMILARITY
 # =================================================================
 
 # Tính độ tương đồng giữa 2 văn bản sử dụng TF-IDF và Cosine Similarity.
 def calculate_tfidf_similarity(text1: str, text2: str, use_tokenization: bool = True) -> float:
-    if not SKLEARN_AVAILABLE:
+    sklearn_text = import_optional('sklearn.feature_extraction.text') if SKLEARN_AVAILABLE else None
+    if sklearn_text is None:
         return 0.0
     
     if not text1 or not text2:
@@ -167,7 +407,7 @@ def calculate_tfidf_similarity(text1: str, text2: str, use_tokenization: bool =
         if not processed_text1 or not processed_text2:
             return 0.0
         
-        vectorizer = TfidfVectorizer(
+        vectorizer = sklearn_text.TfidfVectorizer(
             ngram_range=(1, 2),
             min_df=1,
             max_df=0.95,
@@ -176,7 +416,8 @@ def calculate_tfidf_similarity(text1: str, text2: str, use_tokenization: bool =
         
         tfidf_matrix = vectorizer.fit_transform([processed_text1, processed_text2])
         
-        similarity = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:2])[0][0]
+        # Các hàng TF-IDF đã chuẩn hóa L2 nên cosine = tích vô hướng
+        similarity = (tfidf_matrix[0] @ tfidf_matrix[1].T).toarray()[0][0]
         
         return float(similarity)
         
@@ -195,20 +436,24 @@ def get_matching_score_percentage(text1: str, text2: str) -> int:
 # =================================================================
 
 # Trích xuất các từ khóa quan trọng nhất từ văn bản sử dụng TF-IDF.
-def get_top_keywords(text: str, top_n: int = 20, language: Optional[str] = None) -> List[Tuple[str, float]]:
-    if not SKLEARN_AVAILABLE or not text:
+# tokenized: văn bản đã tách từ sẵn (ví dụ Job.tokens) - bỏ qua bước tách từ.
+def get_top_keywords(text: str, top_n: int = 20, language: Optional[str] = None,
+                     tokenized: Optional[str] = None) -> List[Tuple[str, float]]:
+    sklearn_text = import_optional('sklearn.feature_extraction.text') if SKLEARN_AVAILABLE else None
+    if sklearn_text is None or not (text or tokenized):
         return []
     
     try:
-        if language is None:
-            language = detect_language(text)
-        
-        tokenized = get_tokenized_text(text, language)
+        if tokenized is None:
+            if language is None:
+                language = detect_language(text)
+            
+            tokenized = get_tokenized_text(text, language)
         
         if not tokenized:
             return []
         
-        vectorizer = TfidfVectorizer(
+        vectorizer = sklearn_text.TfidfVectorizer(
             ngram_range=(1, 2),
             max_features=100
         )
@@ -243,6 +488,7 @@ def is_textblob_available() -> bool:
     return TEXTBLOB_AVAILABLE
 
 
+# Trạng thái cài đặt (không import thư viện).
 def get_nlp_libraries_status() -> dict:
     return {
         'sklearn': SKLEARN_AVAILABLE,
@@ -0,0 +1,117 @@
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from django.db.models import F, Q, QuerySet
+
+
+# Các kiểu sắp xếp dùng keyset pagination: sort -> (field, giảm dần)
+# Giá trị NULL luôn nằm cuối, id dùng để phân định các dòng bằng nhau.
+KEYSET_SORTS = {
+    'newest': ('created_at', True),
+    'oldest': ('created_at', False),
+    'salary_high': ('salary_max', True),
+    'salary_low': ('salary_min', False),
+    'city': ('province__name', False),
+    # Chỉ dùng khi có từ khóa tìm kiếm (search_rank do jobs.search thêm vào)
+    'relevance': ('search_rank', False),
+}
+
+
+# ============================================================
+# CURSOR
+# ============================================================
+
+# Mã hóa (giá trị sắp xếp, id) của dòng cuối trang thành chuỗi dùng trên URL.
+def encode_cursor(value, job_id: int) -> str:
+    if isinstance(value, datetime):
+        value = {'dt': value.isoformat()}
+    data = json.dumps([value, job_id], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+# Kiểu giá trị hợp lệ của cursor theo field sắp xếp (None = cho phép NULL).
+# created_at được mã hóa thành {'dt': isoformat}.
+CURSOR_VALUE_TYPES = {
+    'created_at': (dict,),
+    'salary_max': (int, type(None)),
+    'salary_min': (int, type(None)),
+    'province__name': (str, type(None)),
+    'search_rank': (float,),
+}
+
+# Giải mã cursor của kiểu sắp xếp sort_by; trả về None nếu cursor không hợp lệ
+# hoặc giá trị không đúng kiểu của field (cursor bị sửa tay), để danh sách
+# quay lại trang 1 thay vì lỗi khi so sánh trong query.
+def decode_cursor(cursor: str, sort_by: str) -> Optional[Tuple[object, int]]:
+    field, _ = KEYSET_SORTS[sort_by]
+    try:
+        data = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        value, job_id = json.loads(data)
+        if isinstance(value, bool) or isinstance(job_id, bool) or not isinstance(job_id, int):
+            return None
+        if not isinstance(value, CURSOR_VALUE_TYPES[field]):
+            return None
+        if isinstance(value, dict):
+            value = datetime.fromisoformat(value['dt'])
+        return value, job_id
+    except (ValueError, TypeError, KeyError):
+        return None
+
+
+# ============================================================
+# KEYSET PAGINATION
+# ============================================================
+
+# Sắp xếp queryset theo sort_by và thêm cột sort_key để tạo cursor.
+def order_for_keyset(jobs: QuerySet, sort_by: str) -> QuerySet:
+    field, descending = KEYSET_SORTS[sort_by]
+    jobs = jobs.annotate(sort_key=F(field))
+    if descending:
+        return jobs.order_by(F('sort_key').desc(nulls_last=True), '-id')
+    return jobs.order_by(F('sort_key').asc(nulls_last=True), 'id')
+
+# Điều kiện "nằm sau cursor" theo thứ tự của order_for_keyset.
+def _after_cursor(value, job_id: int, descending: bool) -> Q:
+    after = 'lt' if descending else 'gt'
+    if value is None:
+        return Q(sort_key__isnull=True, **{f'id__{after}': job_id})
+    return (
+        Q(**{f'sort_key__{after}': value})
+        | Q(sort_key=value, **{f'id__{after}': job_id})
+        | Q(sort_key__isnull=True)
+    )
+
+# Lấy 1 trang sau cursor. Chỉ đọc per_page + 1 dòng, nên thời gian không phụ
+# thuộc vào vị trí trang như OFFSET. Trả về (jobs, cursor của trang sau).
+def paginate_keyset(jobs: QuerySet, sort_by: str, cursor: Optional[str],
+                    per_page: int) -> Tuple[List, Optional[str]]:
+    _, descending = KEYSET_SORTS[sort_by]
+    jobs = order_for_keyset(jobs, sort_by)
+
+    position = decode_cursor(cursor, sort_by) if cursor else None
+    if position is not None:
+        jobs = jobs.filter(_after_cursor(position[0], position[1], descending))
+
+    page = list(jobs[:per_page + 1])
+    next_cursor = None
+    if len(page) > per_page:
+        page = page[:per_page]
+        last = page[-1]
+        next_cursor = encode_cursor(last.sort_key, last.id)
+    return page, next_cursor
+
+
+# ============================================================
+# RANKED ID PAGINATION
+# ============================================================
+
+# Lấy 1 trang từ danh sách id đã xếp hạng (ví dụ theo điểm matching).
+# Chỉ các job của trang được load từ database, giữ đúng thứ tự xếp hạng.
+def paginate_ranked_ids(jobs: QuerySet, ranked_ids: List[int], page_number: int,
+                        per_page: int) -> Tuple[List, bool]:
+    start = (page_number - 1) * per_page
+    page_ids = ranked_ids[start:start + per_page]
+    job_map = jobs.in_bulk(page_ids)
+    page = [job_map[job_id] for job_id in page_ids if job_id in job_map]
+    return page, start + per_page < len(ranked_ids)
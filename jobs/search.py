@@ -0,0 +1,152 @@
+import re
+from typing import Iterable, List
+
+from django.db import connection
+from django.db.models import F, FloatField, Func, QuerySet
+from django.db.models.expressions import RawSQL
+
+from .models import Job
+from .text_utils import fold_text
+
+
+# Bảng FTS5 (SQLite) chứa văn bản không dấu (fold_text) của các job, rowid = Job.id
+FTS_TABLE = 'jobs_job_fts'
+FTS_COLUMNS = ('title', 'description', 'requirements', 'responsibilities', 'skills')
+
+# Trọng số bm25 theo thứ tự FTS_COLUMNS: tiêu đề và skills quan trọng hơn mô tả
+BM25_WEIGHTS = (10.0, 1.0, 1.0, 1.0, 5.0)
+
+_TOKEN_RE = re.compile(r'\w+')
+
+_fts_available = None
+
+
+# ============================================================
+# AVAILABILITY
+# ============================================================
+
+# Database hiện tại có bảng FTS không (kiểm tra 1 lần cho mỗi process).
+def fts_available() -> bool:
+    global _fts_available
+    if _fts_available is None:
+        _fts_available = (
+            connection.vendor == 'sqlite'
+            and FTS_TABLE in connection.introspection.table_names()
+        )
+    return _fts_available
+
+
+# ============================================================
+# INDEXING
+# ============================================================
+
+# Dòng FTS của các job: (id, title, description, requirements, responsibilities, skills).
+def _load_fts_rows(job_ids: List[int]) -> List[tuple]:
+    skill_names = {}
+    skill_rows = (
+        Job.required_skills.through.objects
+        .filter(job_id__in=job_ids)
+        .order_by('skill__name')
+        .values_list('job_id', 'skill__name')
+    )
+    for job_id, skill_name in skill_rows:
+        skill_names.setdefault(job_id, []).append(skill_name)
+
+    rows = Job.objects.filter(id__in=job_ids).values_list(
+        'id', 'title', 'description', 'requirements', 'responsibilities'
+    )
+    return [
+        (job_id, fold_text(title), fold_text(description), fold_text(requirements),
+         fold_text(responsibilities), fold_text(' '.join(skill_names.get(job_id, []))))
+        for job_id, title, description, requirements, responsibilities in rows
+    ]
+
+# Thêm/cập nhật các job trong bảng FTS.
+def index_jobs(job_ids: Iterable[int]):
+    if not fts_available():
+        return
+
+    job_ids = list(job_ids)
+    with connection.cursor() as cursor:
+        for start in range(0, len(job_ids), 500):
+            chunk = job_ids[start:start + 500]
+            cursor.execute(
+                f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({', '.join(['%s'] * len(chunk))})",
+                chunk,
+            )
+            cursor.executemany(
+                f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(FTS_COLUMNS)}) "
+                f"VALUES (%s, %s, %s, %s, %s, %s)",
+                _load_fts_rows(chunk),
+            )
+
+# Xây lại toàn bộ bảng FTS từ bảng Job.
+def rebuild_index():
+    if not fts_available():
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+    index_jobs(Job.objects.values_list('id', flat=True))
+
+# Xóa job khỏi bảng FTS.
+def remove_jobs(job_ids: Iterable[int]):
+    if not fts_available():
+        return
+
+    job_ids = list(job_ids)
+    if job_ids:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({', '.join(['%s'] * len(job_ids))})",
+                job_ids,
+            )
+
+
+# ============================================================
+# SEARCH
+# ============================================================
+
+# Chuyển từ khóa người dùng thành câu truy vấn MATCH an toàn (không dấu):
+# mỗi từ được đặt trong dấu nháy (không dùng cú pháp FTS), từ cuối tìm theo tiền tố.
+def build_fts_query(text: str) -> str:
+    tokens = _TOKEN_RE.findall(fold_text(text))
+    if not tokens:
+        return ''
+    terms = [f'"{token}"' for token in tokens]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+# Điểm bm25 của job trong kết quả MATCH (NULL nếu job không khớp).
+# Kết quả MATCH được MATERIALIZED 1 lần cho cả câu truy vấn rồi tra theo id,
+# không chạy lại MATCH cho từng job. Cột id của bảng ngoài được compiler của
+# ORM sinh ra (không viết cứng "jobs_job"), nên vẫn đúng khi bảng Job bị đặt
+# alias (subquery, union...).
+class FtsRank(Func):
+    output_field = FloatField()
+
+    def __init__(self, query: str, expression='pk'):
+        super().__init__(F(expression))
+        self.query = query
+
+    def as_sql(self, compiler, connection, **extra_context):
+        id_sql, id_params = compiler.compile(self.source_expressions[0])
+        weights = ', '.join(str(weight) for weight in BM25_WEIGHTS)
+        sql = (
+            f"(WITH fts_rank AS MATERIALIZED ("
+            f"SELECT rowid AS job_id, bm25({FTS_TABLE}, {weights}) AS rank "
+            f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s"
+            f") SELECT rank FROM fts_rank WHERE job_id = {id_sql})"
+        )
+        return sql, [self.query, *id_params]
+
+# Lọc queryset theo từ khóa bằng FTS5 và thêm cột search_rank (bm25, nhỏ hơn = liên quan hơn).
+# Bộ lọc là subquery không phụ thuộc dòng ngoài (MATCH chạy 1 lần), search_rank
+# là FtsRank ở trên.
+def search_jobs(jobs: QuerySet, text: str) -> QuerySet:
+    query = build_fts_query(text)
+    if not query:
+        return jobs
+
+    matched_ids = RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", (query,))
+    return jobs.filter(id__in=matched_ids).annotate(search_rank=FtsRank(query))
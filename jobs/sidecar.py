@@ -0,0 +1,150 @@
+import json
+import socket
+import struct
+import threading
+import time
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+from django.conf import settings
+
+from .nlp_processor import import_optional, is_installed
+
+
+# Thời gian chờ tối đa (giây) cho 1 truy vấn lọc / đếm facet và cho 1 lần tính
+# điểm matching trên toàn bộ catalog; quá thời gian thì tính trong process
+SIDECAR_TIMEOUT = 0.5
+SIDECAR_MATCH_TIMEOUT = 5.0
+
+# Sau 1 lỗi (sidecar chưa chạy, quá thời gian...), bỏ qua sidecar trong chừng
+# này giây để request không phải chờ lại
+SIDECAR_RETRY_SECONDS = 5
+
+# Kích thước tối đa của 1 message (bytes)
+MAX_FRAME_SIZE = 64 * 1024 * 1024
+
+MSGPACK_AVAILABLE = is_installed('msgpack')
+
+
+# ============================================================
+# PROTOCOL
+# ============================================================
+
+# Mỗi message gồm header 5 byte (độ dài payload: uint32 big-endian, codec: uint8)
+# và payload. Request: {'op': ..., 'args': {...}}; response: {'ok': True,
+# 'result': ...} hoặc {'ok': False, 'error': ...}, cùng codec với request.
+# Nhiều request nối tiếp nhau trên cùng 1 kết nối.
+HEADER = struct.Struct('>IB')
+CODEC_JSON = 0
+CODEC_MSGPACK = 1
+
+def encode_frame(message, codec: int = CODEC_JSON) -> bytes:
+    if codec == CODEC_MSGPACK:
+        payload = import_optional('msgpack').packb(message)
+    else:
+        payload = json.dumps(message, separators=(',', ':')).encode()
+    return HEADER.pack(len(payload), codec) + payload
+
+def decode_payload(codec: int, payload: bytes):
+    if codec == CODEC_MSGPACK and MSGPACK_AVAILABLE:
+        return import_optional('msgpack').unpackb(payload, strict_map_key=False)
+    if codec == CODEC_JSON:
+        return json.loads(payload)
+    raise ValueError(f'Unsupported codec {codec}')
+
+
+# ============================================================
+# CLIENT
+# ============================================================
+
+# Mỗi thread giữ 1 kết nối tới sidecar
+_local = threading.local()
+_unavailable_until = 0.0
+
+def _recv_exactly(connection: socket.socket, size: int) -> bytes:
+    chunks = []
+    while size:
+        chunk = connection.recv(min(size, 1 << 20))
+        if not chunk:
+            raise ConnectionError('Sidecar closed the connection')
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+def _close_connection():
+    connection = getattr(_local, 'connection', None)
+    _local.connection = None
+    if connection is not None:
+        connection.close()
+
+def _request(path: str, message, codec: int, timeout: float):
+    connection = getattr(_local, 'connection', None)
+    if connection is None or _local.path != path:
+        _close_connection()
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.settimeout(timeout)
+        connection.connect(path)
+        _local.connection, _local.path = connection, path
+
+    connection.settimeout(timeout)
+    connection.sendall(encode_frame(message, codec))
+    length, response_codec = HEADER.unpack(_recv_exactly(connection, HEADER.size))
+    if length > MAX_FRAME_SIZE:
+        raise ValueError(f'Response too large ({length} bytes)')
+    return decode_payload(response_codec, _recv_exactly(connection, length))
+
+# Gửi 1 truy vấn tới sidecar (`manage.py run_match_sidecar`). Trả về kết quả,
+# hoặc None nếu sidecar không được cấu hình (settings.MATCH_SIDECAR_SOCKET),
+# không chạy, lỗi hoặc quá thời gian - khi đó nơi gọi tự tính trong process.
+def call_sidecar(op: str, args: Optional[dict] = None, timeout: float = SIDECAR_TIMEOUT,
+                 path: Optional[str] = None):
+    global _unavailable_until
+
+    path = path or getattr(settings, 'MATCH_SIDECAR_SOCKET', None)
+    if not path or time.monotonic() < _unavailable_until:
+        return None
+
+    message = {'op': op, 'args': args or {}}
+    codec = CODEC_MSGPACK if MSGPACK_AVAILABLE else CODEC_JSON
+    for attempt in range(2):
+        reused = getattr(_local, 'connection', None) is not None
+        try:
+            response = _request(path, message, codec, timeout)
+            break
+        except (OSError, ValueError) as e:
+            _close_connection()
+            # Kết nối cũ bị đóng (sidecar khởi động lại): thử lại 1 lần bằng kết nối mới
+            if reused and attempt == 0 and isinstance(e, ConnectionError):
+                continue
+            _unavailable_until = time.monotonic() + SIDECAR_RETRY_SECONDS
+            # Không báo lỗi khi sidecar đơn giản là không chạy
+            if not isinstance(e, (FileNotFoundError, ConnectionRefusedError)):
+                print(f"Match sidecar error ({op}): {e}")
+            return None
+
+    if not response.get('ok'):
+        print(f"Match sidecar error ({op}): {response.get('error')}")
+        return None
+    return response['result']
+
+# Query string (QueryDict) -> {tham số: [giá trị]}
+def _params(params) -> Dict[str, List[str]]:
+    return {key: params.getlist(key) for key in params}
+
+# Số job theo từng giá trị facet (như JobFilterIndex.facet_counts).
+def remote_facet_counts(params) -> Optional[Dict[str, Dict[str, int]]]:
+    return call_sidecar('facets', {'params': _params(params)})
+
+# Id các job thỏa bộ lọc, đã sắp xếp (như JobFilterIndex.ranked_ids).
+def remote_ranked_ids(params, sort_by: str) -> Optional[List[int]]:
+    return call_sidecar('search', {'params': _params(params), 'sort_by': sort_by})
+
+# Điểm của hồ sơ với các job đang hoạt động (chỉ job có điểm > 0, điểm giảm
+# dần, tối đa k job): các cột job_ids, matching_scores, skill_scores, text_scores.
+def remote_match_scores(profile_id: int, k: Optional[int] = None,
+                        text_scorer: Optional[str] = None) -> Optional[SimpleNamespace]:
+    result = call_sidecar(
+        'match', {'profile_id': profile_id, 'k': k, 'text_scorer': text_scorer},
+        timeout=SIDECAR_MATCH_TIMEOUT,
+    )
+    return SimpleNamespace(**result) if result is not None else None
@@ -0,0 +1,165 @@
+import asyncio
+import os
+import signal
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from django.db import close_old_connections
+from django.utils.datastructures import MultiValueDict
+
+from .filter_index import INDEX_SORTS, get_job_filter_index
+from .match_index import get_catalog_state, get_job_inverted_index, get_job_text_index
+from .models import Job, UserSkillProfile
+from .sidecar import CODEC_JSON, HEADER, MAX_FRAME_SIZE, decode_payload, encode_frame
+
+
+# Số truy vấn tính đồng thời (thread); các phép numpy / scipy nặng nhất nhả GIL
+SIDECAR_WORKERS = 4
+
+
+# ============================================================
+# HANDLERS
+# ============================================================
+
+_started_at = time.time()
+_request_counts = {}
+
+def handle_ping():
+    return {
+        'pid': os.getpid(),
+        'uptime': time.time() - _started_at,
+        'requests': dict(_request_counts),
+    }
+
+def _filter_index():
+    index = get_job_filter_index()
+    if index is None:
+        raise RuntimeError('numpy is not installed')
+    return index
+
+def handle_facets(params):
+    return _filter_index().facet_counts(MultiValueDict(params))
+
+def handle_search(params, sort_by='newest'):
+    if sort_by not in INDEX_SORTS:
+        raise ValueError(f'Unsupported sort {sort_by!r}')
+    return _filter_index().ranked_ids(MultiValueDict(params), sort_by)
+
+def handle_match(profile_id, k=None, text_scorer=None):
+    from .matching_service import JobMatcher
+
+    profile = UserSkillProfile.objects.get(pk=profile_id)
+    batch = JobMatcher(profile, text_scorer).score_jobs(Job.objects.filter(is_active=True))
+    job_ids = batch.ranked_ids(k, min_score=1)
+    rows = [batch.row_by_id[job_id] for job_id in job_ids]
+    return {
+        'job_ids': job_ids,
+        'matching_scores': batch.matching_scores[rows].tolist(),
+        'skill_scores': batch.skill_scores[rows].tolist(),
+        'text_scores': batch.text_scores[rows].tolist(),
+    }
+
+HANDLERS = {
+    'ping': handle_ping,
+    'facets': handle_facets,
+    'search': handle_search,
+    'match': handle_match,
+}
+
+# Xử lý 1 request (chạy trong thread của executor, không chạy trong event loop
+# vì ORM của Django là đồng bộ).
+def dispatch(request) -> dict:
+    try:
+        op = request.get('op')
+        handler = HANDLERS.get(op)
+        if handler is None:
+            raise ValueError(f'Unknown op {op!r}')
+        _request_counts[op] = _request_counts.get(op, 0) + 1
+        return {'ok': True, 'result': handler(**(request.get('args') or {}))}
+    except Exception as e:
+        return {'ok': False, 'error': f'{type(e).__name__}: {e}'}
+    finally:
+        close_old_connections()
+
+# Build trước các index trong bộ nhớ để request đầu tiên không phải chờ.
+def warm_up():
+    try:
+        state = get_catalog_state()
+        get_job_filter_index(state)
+        get_job_inverted_index(state)
+        get_job_text_index(state)
+    finally:
+        close_old_connections()
+
+
+# ============================================================
+# SERVER
+# ============================================================
+
+# Server asyncio trên Unix socket: event loop chỉ đọc / ghi message, việc tính
+# toán chạy trong thread pool nên nhiều kết nối được phục vụ cùng lúc.
+class SidecarServer:
+    def __init__(self, path: str, workers: int = SIDECAR_WORKERS):
+        self.path = path
+        self.executor = ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix='match-sidecar')
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                length, codec = HEADER.unpack(await reader.readexactly(HEADER.size))
+                if length > MAX_FRAME_SIZE:
+                    break
+                payload = await reader.readexactly(length)
+                try:
+                    request = decode_payload(codec, payload)
+                except ValueError as e:
+                    response, codec = {'ok': False, 'error': f'Bad request: {e}'}, CODEC_JSON
+                else:
+                    response = await loop.run_in_executor(self.executor, dispatch, request)
+                writer.write(encode_frame(response, codec))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except asyncio.CancelledError:
+            # Server đang dừng
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, ready: Optional[callable] = None):
+        loop = asyncio.get_running_loop()
+        stop = asyncio.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, stop.set)
+
+        server = await asyncio.start_unix_server(self.handle_connection, path=self.path)
+        try:
+            if ready is not None:
+                ready()
+            async with server:
+                await stop.wait()
+        finally:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+
+    def run(self, ready: Optional[callable] = None):
+        asyncio.run(self.serve(ready))
+
+# Socket đang có server khác lắng nghe hay không. File socket còn lại sau khi
+# server bị dừng đột ngột (không ai lắng nghe) được xóa.
+def socket_in_use(path: str) -> bool:
+    if not os.path.exists(path):
+        return False
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+        return True
+    except OSError:
+        os.unlink(path)
+        return False
+    finally:
+        probe.close()
@@ -0,0 +1,94 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .filter_index import remove_job_from_filter_index, schedule_filter_index_update
+from .match_store import schedule_job_refresh, schedule_profile_refresh
+from .models import Job, Skill, UserSkillProfile
+from .search import index_jobs, remove_jobs
+
+
+# Đánh dấu job đã thay đổi bằng cách cập nhật updated_at.
+# QuerySet.update() không tự cập nhật auto_now nên phải gán trực tiếp.
+def touch_jobs(job_ids):
+    if job_ids:
+        Job.objects.filter(pk__in=job_ids).update(updated_at=timezone.now())
+
+
+# Thay đổi skills của job (job.required_skills.set/add/remove/clear)
+# không gọi Job.save(), nên phải cập nhật updated_at để index nhận biết.
+@receiver(m2m_changed, sender=Job.required_skills.through)
+def job_skills_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear' and reverse:
+        instance._cleared_job_ids = list(instance.jobs.values_list('id', flat=True))
+        return
+
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        job_ids = [instance.pk]
+    elif action == 'post_clear':
+        job_ids = getattr(instance, '_cleared_job_ids', [])
+    else:
+        job_ids = list(pk_set or [])
+
+    touch_jobs(job_ids)
+    index_jobs(job_ids)
+    for job_id in job_ids:
+        schedule_job_refresh(job_id)
+
+
+@receiver(post_save, sender=Job)
+def job_saved(sender, instance, **kwargs):
+    index_jobs([instance.pk])
+    schedule_filter_index_update(instance.pk)
+    schedule_job_refresh(instance.pk)
+
+
+# Đổi tên skill làm thay đổi văn bản của các job có skill đó
+@receiver(post_save, sender=Skill)
+def skill_saved(sender, instance, created, **kwargs):
+    if not created:
+        job_ids = list(instance.jobs.values_list('id', flat=True))
+        touch_jobs(job_ids)
+        index_jobs(job_ids)
+        for job_id in job_ids:
+            schedule_job_refresh(job_id)
+
+
+# Xóa skill sẽ xóa luôn các dòng liên kết mà không phát m2m_changed
+@receiver(pre_delete, sender=Skill)
+def skill_deleting(sender, instance, **kwargs):
+    instance._deleted_job_ids = list(instance.jobs.values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=Skill)
+def skill_deleted(sender, instance, **kwargs):
+    job_ids = getattr(instance, '_deleted_job_ids', [])
+    touch_jobs(job_ids)
+    index_jobs(job_ids)
+    for job_id in job_ids:
+        schedule_job_refresh(job_id)
+
+
+@receiver(post_delete, sender=Job)
+def job_deleted(sender, instance, **kwargs):
+    from .match_index import remove_job_from_indexes
+    remove_job_from_indexes(instance.pk)
+    remove_jobs([instance.pk])
+    remove_job_from_filter_index(instance.pk)
+
+
+
+# Hồ sơ kỹ năng thay đổi (bio, skills, categories) - tính lại bảng điểm
+@receiver(post_save, sender=UserSkillProfile)
+def skill_profile_saved(sender, instance, **kwargs):
+    schedule_profile_refresh(instance.pk)
+
+
+@receiver(m2m_changed, sender=UserSkillProfile.skills.through)
+@receiver(m2m_changed, sender=UserSkillProfile.categories.through)
+def skill_profile_m2m_changed(sender, instance, action, reverse, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear') and not reverse:
+        schedule_profile_refresh(instance.pk)
@@ -0,0 +1,187 @@
+import threading
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db.models import Count, Max, QuerySet
+
+from .models import Job, Skill, SkillAlias, UserSkillProfile
+from .text_utils import fold_text
+
+
+# ============================================================
+# AHO-CORASICK AUTOMATON
+# ============================================================
+
+# Ký tự thuộc 1 từ (chữ, số, "_"); skill chỉ khớp khi đứng riêng thành từ,
+# để "java" không khớp trong "javascript" hay "sql" trong "mysql".
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == '_'
+
+# Automaton Aho-Corasick trên văn bản không dấu (fold_text) cho tên skill và
+# các tên gọi khác. Quét văn bản 1 lần, độ phức tạp tuyến tính theo độ dài văn
+# bản (+ số lần khớp), không phụ thuộc số lượng skill. Các pattern phải là text
+# đã fold (Skill.name_folded, SkillAlias.alias_folded).
+class SkillTagger:
+    def __init__(self, patterns: Iterable[Tuple[str, int]]):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        # node -> [(pattern đã fold, skill id)] kết thúc tại node (gồm cả theo fail link)
+        self.outputs: List[List[Tuple[str, int]]] = [[]]
+        self.pattern_count = 0
+
+        for pattern, skill_id in patterns:
+            self._add_pattern(pattern, skill_id)
+        self._build_fail_links()
+
+    def __len__(self):
+        return self.pattern_count
+
+    def _add_pattern(self, pattern: str, skill_id: int):
+        if not pattern:
+            return
+        node = 0
+        for char in pattern:
+            next_node = self.goto[node].get(char)
+            if next_node is None:
+                next_node = len(self.goto)
+                self.goto[node][char] = next_node
+                self.goto.append({})
+                self.fail.append(0)
+                self.outputs.append([])
+            node = next_node
+        if (pattern, skill_id) not in self.outputs[node]:
+            self.outputs[node].append((pattern, skill_id))
+            self.pattern_count += 1
+
+    # Duyệt BFS: fail của 1 node là node của hậu tố dài nhất cũng là tiền tố
+    # của một pattern; outputs được gộp luôn theo fail link.
+    def _build_fail_links(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                state = self.fail[node]
+                while state and char not in self.goto[state]:
+                    state = self.fail[state]
+                fallback = self.goto[state].get(char, 0)
+                self.fail[child] = fallback if fallback != child else 0
+                self.outputs[child] = self.outputs[child] + self.outputs[self.fail[child]]
+
+    # Các lần khớp (vị trí bắt đầu, vị trí kết thúc, skill id) trong văn bản đã fold.
+    def iter_matches(self, folded: str):
+        goto = self.goto
+        fail = self.fail
+        outputs = self.outputs
+        node = 0
+        for end, char in enumerate(folded, 1):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for pattern, skill_id in outputs[node]:
+                start = end - len(pattern)
+                if _is_word_char(pattern[0]) and start > 0 and _is_word_char(folded[start - 1]):
+                    continue
+                if _is_word_char(pattern[-1]) and end < len(folded) and _is_word_char(folded[end]):
+                    continue
+                yield start, end, skill_id
+
+    # Id các skill có trong văn bản, theo thứ tự xuất hiện đầu tiên.
+    def tag(self, text: str) -> List[int]:
+        found = {}
+        for _, _, skill_id in self.iter_matches(fold_text(text)):
+            found.setdefault(skill_id, None)
+        return list(found)
+
+
+# ============================================================
+# PROCESS CACHE
+# ============================================================
+
+# Trạng thái bảng Skill + SkillAlias: (số dòng, updated_at lớn nhất) mỗi bảng.
+# Thêm, sửa, xóa skill hay alias đều làm thay đổi trạng thái này.
+def get_skill_state() -> Tuple:
+    skills = Skill.objects.aggregate(count=Count('id'), last_updated=Max('updated_at'))
+    aliases = SkillAlias.objects.aggregate(count=Count('id'), last_updated=Max('updated_at'))
+    return skills['count'], skills['last_updated'], aliases['count'], aliases['last_updated']
+
+# Các cặp (tên không dấu, skill id) để build automaton: tên skill + mọi alias.
+def load_skill_patterns() -> List[Tuple[str, int]]:
+    patterns = list(Skill.objects.values_list('name_folded', 'id'))
+    patterns.extend(SkillAlias.objects.values_list('alias_folded', 'skill_id'))
+    return patterns
+
+_tagger: Optional[SkillTagger] = None
+_tagger_state = None
+_tagger_lock = threading.Lock()
+
+# Automaton của process; chỉ build lại khi bảng Skill / SkillAlias thay đổi.
+def get_skill_tagger() -> SkillTagger:
+    global _tagger, _tagger_state
+    state = get_skill_state()
+    with _tagger_lock:
+        if _tagger is None or state != _tagger_state:
+            _tagger = SkillTagger(load_skill_patterns())
+            _tagger_state = state
+        return _tagger
+
+# Id các skill xuất hiện trong (các) văn bản.
+def tag_text(*texts: str) -> List[int]:
+    return get_skill_tagger().tag('\n'.join(text for text in texts if text))
+
+# Gợi ý skill từ văn bản tin tuyển dụng (tiêu đề, mô tả, yêu cầu, trách nhiệm).
+def suggest_skills(*texts: str, exclude: Iterable[int] = ()) -> List[Skill]:
+    excluded = {int(skill_id) for skill_id in exclude}
+    skill_ids = [skill_id for skill_id in tag_text(*texts) if skill_id not in excluded]
+    skills = Skill.objects.in_bulk(skill_ids)
+    return [skills[skill_id] for skill_id in skill_ids if skill_id in skills]
+
+
+# ============================================================
+# BULK TAGGING
+# ============================================================
+
+# Các skill tìm thấy trong văn bản của từng job nhưng chưa có trong required_skills.
+# Trả về {job id: [skill id mới]}.
+def find_job_skills(jobs: QuerySet, batch_size: int = 2000) -> Dict[int, List[int]]:
+    tagger = get_skill_tagger()
+    job_ids = list(jobs.values_list('id', flat=True))
+    found = {}
+    for start in range(0, len(job_ids), batch_size):
+        batch_ids = job_ids[start:start + batch_size]
+        current = {}
+        skill_rows = Job.required_skills.through.objects.filter(job_id__in=batch_ids)
+        for job_id, skill_id in skill_rows.values_list('job_id', 'skill_id'):
+            current.setdefault(job_id, set()).add(skill_id)
+
+        rows = Job.objects.filter(id__in=batch_ids).values_list(
+            'id', 'title', 'description', 'requirements', 'responsibilities'
+        )
+        for job_id, *texts in rows:
+            known = current.get(job_id, set())
+            new_ids = [skill_id for skill_id in tagger.tag('\n'.join(filter(None, texts)))
+                       if skill_id not in known]
+            if new_ids:
+                found[job_id] = new_ids
+    return found
+
+# Các skill tìm thấy trong bio của từng hồ sơ nhưng chưa có trong profile.skills.
+def find_profile_skills(profiles: QuerySet) -> Dict[int, List[int]]:
+    tagger = get_skill_tagger()
+    found = {}
+    for profile in profiles.exclude(bio__isnull=True).exclude(bio='').prefetch_related('skills'):
+        known = {skill.id for skill in profile.skills.all()}
+        new_ids = [skill_id for skill_id in tagger.tag(profile.bio) if skill_id not in known]
+        if new_ids:
+            found[profile.id] = new_ids
+    return found
+
+# Thêm các skill tìm được vào job / hồ sơ. Dùng .add() để m2m_changed cập nhật
+# FTS, updated_at và bảng điểm matching (gom lại 1 lần khi transaction commit).
+def apply_job_skills(found: Dict[int, List[int]]):
+    for job in Job.objects.filter(id__in=found):
+        job.required_skills.add(*found[job.id])
+
+def apply_profile_skills(found: Dict[int, List[int]]):
+    for profile in UserSkillProfile.objects.filter(id__in=found):
+        profile.skills.add(*found[profile.id])
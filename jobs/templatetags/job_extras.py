@@ -45,3 +45,14 @@ def percentage_color(value):
             return '#ef4444'  # Red
     except (ValueError, TypeError):
         return '#64748b'  # Gray
+
+
+@register.filter
+def facet_count(counts, key):
+    """
+    Get the number of jobs of a facet value, formatted with thousands separators.
+    Usage: {{ facet_counts.category|facet_count:category.id }}
+    """
+    if counts is None:
+        return 0
+    return f'{counts.get(str(key), 0):,}'
@@ -1,3 +1,1784 @@
-from django.test import TestCase
+import asyncio
+import base64
+import io
+import json
+import mmap
+import os
+import re
+import socket
+import tempfile
+import threading
+import time
+import unicodedata
+import zipfile
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import redirect_stdout
+from datetime import timedelta
+from unittest import mock, skipUnless
+from urllib.parse import urlencode
 
-# Create your tests here.
+import numpy as np
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models import F
+from django.http import QueryDict
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import UserProfile
+
+from . import (
+    cv_extraction, keywords, lsa, match_artifact, match_index, match_store, nlp_processor, sidecar, sidecar_server,
+)
+from .facets import FACET_FIELDS, count_facets
+from .filter_index import INDEX_SORTS, JobFilterIndex, get_job_filter_index
+from .filters import apply_job_filters
+from .match_index import SKLEARN_AVAILABLE, JobBM25Index, JobHashingIndex, JobInvertedIndex, JobTextIndex
+from .matching_service import JobMatcher
+from .models import (
+    Application, Company, District, Job, JobCategory, MatchRefreshTask, Province, Skill, SkillAlias, UserJobMatch,
+    UserSkillProfile, Ward,
+)
+from .nlp_processor import import_optional
+from .pagination import KEYSET_SORTS, decode_cursor, encode_cursor, order_for_keyset, paginate_keyset
+from .search import build_fts_query, search_jobs
+from .skill_tagger import SkillTagger, tag_text
+from .text_utils import fold_text
+from .token_store import (
+    document_hash, load_job_documents, load_job_tokens, refresh_job_tokens, refresh_profile_tokens,
+)
+from .vi_segmenter import VietnameseSegmenter, get_vietnamese_segmenter, reset_vietnamese_segmenter
+
+
+# ============================================================
+# FIXTURES
+# ============================================================
+
+def make_company(username='employer'):
+    user = User.objects.create_user(username=username, password='pw')
+    return Company.objects.create(user=user, name=f'Công ty {username}')
+
+def make_job(company, title, description='', skills=(), **fields):
+    fields.setdefault('job_type', 'Full Time')
+    job = Job.objects.create(company=company, title=title, description=description or title, **fields)
+    if skills:
+        job.required_skills.set(skills)
+    return job
+
+def task_keys():
+    return set(MatchRefreshTask.objects.values_list('kind', 'object_id'))
+
+
+# ============================================================
+# MATCH STORE
+# ============================================================
+
+# Không dùng artifact / sidecar của máy đang chạy test, không chạy thread nền:
+# hàng đợi được xử lý trực tiếp bằng process_match_refreshes(), index TF-IDF
+# không được fit lại ở nền.
+@override_settings(MATCH_SIDECAR_SOCKET=None)
+class MatchStoreTests(TestCase):
+    def setUp(self):
+        for patcher in (
+            mock.patch.object(match_store, 'MATCH_REFRESH_WORKERS', 0),
+            mock.patch('jobs.match_artifact.current_artifact_version', return_value=None),
+            mock.patch('jobs.match_index._schedule_text_index_maintenance'),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        # Chạy các callback on_commit của phần tạo dữ liệu rồi xóa hàng đợi
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category = JobCategory.objects.create(name='Kế toán')
+            other_category = JobCategory.objects.create(name='Xây dựng')
+            self.skill = Skill.objects.create(name='Kế toán thuế')
+            other_skill = Skill.objects.create(name='AutoCAD')
+            company = make_company()
+            self.job = make_job(company, 'Kế toán thuế', 'Kê khai thuế, kế toán tổng hợp',
+                                skills=[self.skill], category=self.category)
+            self.other_job = make_job(company, 'Kỹ sư xây dựng', 'Thiết kế bản vẽ AutoCAD',
+                                      skills=[other_skill], category=other_category)
+            user = User.objects.create_user(username='candidate', password='pw')
+            self.profile = UserSkillProfile.objects.create(user=user, bio='Kế toán thuế 3 năm')
+            self.profile.skills.set([self.skill])
+        match_store.process_match_refreshes()
+
+    def pending_callbacks(self, callbacks):
+        return [callback for callback in callbacks if isinstance(callback, match_store._PendingRefresh)]
+
+    # Nhiều lần lưu trong 1 transaction chỉ đăng ký 1 callback on_commit
+    def test_saves_in_one_transaction_enqueue_once(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.job.save()
+            self.job.save()
+            self.profile.save()
+            self.profile.skills.add(Skill.objects.create(name='Excel'))
+
+        self.assertEqual(len(self.pending_callbacks(callbacks)), 1)
+        self.assertEqual(task_keys(), {('job', self.job.pk), ('profile', self.profile.pk)})
+
+    # Callback của savepoint bị rollback bị bỏ: lần lưu sau tạo callback mới
+    def test_rollback_discards_pending_refresh(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    self.job.save()
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+            self.other_job.save()
+
+        self.assertEqual(len(self.pending_callbacks(callbacks)), 1)
+        self.assertEqual(task_keys(), {('job', self.other_job.pk)})
+
+    # Lưu không tính điểm ngay, chỉ thêm vào hàng đợi
+    def test_save_does_not_refresh_inline(self):
+        with mock.patch.object(match_store, 'refresh_job_matches') as refresh:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.job.save()
+        refresh.assert_not_called()
+        self.assertEqual(task_keys(), {('job', self.job.pk)})
+
+    def test_process_profile_refresh(self):
+        match_store.enqueue_match_refresh(profile_ids=[self.profile.pk])
+        self.assertEqual(match_store.process_match_refreshes(), (0, 1))
+
+        self.assertEqual(task_keys(), set())
+        self.assertEqual(set(UserJobMatch.objects.values_list('job_id', flat=True)), {self.job.pk})
+        self.profile.refresh_from_db()
+        self.assertIsNotNone(self.profile.matches_refreshed_at)
+
+    # Job bị ẩn: dòng điểm của nó bị xóa khi xử lý hàng đợi
+    def test_process_job_refresh_drops_inactive_job(self):
+        match_store.enqueue_match_refresh(profile_ids=[self.profile.pk])
+        match_store.process_match_refreshes()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.job.is_active = False
+            self.job.save()
+        self.assertEqual(match_store.process_match_refreshes(), (1, 0))
+        self.assertFalse(UserJobMatch.objects.filter(job=self.job).exists())
+
+    # Trùng task thì chỉ giữ 1 dòng; tính lỗi thì task được trả về hàng đợi
+    def test_failed_refresh_is_requeued(self):
+        match_store.enqueue_match_refresh(profile_ids=[self.profile.pk, self.profile.pk])
+        match_store.enqueue_match_refresh(profile_ids=[self.profile.pk])
+        self.assertEqual(MatchRefreshTask.objects.count(), 1)
+
+        with mock.patch.object(match_store, 'refresh_profile_matches', side_effect=RuntimeError('boom')):
+            with redirect_stdout(io.StringIO()):
+                self.assertEqual(match_store.process_match_refreshes(), (0, 0))
+        self.assertEqual(task_keys(), {('profile', self.profile.pk)})
+
+    # Tokens của job / hồ sơ được tính ở hàng đợi (khi ghi), không phải khi đọc
+    def test_queue_tokenizes_job_and_profile(self):
+        self.job.refresh_from_db()
+        self.profile.refresh_from_db()
+        self.assertIn('thuế', self.job.tokens)
+        self.assertEqual(self.job.tokens_hash, document_hash(load_job_documents(Job.objects.filter(pk=self.job.pk))[1][0]))
+        self.assertIn('thuế', self.profile.tokens)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profile.bio = 'Thiết kế AutoCAD'
+            self.profile.save()
+        self.profile.refresh_from_db()
+        self.assertNotIn('autocad', self.profile.tokens)
+        match_store.process_match_refreshes()
+        self.profile.refresh_from_db()
+        self.assertIn('autocad', self.profile.tokens)
+
+    def test_request_paths_do_not_tokenize(self):
+        from .matching_service import get_job_matching_info
+
+        self.job.refresh_from_db()
+        with mock.patch('jobs.token_store.tokenize_document', side_effect=AssertionError('tokenized')):
+            Job.objects.filter(pk=self.job.pk).update(description='Nội dung mới chưa tách từ')
+            self.assertEqual(load_job_tokens(Job.objects.filter(pk=self.job.pk))[1], [self.job.tokens])
+            info = get_job_matching_info(self.job, self.profile.user)
+            self.assertTrue(info['has_profile'])
+
+            self.other_job.is_active = False
+            self.other_job.save()
+            self.assertTrue(get_job_matching_info(self.other_job, self.profile.user)['has_profile'])
+
+    # Trang đọc điểm không tính điểm trong request, chỉ thêm hồ sơ vào hàng đợi
+    def test_ensure_profile_matches_enqueues(self):
+        with mock.patch.object(match_store, 'refresh_profile_matches') as refresh:
+            match_store.ensure_profile_matches(self.profile)
+        refresh.assert_not_called()
+        self.assertEqual(task_keys(), {('profile', self.profile.pk)})
+
+
+# ============================================================
+# TOKEN STORE
+# ============================================================
+
+class TokenStoreTests(TestCase):
+    def setUp(self):
+        self.job = make_job(make_company(), 'Kế toán tổng hợp', 'Lập báo cáo thuế hằng tháng')
+        self.assertEqual(refresh_job_tokens([self.job.pk]), [self.job.pk])
+        self.job.refresh_from_db()
+
+    def test_unchanged_description_is_not_retokenized(self):
+        with mock.patch('jobs.token_store.tokenize_document') as tokenize:
+            self.job.salary_max = 20_000_000
+            self.job.save()
+            self.assertEqual(refresh_job_tokens([self.job.pk]), [])
+        tokenize.assert_not_called()
+
+        updated_at = self.job.updated_at
+        self.job.description = 'Kiểm toán nội bộ'
+        self.job.save()
+        self.assertEqual(refresh_job_tokens([self.job.pk]), [self.job.pk])
+        self.job.refresh_from_db()
+        self.assertIn('nội', self.job.tokens)
+        self.assertNotIn('thuế', self.job.tokens)
+        # Tokens mới: updated_at đổi để index trong bộ nhớ đọc lại job
+        self.assertGreater(self.job.updated_at, updated_at)
+
+    # Đổi phiên bản bộ tách từ: mọi tokens đã lưu phải tách lại
+    def test_tokenizer_version_bump_invalidates_tokens(self):
+        with mock.patch('jobs.token_store.TOKENIZER_VERSION', 'test-bump'):
+            self.assertEqual(refresh_job_tokens([self.job.pk]), [self.job.pk])
+            self.assertEqual(refresh_job_tokens([self.job.pk]), [])
+        self.assertEqual(refresh_job_tokens([self.job.pk]), [self.job.pk])
+
+
+# ============================================================
+# KEYSET PAGINATION
+# ============================================================
+
+class CursorTests(SimpleTestCase):
+    def test_round_trip(self):
+        created_at = timezone.now()
+        values = [('newest', created_at), ('salary_high', 15_000_000), ('city', 'Hà Nội'),
+                  ('relevance', -1.25), ('salary_low', None), ('city', None)]
+        for sort_by, value in values:
+            self.assertEqual(decode_cursor(encode_cursor(value, 42), sort_by), (value, 42))
+
+    def test_invalid_cursor(self):
+        for cursor in ('', 'not-base64!', encode_cursor('x', 1)[:-3], 'WzFd'):
+            self.assertIsNone(decode_cursor(cursor, 'city'))
+
+    # Cursor bị sửa tay với giá trị sai kiểu của field: bỏ qua (về trang 1)
+    def test_tampered_cursor_value(self):
+        tampered = [
+            ('newest', [1, 2]), ('newest', 'abc'), ('newest', {'dt': 5}), ('newest', None),
+            ('salary_high', 'abc'), ('salary_high', True), ('salary_low', 1.5),
+            ('city', 5), ('city', {'dt': '2024-01-01T00:00:00'}),
+            ('relevance', 'abc'), ('relevance', None),
+        ]
+        for sort_by, value in tampered:
+            cursor = base64.urlsafe_b64encode(json.dumps([value, 5]).encode()).decode().rstrip('=')
+            self.assertIsNone(decode_cursor(cursor, sort_by), (sort_by, value))
+        self.assertIsNone(decode_cursor(encode_cursor(10, '5'), 'salary_high'))
+        self.assertIsNone(decode_cursor(encode_cursor(10, True), 'salary_high'))
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        company = make_company()
+        hanoi = Province.objects.create(code='01', name='Hà Nội', type='thanh-pho',
+                                        name_with_type='Thành phố Hà Nội')
+        danang = Province.objects.create(code='48', name='Đà Nẵng', type='thanh-pho',
+                                         name_with_type='Thành phố Đà Nẵng')
+        salaries = [None, 20_000_000, 15_000_000, 20_000_000, None, 10_000_000, 15_000_000, 30_000_000, None]
+        provinces = [hanoi, None, danang, hanoi, danang, None, hanoi, danang, None]
+        for index, (salary, province) in enumerate(zip(salaries, provinces)):
+            make_job(company, f'Việc làm {index}', salary_min=salary, salary_max=salary, province=province)
+        # Nhiều job cùng thời điểm đăng: thứ tự phân định bằng id
+        Job.objects.filter(title__in=['Việc làm 1', 'Việc làm 2', 'Việc làm 3']).update(
+            created_at=timezone.now() - timedelta(days=1),
+        )
+
+    # Nối các trang (theo cursor) lại phải đúng bằng thứ tự sắp xếp đầy đủ:
+    # không trùng, không sót, NULL nằm cuối.
+    def assert_pages_match_full_order(self, sort_by, per_page):
+        field, descending = KEYSET_SORTS[sort_by]
+        order = F(field).desc(nulls_last=True) if descending else F(field).asc(nulls_last=True)
+        expected = list(Job.objects.order_by(order, '-id' if descending else 'id').values_list('id', flat=True))
+
+        seen, cursor, pages = [], None, 0
+        while True:
+            page, cursor = paginate_keyset(Job.objects.all(), sort_by, cursor, per_page)
+            self.assertLessEqual(len(page), per_page)
+            seen += [job.id for job in page]
+            pages += 1
+            if cursor is None:
+                break
+        self.assertEqual(seen, expected)
+        self.assertEqual(pages, max(-(-len(expected) // per_page), 1))
+
+    def test_pages_cover_every_sort(self):
+        for sort_by in ('newest', 'oldest', 'salary_high', 'salary_low', 'city'):
+            for per_page in (1, 2, 4, 20):
+                with self.subTest(sort_by=sort_by, per_page=per_page):
+                    self.assert_pages_match_full_order(sort_by, per_page)
+
+    def test_invalid_cursor_starts_from_first_page(self):
+        first_page, _ = paginate_keyset(Job.objects.all(), 'newest', None, 3)
+        page, _ = paginate_keyset(Job.objects.all(), 'newest', 'not-a-cursor', 3)
+        self.assertEqual(page, first_page)
+
+    def test_tampered_cursor_starts_from_first_page(self):
+        for sort_by, cursor in (('newest', 'W1sxLCAyXSwgNV0'), ('salary_high', 'WyJhYmMiLCA1XQ'),
+                                ('newest', 'WyJhYmMiLCA1XQ'), ('city', 'WzEsIDVd')):
+            with self.subTest(sort_by=sort_by, cursor=cursor):
+                first_page, _ = paginate_keyset(Job.objects.all(), sort_by, None, 3)
+                page, _ = paginate_keyset(Job.objects.all(), sort_by, cursor, 3)
+                self.assertEqual(page, first_page)
+
+    def test_last_page_has_no_cursor(self):
+        page, cursor = paginate_keyset(Job.objects.all(), 'salary_high', None, Job.objects.count())
+        self.assertEqual(len(page), Job.objects.count())
+        self.assertIsNone(cursor)
+
+
+# ============================================================
+# FULL-TEXT SEARCH
+# ============================================================
+
+class FtsQueryTests(SimpleTestCase):
+    # Ký tự cú pháp FTS5 (nháy kép, *, -, NEAR, OR/AND/NOT) chỉ còn là từ thường
+    def test_build_fts_query_escapes_syntax(self):
+        self.assertEqual(build_fts_query('c++ "dev" -java NEAR(a b) *x'),
+                         '"c" "dev" "java" "near" "a" "b" "x"*')
+        self.assertEqual(build_fts_query('a OR b AND NOT c'), '"a" "or" "b" "and" "not" "c"*')
+        self.assertEqual(build_fts_query('Kế-toán'), '"ke" "toan"*')
+        for text in ('', '"', '***', '- -'):
+            self.assertEqual(build_fts_query(text), '')
+
+
+@skipUnless(connection.vendor == 'sqlite', 'FTS5 search requires SQLite')
+class FullTextSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        company = make_company()
+        cls.python = Skill.objects.create(name='Python')
+        cls.title_job = make_job(company, 'Kế toán tổng hợp', description='Lập báo cáo thuế')
+        cls.description_job = make_job(company, 'Nhân viên văn phòng',
+                                       description='Hỗ trợ phòng kế toán nhập chứng từ')
+        cls.other_job = make_job(company, 'Lập trình viên', description='Phát triển web')
+
+    def search(self, text):
+        return list(search_jobs(Job.objects.all(), text).order_by('search_rank', 'id')
+                    .values_list('id', flat=True))
+
+    def test_title_hit_ranks_first(self):
+        self.assertEqual(self.search('ke toan'), [self.title_job.id, self.description_job.id])
+        self.assertEqual(self.search('kế toán'), self.search('ke toan'))
+
+    def test_title_edit_updates_hits_and_rank(self):
+        self.title_job.title = 'Nhân viên hành chính'
+        self.title_job.save()
+        self.assertEqual(self.search('ke toan'), [self.description_job.id])
+
+        self.other_job.title = 'Kế toán trưởng'
+        self.other_job.save()
+        self.assertEqual(self.search('ke toan'), [self.other_job.id, self.description_job.id])
+
+    def test_skill_edit_updates_hits(self):
+        self.assertEqual(self.search('python'), [])
+        self.other_job.required_skills.add(self.python)
+        self.assertEqual(self.search('python'), [self.other_job.id])
+
+        self.python.name = 'Python 3'
+        self.python.save()
+        self.assertEqual(self.search('python 3'), [self.other_job.id])
+
+        self.other_job.required_skills.remove(self.python)
+        self.assertEqual(self.search('python'), [])
+
+    def test_deleted_job_is_not_found(self):
+        self.title_job.delete()
+        self.assertEqual(self.search('ke toan'), [self.description_job.id])
+
+    # Bảng Job bị đặt alias trong subquery: search_rank vẫn phải tính theo dòng bên trong
+    def test_search_inside_subquery(self):
+        worst = search_jobs(Job.objects.all(), 'ke toan').order_by('-search_rank').values('id')[:1]
+        self.assertEqual(list(Job.objects.filter(id__in=worst)), [self.description_job])
+
+        ranked = search_jobs(Job.objects.order_by(), 'ke toan').values_list('id', 'search_rank')
+        union = ranked.filter(id=self.title_job.id).union(ranked.filter(id=self.description_job.id))
+        self.assertEqual(dict(union), dict(ranked))
+
+
+# Không có FTS5: tìm không dấu trên các cột đã chuẩn hóa
+@mock.patch('jobs.views.fts_available', return_value=False)
+class SearchFallbackTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        company = make_company()
+        accounting = Skill.objects.create(name='Kế toán thuế')
+        cls.title_job = make_job(company, 'Nhân viên Kế toán', description='Làm sổ sách')
+        cls.description_job = make_job(company, 'Trợ lý', description='Hỗ trợ phòng KẾ TOÁN')
+        cls.requirements_job = make_job(company, 'Thủ quỹ', description='Quản lý quỹ',
+                                        requirements='Tốt nghiệp ngành kế toán')
+        cls.skill_job = make_job(company, 'Chuyên viên', description='Thuế', skills=[accounting])
+        make_job(company, 'Lập trình viên', description='Phát triển web')
+
+    def search_ids(self, text):
+        response = self.client.get(reverse('jobs:list'), {'q': text})
+        self.assertEqual(response.status_code, 200)
+        return {job.id for job in response.context['jobs']}
+
+    def test_unaccented_query_matches_title_description_requirements_and_skills(self, _):
+        expected = {self.title_job.id, self.description_job.id, self.requirements_job.id, self.skill_job.id}
+        self.assertEqual(self.search_ids('ke toan'), expected)
+        self.assertEqual(self.search_ids('Kế Toán'), expected)
+
+    def test_match_inside_title(self, _):
+        self.assertEqual(self.search_ids('vien ke'), {self.title_job.id})
+        self.assertEqual(self.search_ids('lap trinh'), {Job.objects.get(title='Lập trình viên').id})
+
+    def test_requirements_folded_follows_edits(self, _):
+        self.requirements_job.requirements = 'Có kinh nghiệm bán hàng'
+        self.requirements_job.save()
+        self.assertNotIn(self.requirements_job.id, self.search_ids('ke toan'))
+
+
+class LocationLookupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        hanoi = Province.objects.create(code='01', name='Hà Nội', type='thanh-pho',
+                                        name_with_type='Thành phố Hà Nội')
+        Province.objects.create(code='48', name='Đà Nẵng', type='thanh-pho', name_with_type='Thành phố Đà Nẵng')
+        Province.objects.create(code='92', name='Cần Thơ', type='thanh-pho', name_with_type='Thành phố Cần Thơ')
+        Province.objects.create(code='02', name='Hà Giang', type='tinh', name_with_type='Tỉnh Hà Giang')
+        for code, name in (('001', 'Ba Đình'), ('002', 'Hoàn Kiếm'), ('005', 'Cầu Giấy')):
+            District.objects.create(code=code, name=name, type='quan', name_with_type=f'Quận {name}',
+                                    parent_code=hanoi)
+        ba_dinh = District.objects.get(code='001')
+        for code, name in (('00001', 'Phúc Xá'), ('00004', 'Trúc Bạch'), ('00006', 'Vĩnh Phúc')):
+            Ward.objects.create(code=code, name=name, type='phuong', name_with_type=f'Phường {name}',
+                                parent_code=ba_dinh)
+
+    def test_districts_prefix_without_diacritics(self):
+        response = self.client.get(reverse('jobs:api_districts', args=['01']), {'q': 'ba d'})
+        self.assertEqual([d['name'] for d in response.json()['districts']], ['Ba Đình'])
+        response = self.client.get(reverse('jobs:api_districts', args=['01']), {'q': 'CẦU'})
+        self.assertEqual([d['name'] for d in response.json()['districts']], ['Cầu Giấy'])
+
+    def test_wards_prefix_without_diacritics(self):
+        response = self.client.get(reverse('jobs:api_wards', args=['001']), {'q': 'phuc'})
+        self.assertEqual([w['name'] for w in response.json()['wards']], ['Phúc Xá'])
+        response = self.client.get(reverse('jobs:api_wards', args=['001']))
+        self.assertEqual([w['name'] for w in response.json()['wards']], ['Phúc Xá', 'Trúc Bạch', 'Vĩnh Phúc'])
+
+    # Tên có chữ Đ xếp cùng chữ D thay vì cuối danh sách
+    def test_provinces_sorted_by_folded_name(self):
+        response = self.client.get(reverse('jobs:list'))
+        self.assertEqual([province.name for province in response.context['provinces']],
+                         ['Cần Thơ', 'Đà Nẵng', 'Hà Giang', 'Hà Nội'])
+
+
+# ============================================================
+# BITMAP FILTER INDEX
+# ============================================================
+
+def query_dict(**params):
+    return QueryDict(urlencode(params, doseq=True))
+
+
+class JobFilterIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        company = make_company()
+        cls.categories = [JobCategory.objects.create(name=name) for name in ('Kế toán', 'IT', 'Bán hàng')]
+        cls.provinces = [
+            Province.objects.create(code='01', name='Hà Nội', type='thanh-pho', name_with_type='Thành phố Hà Nội'),
+            Province.objects.create(code='48', name='Đà Nẵng', type='thanh-pho', name_with_type='Thành phố Đà Nẵng'),
+            Province.objects.create(code='79', name='Hồ Chí Minh', type='thanh-pho',
+                                    name_with_type='Thành phố Hồ Chí Minh'),
+        ]
+        job_types = [choice for choice, _ in Job.JOB_TYPE_CHOICES]
+        salaries = [None, 10_000_000, 15_000_000, 20_000_000, 25_000_000]
+        now = timezone.now()
+        for index in range(40):
+            salary = salaries[index % 5]
+            job = make_job(
+                company, f'Việc làm {index}',
+                category=(cls.categories + [None])[index % 4],
+                province=(cls.provinces + [None])[(index // 2) % 4],
+                experience_level=['1 năm', '2 năm', '', None, '3 năm'][index % 5],
+                job_type=job_types[index % 4],
+                salary_min=salary,
+                salary_max=salary + 5_000_000 if salary and index % 3 else salary,
+                is_active=index % 7 != 3,
+            )
+            # Một số job cùng thời điểm đăng: thứ tự phân định bằng id
+            Job.objects.filter(pk=job.pk).update(created_at=now - timedelta(hours=index // 3))
+
+    def setUp(self):
+        category_ids = [str(category.id) for category in self.categories]
+        self.params = [
+            query_dict(),
+            query_dict(provinces=['01']),
+            query_dict(provinces=['01', '48']),
+            query_dict(provinces=['01'], province_filter='48'),
+            query_dict(province_filter='79', job_type=['Remote']),
+            query_dict(category=category_ids[:1], experience=['1 năm']),
+            query_dict(category=category_ids[:2], job_type=['Full Time', 'Remote']),
+            query_dict(category=['999']),
+            query_dict(salary_min='15000000'),
+            query_dict(salary_max='20000000'),
+            query_dict(salary_min='10000000', salary_max='25000000', provinces=['79', '01']),
+            query_dict(salary_min='100000000'),
+            query_dict(experience=['2 năm', '3 năm'], job_type=['Part Time', 'Contract'], category=category_ids),
+        ]
+
+    # Index mới, nhỏ (8 slot) để build phải tăng kích thước bitmap nhiều lần
+    def build_index(self):
+        with mock.patch('jobs.filter_index.INITIAL_CAPACITY', 8):
+            index = JobFilterIndex()
+        index.sync()
+        return index
+
+    def active_jobs(self):
+        return Job.objects.filter(is_active=True)
+
+    def slot_is_set(self, bitmap, slot):
+        return bool(bitmap[slot >> 3] & (1 << (slot & 7)))
+
+    def test_build_sets_one_bit_per_facet_value(self):
+        index = self.build_index()
+        self.assertEqual(len(index), self.active_jobs().count())
+        self.assertGreaterEqual(index.capacity, len(index))
+
+        for job in self.active_jobs():
+            slot = index.slot_by_id[job.id]
+            self.assertEqual(index.job_ids[slot], job.id)
+            self.assertTrue(self.slot_is_set(index.present, slot))
+            for facet, field in FACET_FIELDS.items():
+                value = getattr(job, field)
+                for bitmap_value, bitmap in index.bitmaps[facet].items():
+                    self.assertEqual(self.slot_is_set(bitmap, slot), bitmap_value == str(value), (facet, value))
+
+    def test_filters_match_sql(self):
+        index = self.build_index()
+        for params in self.params:
+            with self.subTest(params=params.urlencode()):
+                expected = set(apply_job_filters(self.active_jobs(), params).values_list('id', flat=True))
+                self.assertEqual(set(index.ranked_ids(params, 'newest')), expected)
+                self.assertEqual(index.count(params), len(expected))
+
+    # Biên lương được tính cả 2 đầu (>=, <=) như SQL, lương NULL không thỏa
+    def test_salary_bounds_are_inclusive(self):
+        index = self.build_index()
+        exact = set(Job.objects.filter(is_active=True, salary_min=15_000_000).values_list('id', flat=True))
+        at_least = set(index.ranked_ids(query_dict(salary_min='15000000'), 'newest'))
+        above = set(index.ranked_ids(query_dict(salary_min='15000001'), 'newest'))
+        self.assertTrue(exact)
+        self.assertEqual(at_least - above, exact)
+        self.assertFalse(set(index.ranked_ids(query_dict(salary_max='0'), 'newest')))
+
+    def test_facet_counts_match_sql(self):
+        index = self.build_index()
+        for params in self.params:
+            with self.subTest(params=params.urlencode()):
+                self.assertEqual(index.facet_counts(params), count_facets(self.active_jobs(), params))
+
+    def test_ranked_ids_match_keyset_order(self):
+        index = self.build_index()
+        for sort_by in INDEX_SORTS:
+            for params in self.params[:3] + self.params[8:11]:
+                with self.subTest(sort_by=sort_by, params=params.urlencode()):
+                    jobs = order_for_keyset(apply_job_filters(self.active_jobs(), params), sort_by)
+                    self.assertEqual(index.ranked_ids(params, sort_by), list(jobs.values_list('id', flat=True)))
+
+    # Lưu job (ẩn / hiện lại) cập nhật index của process sau khi commit
+    def test_save_deactivating_job_updates_index(self):
+        index = get_job_filter_index()
+        job = self.active_jobs().filter(province__isnull=False, category__isnull=False).first()
+        with self.captureOnCommitCallbacks(execute=True):
+            job.is_active = False
+            job.save()
+        self.assertNotIn(job.id, index)
+        params = query_dict(provinces=[job.province_id])
+        self.assertNotIn(job.id, index.ranked_ids(params, 'newest'))
+        self.assertEqual(index.facet_counts(params), count_facets(self.active_jobs(), params))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            job.is_active = True
+            job.salary_min = 99_000_000
+            job.save()
+        self.assertIn(job.id, index)
+        self.assertEqual(index.ranked_ids(query_dict(salary_min='99000000'), 'newest'), [job.id])
+
+    def test_delete_drops_job_from_every_bitmap(self):
+        index = get_job_filter_index()
+        job = self.active_jobs().filter(province__isnull=False, category__isnull=False).first()
+        slot = index.slot_by_id[job.id]
+        job_id = job.id
+        job.delete()
+
+        self.assertNotIn(job_id, index)
+        self.assertFalse(self.slot_is_set(index.present, slot))
+        for values in index.bitmaps.values():
+            for bitmap in values.values():
+                self.assertFalse(self.slot_is_set(bitmap, slot))
+        self.assertEqual(index.facet_counts(query_dict()), count_facets(self.active_jobs(), query_dict()))
+
+        # Slot trống được dùng lại cho job tiếp theo
+        new_job = make_job(Company.objects.first(), 'Việc làm mới')
+        index.refresh_jobs([new_job.id])
+        self.assertEqual(index.slot_by_id[new_job.id], slot)
+
+    def test_memory_usage(self):
+        index = self.build_index()
+        usage = index.memory_usage()
+        self.assertEqual(usage['jobs'], len(index))
+        self.assertEqual(usage['capacity'], index.capacity)
+        self.assertEqual(usage['facet_values'], sum(len(values) for values in index.bitmaps.values()))
+        self.assertEqual(usage['bitmaps'], (usage['facet_values'] + 1) * (index.capacity // 8))
+        self.assertEqual(usage['salary_sorted'], 0)
+        self.assertEqual(usage['total'], sum(
+            usage[part] for part in ('bitmaps', 'arrays', 'salary_sorted', 'dicts')
+        ))
+
+        index.count(query_dict(salary_min='1'))
+        self.assertGreater(index.memory_usage()['salary_sorted'], 0)
+
+
+# ============================================================
+# CATALOG INDEX SYNC
+# ============================================================
+
+# Index đồng bộ dần (CatalogIndex.sync) sau khi sửa / thêm / ẩn / xóa job phải
+# giống index build lại từ đầu trên cùng dữ liệu.
+class CatalogIndexSyncTests(TestCase):
+    QUERY = 'kế toán thuế excel báo cáo tài chính'
+
+    def setUp(self):
+        self.categories = [JobCategory.objects.create(name=name) for name in ('Kế toán', 'Kinh doanh', 'IT')]
+        self.skills = [Skill.objects.create(name=name) for name in ('Excel', 'Kế toán thuế', 'Python', 'Bán hàng')]
+        self.company = make_company()
+        texts = [
+            ('Kế toán tổng hợp', 'Lập báo cáo tài chính, kê khai thuế', [0, 1], 0),
+            ('Kế toán thuế', 'Kê khai thuế hằng tháng, quyết toán thuế năm', [1], 0),
+            ('Nhân viên kinh doanh', 'Tìm kiếm khách hàng, bán hàng qua điện thoại', [3], 1),
+            ('Lập trình viên Python', 'Phát triển backend Python, viết báo cáo kỹ thuật', [0, 2], 2),
+            ('Trưởng nhóm bán hàng', 'Quản lý đội bán hàng, báo cáo doanh số bằng Excel', [0, 3], 1),
+            ('Kiểm toán viên', 'Kiểm tra báo cáo tài chính của khách hàng', [0], 0),
+        ]
+        self.jobs = [
+            make_job(self.company, title, description, skills=[self.skills[i] for i in skills],
+                     category=self.categories[category])
+            for title, description, skills, category in texts
+        ]
+        self.tokenize_catalog()
+
+    # Tách từ như hàng đợi tính lại điểm làm sau khi job thay đổi
+    def tokenize_catalog(self):
+        refresh_job_tokens(Job.objects.values_list('id', flat=True))
+        for job in self.jobs:
+            if Job.objects.filter(pk=job.pk).exists():
+                job.refresh_from_db()
+
+    # Sửa mô tả, đổi skill, ẩn 1 job, xóa 1 job và đăng 1 job mới. Job bị xóa
+    # được bỏ khỏi index như signal job_deleted làm với các index của process.
+    def change_catalog(self, index):
+        edited, reskilled, hidden, deleted = self.jobs[:4]
+        edited.description = 'Kế toán công nợ, đối chiếu số liệu bằng Excel'
+        edited.save()
+        reskilled.required_skills.set([self.skills[0], self.skills[3]])
+        hidden.is_active = False
+        hidden.save()
+        with index.lock:
+            index.remove_job(deleted.pk)
+        deleted.delete()
+        make_job(self.company, 'Chuyên viên phân tích dữ liệu', 'Phân tích dữ liệu bằng Python và Excel',
+                 skills=[self.skills[0], self.skills[2]], category=self.categories[2])
+        self.tokenize_catalog()
+
+    # Sau lần sync đầu, chỉ được đồng bộ dần (không build lại toàn bộ)
+    def sync_incrementally(self, index):
+        index.sync()
+        self.change_catalog(index)
+        with mock.patch.object(index, 'rebuild', side_effect=AssertionError('rebuilt')):
+            index.sync()
+
+    def synced_and_rebuilt(self, index_class):
+        index = index_class()
+        self.sync_incrementally(index)
+        rebuilt = index_class()
+        rebuilt.sync()
+        return index, rebuilt
+
+    def active_ids(self):
+        return set(Job.objects.filter(is_active=True).values_list('id', flat=True))
+
+    def test_inverted_index(self):
+        index, rebuilt = self.synced_and_rebuilt(JobInvertedIndex)
+
+        def postings(value):
+            return {key: job_ids for key, job_ids in value.items() if job_ids}
+
+        self.assertEqual(set(index.job_category), self.active_ids())
+        self.assertEqual(index.job_category, rebuilt.job_category)
+        self.assertEqual({job_id: set(skills) for job_id, skills in index.job_skills.items()},
+                         {job_id: set(skills) for job_id, skills in rebuilt.job_skills.items()})
+        self.assertEqual(postings(index.skill_postings), postings(rebuilt.skill_postings))
+        self.assertEqual(postings(index.category_postings), postings(rebuilt.category_postings))
+
+    # Index của process được tạo khi import module: mảng df chỉ cấp phát ở lần sync đầu
+    @skipUnless(SKLEARN_AVAILABLE, 'cần numpy, scipy và scikit-learn')
+    def test_document_frequency_is_allocated_on_first_sync(self):
+        for index_class in (JobHashingIndex, JobBM25Index):
+            index = index_class()
+            self.assertIsNone(index._document_frequency)
+            index.clear()
+            self.assertIsNone(index._document_frequency)
+            index.sync()
+            self.assertEqual(index.document_frequency.shape, (index.n_features,))
+            self.assertEqual(index.document_frequency.sum(),
+                             sum(len(indices) for indices, _ in index.rows.values()))
+
+    @skipUnless(SKLEARN_AVAILABLE, 'cần numpy, scipy và scikit-learn')
+    def test_hashing_index(self):
+        index, rebuilt = self.synced_and_rebuilt(JobHashingIndex)
+        self.assertEqual(set(index.rows), self.active_ids())
+        np.testing.assert_array_equal(index.document_frequency, rebuilt.document_frequency)
+
+        scores, row_by_id = index.similarities(self.QUERY)
+        rebuilt_scores, rebuilt_row_by_id = rebuilt.similarities(self.QUERY)
+        for job_id, row in rebuilt_row_by_id.items():
+            self.assertAlmostEqual(scores[row_by_id[job_id]], rebuilt_scores[row], places=5)
+
+    @skipUnless(SKLEARN_AVAILABLE, 'cần numpy, scipy và scikit-learn')
+    def test_bm25_index(self):
+        index, rebuilt = self.synced_and_rebuilt(JobBM25Index)
+        self.assertEqual(set(index.rows), self.active_ids())
+        np.testing.assert_array_equal(index.document_frequency, rebuilt.document_frequency)
+        self.assertAlmostEqual(index.avg_length, rebuilt.avg_length, places=5)
+
+        scores, row_by_id = index.scores(self.QUERY)
+        rebuilt_scores, rebuilt_row_by_id = rebuilt.scores(self.QUERY)
+        self.assertTrue(rebuilt_scores.max() > 0)
+        for job_id, row in rebuilt_row_by_id.items():
+            self.assertAlmostEqual(scores[row_by_id[job_id]], rebuilt_scores[row], places=4)
+
+    # TF-IDF giữ từ vựng / IDF lúc fit: vector và df của các job hiện tại phải
+    # đúng bằng kết quả vector hóa lại toàn bộ catalog bằng vectorizer đó.
+    @skipUnless(SKLEARN_AVAILABLE, 'cần numpy, scipy và scikit-learn')
+    def test_text_index_matches_full_transform(self):
+        index = JobTextIndex()
+        self.sync_incrementally(index)
+
+        job_ids, texts = load_job_tokens(Job.objects.filter(is_active=True))
+        self.assertEqual(set(index.row_by_id), set(job_ids))
+        matrix = index.vectorizer.transform(texts).tocsr()
+        np.testing.assert_array_equal(
+            index.document_frequency, np.bincount(matrix.indices, minlength=matrix.shape[1]),
+        )
+        rows = [index.row_by_id[job_id] for job_id in job_ids]
+        expected = (matrix @ index.transform(self.QUERY).T).toarray().ravel()
+        np.testing.assert_allclose(index.similarities(self.QUERY, rows), expected, atol=1e-9)
+
+        # Bản đã dọn hàng bỏ cho cùng điểm
+        compacted = index.compacted()
+        self.assertEqual(compacted.row_count, len(job_ids))
+        np.testing.assert_allclose(
+            compacted.similarities(self.QUERY, [compacted.row_by_id[job_id] for job_id in job_ids]),
+            expected, atol=1e-9,
+        )
+
+    # Không đổi văn bản (chỉ đổi lương): không vector hóa lại, điểm đúng bằng fit lại
+    @skipUnless(SKLEARN_AVAILABLE, 'cần numpy, scipy và scikit-learn')
+    def test_text_index_without_text_changes_matches_refit(self):
+        index = JobTextIndex()
+        index.sync()
+        for job in self.jobs[:3]:
+            job.salary_max = 20_000_000
+            job.save()
+        index.sync()
+        self.assertEqual(index.tombstones, 0)
+
+        rebuilt = JobTextIndex()
+        rebuilt.sync()
+        job_ids = [job.id for job in self.jobs]
+        np.testing.assert_allclose(
+            index.similarities(self.QUERY, [index.row_by_id[job_id] for job_id in job_ids]),
+            rebuilt.similarities(self.QUERY, [rebuilt.row_by_id[job_id] for job_id in job_ids]),
+            atol=1e-9,
+        )
+
+
+# ============================================================
+# CV EXTRACTION
+# ============================================================
+
+# Các hàm trích xuất giả, chạy trong process con (fork) của extract_text_with_timeout
+def slow_extractor(path):
+    time.sleep(30)
+    return ''
+
+def crashing_extractor(path):
+    os._exit(3)
+
+def broken_extractor(path):
+    raise ValueError('file hỏng')
+
+def make_docx(path, paragraphs):
+    namespace = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+    body = ''.join(
+        f'<w:p>{"".join(f"<w:r><w:t>{part}</w:t></w:r><w:r><w:tab/></w:r>" for part in parts)}</w:p>'
+        for parts in paragraphs
+    )
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr('word/document.xml', f'<w:document xmlns:w="{namespace}"><w:body>{body}</w:body></w:document>')
+
+# PDF 1 trang có lớp text (font Helvetica chuẩn), offset của bảng xref tính đúng.
+def make_pdf(path, text):
+    content = f'BT /F1 12 Tf 72 712 Td ({text}) Tj ET'.encode()
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+        b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R '
+        b'/Resources << /Font << /F1 5 0 R >> >> >>',
+        b'<< /Length %d >>\nstream\n%s\nendstream' % (len(content), content),
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>',
+    ]
+    data = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(data))
+        data += b'%d 0 obj\n%s\nendobj\n' % (number, body)
+    xref = len(data)
+    data += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    data += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    data += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+@mock.patch.object(cv_extraction, '_ocr_backend', None)
+class CvExtractorTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def test_docx(self):
+        make_docx(self.path('cv.docx'), [['Kế toán', 'thuế'], ['Excel']])
+        self.assertEqual(cv_extraction.extract_docx(self.path('cv.docx')), 'Kế toán thuế \nExcel ')
+        self.assertEqual(cv_extraction.extract_text(self.path('cv.docx')), ('completed', 'Kế toán thuế \nExcel'))
+
+    def test_plain_text_is_truncated(self):
+        with open(self.path('cv.txt'), 'w', encoding='utf-8') as f:
+            f.write('Kế toán   thuế\t' + 'x' * cv_extraction.MAX_CV_TEXT_LENGTH)
+        status, text = cv_extraction.extract_text(self.path('cv.txt'))
+        self.assertEqual(status, 'completed')
+        self.assertTrue(text.startswith('Kế toán thuế x'))
+        # Đọc tối đa MAX_CV_TEXT_LENGTH ký tự, rồi gộp khoảng trắng
+        self.assertEqual(len(text), cv_extraction.MAX_CV_TEXT_LENGTH - 2)
+
+    @skipUnless(cv_extraction.PYPDF_AVAILABLE, 'cần pypdf')
+    def test_pdf(self):
+        make_pdf(self.path('cv.pdf'), 'Ke toan thue Excel')
+        self.assertEqual(cv_extraction.extract_text(self.path('cv.pdf')), ('completed', 'Ke toan thue Excel'))
+
+    # Không có text (PDF scan / thiếu pypdf): dùng OCR nếu có, không thì no_text
+    def test_pdf_without_text_layer_uses_ocr(self):
+        make_pdf(self.path('scan.pdf'), '')
+        with mock.patch.dict(cv_extraction.EXTRACTORS, {'.pdf': lambda path: ''}):
+            self.assertEqual(cv_extraction.extract_text(self.path('scan.pdf')), ('no_text', ''))
+            with mock.patch.object(cv_extraction, '_ocr_backend', lambda path: ' Kế toán  (OCR) '):
+                self.assertEqual(cv_extraction.extract_text(self.path('scan.pdf')), ('completed', 'Kế toán (OCR)'))
+
+    def test_unsupported_extension(self):
+        open(self.path('cv.doc'), 'wb').close()
+        self.assertEqual(cv_extraction.extract_text(self.path('cv.doc')), ('unsupported', ''))
+
+    # Trích xuất chạy trong process con: quá thời gian, process chết, exception
+    def test_child_process_timeout_and_failures(self):
+        path = self.path('cv.txt')
+        with open(path, 'w') as f:
+            f.write('Excel')
+        self.assertEqual(cv_extraction.extract_text_with_timeout(path, 10), ('completed', 'Excel', ''))
+
+        with mock.patch.dict(cv_extraction.EXTRACTORS, {'.txt': slow_extractor}):
+            start = time.monotonic()
+            status, text, error = cv_extraction.extract_text_with_timeout(path, 0.5)
+            self.assertEqual((status, text), ('timeout', ''))
+            self.assertLess(time.monotonic() - start, 10)
+        with mock.patch.dict(cv_extraction.EXTRACTORS, {'.txt': crashing_extractor}):
+            status, _, error = cv_extraction.extract_text_with_timeout(path, 10)
+            self.assertEqual(status, 'failed')
+            self.assertIn('exit code 3', error)
+        with mock.patch.dict(cv_extraction.EXTRACTORS, {'.txt': broken_extractor}):
+            self.assertEqual(cv_extraction.extract_text_with_timeout(path, 10),
+                             ('failed', '', 'ValueError: file hỏng'))
+
+
+class CvProcessingTests(TestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        for patcher in (
+            override_settings(MEDIA_ROOT=media.name),
+            mock.patch.object(cv_extraction, '_ocr_backend', None),
+            mock.patch.object(match_store, 'MATCH_REFRESH_WORKERS', 0),
+        ):
+            patcher.enable() if hasattr(patcher, 'enable') else patcher.start()
+            self.addCleanup(patcher.disable if hasattr(patcher, 'disable') else patcher.stop)
+
+        self.excel = Skill.objects.create(name='Excel')
+        self.tax = Skill.objects.create(name='Kế toán thuế')
+        self.autocad = Skill.objects.create(name='AutoCAD')
+        self.job = make_job(make_company(), 'Kế toán', skills=[self.tax])
+        self.user = User.objects.create_user(username='candidate', password='pw')
+
+    def make_application(self, content=b'Kinh nghiem ke toan thue, thanh thao Excel', name='cv.txt'):
+        return Application.objects.create(
+            user=self.user, job=self.job, cv_status='pending', cv_file=SimpleUploadedFile(name, content),
+        )
+
+    def test_pending_application_is_extracted_and_tagged(self):
+        application = self.make_application()
+        self.assertEqual(cv_extraction.process_application_cv(application.pk), 'completed')
+        application.refresh_from_db()
+        self.assertEqual(application.cv_status, 'completed')
+        self.assertEqual(application.cv_skill_ids, [self.tax.id, self.excel.id])
+        self.assertIn('ke toan thue', application.cv_text_folded)
+        self.assertTrue(application.cv_tokens)
+
+        # Đã xử lý: lần gọi sau (web và process_cvs cùng lúc) không làm lại
+        self.assertIsNone(cv_extraction.process_application_cv(application.pk))
+
+        # Trang chi tiết đơn chỉ đọc cv_skill_ids, không quét lại CV
+        with mock.patch('jobs.skill_tagger.get_skill_tagger', side_effect=AssertionError('tagged')):
+            info = cv_extraction.get_cv_match_info(application)
+        self.assertEqual(info['matched_skills'], [self.tax])
+        self.assertEqual(info['other_skills'], [self.excel])
+
+    def test_failed_and_timed_out_extraction(self):
+        application = self.make_application()
+        with mock.patch.object(cv_extraction, 'extract_text_with_timeout', return_value=('timeout', '', 'Quá 1s')):
+            self.assertEqual(cv_extraction.process_application_cv(application.pk), 'timeout')
+        application.refresh_from_db()
+        self.assertEqual((application.cv_status, application.cv_error, application.cv_skill_ids),
+                         ('timeout', 'Quá 1s', []))
+        self.assertIsNone(cv_extraction.get_cv_match_info(application))
+
+        Application.objects.filter(pk=application.pk).update(cv_status='pending')
+        with mock.patch.object(cv_extraction, 'extract_text_with_timeout', side_effect=OSError('disk')), \
+                redirect_stdout(io.StringIO()):
+            self.assertEqual(cv_extraction.process_application_cv(application.pk), 'failed')
+        application.refresh_from_db()
+        self.assertEqual((application.cv_status, application.cv_error), ('failed', 'disk'))
+
+    def test_application_without_file(self):
+        application = Application.objects.create(user=self.user, job=self.job, cv_status='pending')
+        self.assertEqual(cv_extraction.process_application_cv(application.pk), 'no_text')
+
+    # CV của hồ sơ kỹ năng (media/user_cvs): text được ghép vào văn bản hồ sơ
+    def test_profile_cv(self):
+        profile = UserSkillProfile.objects.create(
+            user=self.user, cv_status='pending', cv_file=SimpleUploadedFile('cv.txt', b'Thiet ke AutoCAD 2D'),
+        )
+        self.assertTrue(profile.cv_file.name.startswith('user_cvs/'))
+        MatchRefreshTask.objects.all().delete()
+
+        self.assertEqual(cv_extraction.process_profile_cv(profile.pk), 'completed')
+        profile.refresh_from_db()
+        self.assertEqual(profile.cv_skill_ids, [self.autocad.id])
+        self.assertEqual(task_keys(), {('profile', profile.pk)})
+
+        refresh_profile_tokens([profile.pk])
+        profile.refresh_from_db()
+        self.assertIn('autocad', profile.tokens)
+
+    def test_skill_profile_upload_enqueues_extraction(self):
+        UserProfile.objects.get_or_create(user=self.user, defaults={'role': 'candidate'})
+        self.client.force_login(self.user)
+        with mock.patch.object(cv_extraction, '_get_executor') as executor, \
+                self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('accounts:skill_profile'), {
+                'bio': '', 'cv_file': SimpleUploadedFile('cv.txt', b'AutoCAD'),
+            })
+        self.assertEqual(response.status_code, 302)
+        profile = UserSkillProfile.objects.get(user=self.user)
+        self.assertEqual(profile.cv_status, 'pending')
+        executor.return_value.submit.assert_called_once_with(cv_extraction.process_profile_cv, profile.pk)
+
+
+# ============================================================
+# SKILL TAGGER
+# ============================================================
+
+def make_tagger(*names):
+    return SkillTagger((fold_text(name), skill_id) for skill_id, name in enumerate(names, 1))
+
+
+class SkillTaggerTests(SimpleTestCase):
+    # Skill chỉ khớp khi đứng riêng thành từ
+    def test_word_boundaries(self):
+        tagger = make_tagger('Java', 'SQL', 'C++', 'C#', '.NET')
+        self.assertEqual(tagger.tag('JavaScript, MySQL, PostgreSQL'), [])
+        self.assertEqual(tagger.tag('Java/SQL'), [1, 2])
+        # Ký tự đầu / cuối không phải chữ số ("+", ".") thì không cần ranh giới từ
+        self.assertEqual(tagger.tag('C++11, C#, ASP.NET'), [3, 4, 5])
+        self.assertEqual(tagger.tag('C, C+, NET'), [])
+
+    # Khớp trên văn bản không dấu, không phân biệt hoa thường, gộp khoảng trắng
+    def test_folded_matching(self):
+        tagger = make_tagger('Kế toán thuế', 'Đàm phán')
+        self.assertEqual(tagger.tag('KE TOAN   THUE, dam phan'), [1, 2])
+        nfd = unicodedata.normalize('NFD', 'Kinh nghiệm kế toán thuế')
+        self.assertEqual(tagger.tag(nfd), [1])
+        self.assertEqual(tagger.tag('kế toán'), [])
+
+    # Alias chồng nhau: mọi pattern khớp đều được tính, theo thứ tự xuất hiện đầu tiên
+    def test_overlapping_patterns(self):
+        tagger = SkillTagger([('react', 1), ('react native', 2), ('native', 3), ('js', 4), ('node.js', 5), ('react', 1)])
+        self.assertEqual(len(tagger), 5)
+        self.assertEqual(tagger.tag('React Native'), [1, 2, 3])
+        self.assertEqual(tagger.tag('Node.js, React'), [5, 4, 1])
+        self.assertEqual(tagger.tag('Reactjs'), [])
+
+
+class SkillSuggestionTests(TestCase):
+    def setUp(self):
+        self.accounting = Skill.objects.create(name='Kế toán thuế')
+        self.excel = Skill.objects.create(name='Excel')
+        self.react = Skill.objects.create(name='ReactJS')
+        SkillAlias.objects.create(skill=self.react, alias='React')
+
+    # Automaton build từ name_folded / alias_folded và được build lại khi alias thay đổi
+    def test_tagger_reads_folded_columns(self):
+        self.assertEqual(tag_text('Kinh nghiệm KẾ TOÁN THUẾ, React'), [self.accounting.id, self.react.id])
+        Skill.objects.filter(pk=self.excel.pk).update(name_folded='ms excel')
+        SkillAlias.objects.create(skill=self.accounting, alias='Tax')
+        self.assertEqual(tag_text('Tax, MS Excel'), [self.accounting.id, self.excel.id])
+
+    def test_suggest_job_skills(self):
+        company = make_company()
+        UserProfile.objects.create(user=company.user, role='employer')
+        self.client.force_login(company.user)
+        url = reverse('dashboard:suggest_job_skills')
+
+        response = self.client.post(url, {
+            'title': 'Kế toán thuế',
+            'requirements_text': 'Thành thạo excel, biết React',
+            'skills': [str(self.excel.id), 'abc'],
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([skill['name'] for skill in response.json()['skills']], ['Kế toán thuế', 'ReactJS'])
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        candidate = User.objects.create_user(username='candidate', password='pw')
+        UserProfile.objects.create(user=candidate, role='candidate')
+        self.client.force_login(candidate)
+        self.assertEqual(self.client.post(url, {'title': 'Kế toán thuế'}).json(), {'skills': []})
+
+
+# ============================================================
+# LSA
+# ============================================================
+
+@skipUnless(SKLEARN_AVAILABLE, 'cần numpy, scipy và scikit-learn')
+@override_settings(MATCH_SIDECAR_SOCKET=None)
+class LsaTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'lsa_model.pkl')
+        for patcher in (
+            mock.patch.object(lsa, 'LSA_MODEL_FILE', self.path),
+            mock.patch.object(lsa, '_lsa_index', None),
+            mock.patch.object(match_store, 'MATCH_REFRESH_WORKERS', 0),
+            mock.patch('jobs.match_artifact.current_artifact_version', return_value=None),
+            mock.patch('jobs.match_index._schedule_text_index_maintenance'),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.company = make_company()
+
+    def make_jobs(self, *texts):
+        jobs = [make_job(self.company, title, description) for title, description in texts]
+        refresh_job_tokens([job.pk for job in jobs])
+        return jobs
+
+    def train(self):
+        with redirect_stdout(io.StringIO()) as output:
+            call_command('train_lsa', dimensions=8, output=self.path, stdout=output)
+        return output.getvalue()
+
+    # Catalog rỗng / 1 job / không có từ nào: không train, không ghi file
+    def test_catalog_too_small(self):
+        self.assertIsNone(lsa.train_lsa_model(8, self.path))
+        self.make_jobs(('Kế toán thuế', 'Kê khai thuế'))
+        self.assertIsNone(lsa.train_lsa_model(8, self.path))
+        self.make_jobs(('a', 'b'))
+        Job.objects.update(tokens='')
+        self.assertIsNone(lsa.train_lsa_model(8, self.path))
+        self.assertIn('Chưa đủ việc làm', self.train())
+        self.assertFalse(os.path.exists(self.path))
+        self.assertIsNone(lsa.get_lsa_index())
+
+    # Số chiều giảm theo số job khi catalog nhỏ hơn LSA_DIMENSIONS
+    def test_train_and_load(self):
+        jobs = self.make_jobs(
+            ('Kế toán thuế', 'Kê khai thuế, quyết toán thuế năm'),
+            ('Kế toán tổng hợp', 'Lập báo cáo tài chính, kê khai thuế'),
+            ('Nhân viên kinh doanh', 'Tìm kiếm khách hàng, bán hàng'),
+        )
+        model, job_count, profile_count = lsa.train_lsa_model(8, self.path)
+        self.assertEqual((model.dimensions, job_count, profile_count), (2, 3, 0))
+
+        index = lsa.get_lsa_index()
+        self.assertEqual(set(index.row_by_id), {job.pk for job in jobs})
+        # Vector lúc train của job (đã chuẩn hóa) khớp với vector chiếu lại từ tokens
+        job_ids, texts = load_job_tokens(Job.objects.all())
+        projected = index.model.project(texts)
+        rows = [index.row_by_id[job_id] for job_id in job_ids]
+        np.testing.assert_allclose(index.vectors[rows], projected, atol=1e-5)
+        # Với 2 chiều, 1 job có thể bị chiếu thành vector 0: dùng job có vector khác 0
+        best = int(np.argmax(np.linalg.norm(projected, axis=1)))
+        scores, row_by_id = index.similarities(projected[best])
+        self.assertAlmostEqual(float(scores[row_by_id[job_ids[best]]]), 1.0, places=5)
+
+        self.assertIn('Đã train LSA 2 chiều trên 3 việc làm', self.train())
+
+    # Chưa có mô hình: 'lsa' cho cùng điểm với 'tfidf'
+    def test_scorer_falls_back_to_tfidf(self):
+        self.make_jobs(('Kế toán thuế', 'Kê khai thuế'), ('Nhân viên kinh doanh', 'Bán hàng'))
+        user = User.objects.create_user(username='candidate', password='pw')
+        profile = UserSkillProfile.objects.create(user=user, bio='Kế toán thuế')
+        refresh_profile_tokens([profile.pk])
+        profile.refresh_from_db()
+
+        matcher = JobMatcher(profile)
+        jobs = Job.objects.all()
+        self.assertEqual(matcher.calculate_jobs_match(jobs, prune=False, text_scorer='lsa'),
+                         matcher.calculate_jobs_match(jobs, prune=False, text_scorer='tfidf'))
+
+
+# ============================================================
+# BATCH TOKENIZATION
+# ============================================================
+
+TOKENIZE_TEXTS = [
+    'Kế toán tổng hợp, lập báo cáo tài chính',
+    'Senior Python developer with Django experience',
+    'Nhân viên kinh doanh bất động sản',
+    '',
+    'CRASH marketing executive',
+    'Chăm sóc khách hàng qua điện thoại',
+    'Data analyst: SQL, Excel, Power BI',
+]
+
+_get_tokenized_text = nlp_processor.get_tokenized_text
+
+# Làm process con (fork sau khi patch) chết khi gặp văn bản có "CRASH"
+def crashing_tokenizer(text, language=None):
+    if 'CRASH' in text:
+        os._exit(1)
+    return _get_tokenized_text(text, language)
+
+
+class TokenizeManyTests(SimpleTestCase):
+    def expected(self):
+        return [_get_tokenized_text(text) for text in TOKENIZE_TEXTS]
+
+    # Kết quả theo đúng thứ tự đầu vào dù các chunk xong không theo thứ tự
+    def test_keeps_input_order(self):
+        for workers in (1, 3):
+            self.assertEqual(list(nlp_processor.tokenize_many(iter(TOKENIZE_TEXTS), workers, chunksize=2)),
+                             self.expected())
+
+    def test_pool_unavailable_tokenizes_in_process(self):
+        with mock.patch.object(nlp_processor, 'ProcessPoolExecutor', side_effect=OSError('no /dev/shm')), \
+                redirect_stdout(io.StringIO()) as output:
+            results = list(nlp_processor.tokenize_many(TOKENIZE_TEXTS, 2, chunksize=2))
+        self.assertEqual(results, self.expected())
+        self.assertIn('tokenizing in-process', output.getvalue())
+
+    # Process con crash: các chunk khác được gửi lại vào pool mới, văn bản gây
+    # crash chỉ được làm sạch (clean_text), thứ tự vẫn giữ nguyên
+    def test_worker_crash(self):
+        expected = self.expected()
+        crashed = TOKENIZE_TEXTS.index('CRASH marketing executive')
+        expected[crashed] = nlp_processor.clean_text(TOKENIZE_TEXTS[crashed])
+        with mock.patch.object(nlp_processor, 'get_tokenized_text', crashing_tokenizer), \
+                redirect_stdout(io.StringIO()) as output:
+            results = list(nlp_processor.tokenize_many(TOKENIZE_TEXTS, 2, chunksize=2))
+        self.assertEqual(results, expected)
+        self.assertIn('crashed on text', output.getvalue())
+
+    # Pool hỏng và không tạo lại được: các chunk còn lại tách trong process hiện tại
+    def test_pool_broken_and_not_recreated(self):
+        pool = mock.Mock()
+        pool.submit.side_effect = BrokenProcessPool()
+        with mock.patch.object(nlp_processor, 'ProcessPoolExecutor', side_effect=[pool, OSError('fork failed')]), \
+                redirect_stdout(io.StringIO()):
+            results = list(nlp_processor.tokenize_many(TOKENIZE_TEXTS, 2, chunksize=3))
+        self.assertEqual(results, self.expected())
+
+
+# ============================================================
+# KEYWORDS
+# ============================================================
+
+class TopTermsTests(SimpleTestCase):
+    FEATURES = np.array(['ke_toan', 'ke_toan thue', 'thue', 'excel', 'hiem co'])
+
+    def vector(self, weights):
+        sparse = import_optional('scipy.sparse')
+        return sparse.csr_matrix(np.array([weights], dtype=np.float64))
+
+    # Bỏ từ mà mọi từ con đã được chọn, "_" của từ ghép đổi thành khoảng trắng
+    def test_skips_covered_terms(self):
+        vector = self.vector([0.9, 0.7, 0.8, 0.5, 0.95])
+        self.assertEqual(keywords.top_terms(self.FEATURES, vector), ['hiem co', 'ke toan', 'thue', 'excel'])
+        self.assertEqual(keywords.top_terms(self.FEATURES, vector, top_n=2), ['hiem co', 'ke toan'])
+
+    # Cụm từ chọn sau từ con thì thay luôn từ con
+    def test_phrase_replaces_its_words(self):
+        vector = self.vector([0.9, 0.85, 0.8, 0.5, 0.0])
+        self.assertEqual(keywords.top_terms(self.FEATURES, vector), ['ke toan thue', 'excel'])
+
+    # Trọng số bằng nhau: cụm từ trước, không phụ thuộc thứ tự cột trong vector
+    def test_ties_do_not_depend_on_index_order(self):
+        sparse = import_optional('scipy.sparse')
+        for order in ([0, 1, 2, 3], [3, 2, 1, 0], [2, 0, 3, 1]):
+            data = np.array([0.5, 0.5, 0.5, 0.4])[order]
+            vector = sparse.csr_matrix((data, np.array(order), [0, 4]), shape=(1, 5))
+            self.assertEqual(keywords.top_terms(self.FEATURES, vector), ['ke toan thue', 'excel'])
+
+    def test_rare_terms_and_idf_scale(self):
+        vector = self.vector([0.9, 0.7, 0.8, 0.5, 0.95])
+        rare = np.array([False, False, False, False, True])
+        self.assertEqual(keywords.top_terms(self.FEATURES, vector, rare_terms=rare), ['ke toan', 'thue', 'excel'])
+        scale = np.array([1.0, 2.0, 1.0, 1.0, 1.0])
+        self.assertEqual(keywords.top_terms(self.FEATURES, vector, idf_scale=scale),
+                         ['ke toan thue', 'hiem co', 'excel'])
+
+    def test_matched_keywords(self):
+        job_keywords = ['ke toan thue', 'excel', 'bao cao', 'python']
+        self.assertEqual(keywords.matched_keywords(job_keywords, 'ke_toan thue thanh_thao excel bao cao_tai_chinh'),
+                         ['ke toan thue', 'excel'])
+        self.assertEqual(keywords.matched_keywords(None, 'excel'), [])
+        self.assertEqual(keywords.matched_keywords(job_keywords, None), [])
+
+
+@skipUnless(SKLEARN_AVAILABLE, 'cần numpy, scipy và scikit-learn')
+class JobKeywordsTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(match_store, 'MATCH_REFRESH_WORKERS', 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        company = make_company()
+        for title, description in (
+            ('Kế toán thuế', 'Kê khai thuế, quyết toán thuế năm, báo cáo tài chính'),
+            ('Kế toán tổng hợp', 'Lập báo cáo tài chính, kê khai thuế hằng tháng'),
+            ('Kế toán công nợ', 'Theo dõi công nợ, đối chiếu số liệu, báo cáo tài chính'),
+            ('Nhân viên kinh doanh', 'Tìm kiếm khách hàng, chăm sóc khách hàng'),
+            ('Lập trình viên Python', 'Phát triển backend Python, viết tài liệu kỹ thuật'),
+        ):
+            make_job(company, title, description)
+        refresh_job_tokens(Job.objects.values_list('id', flat=True))
+        self.index = self.fitted_index()
+
+    def fitted_index(self):
+        index = JobTextIndex()
+        index.sync()
+        patcher = mock.patch.object(keywords, 'get_job_text_index', return_value=index)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return index
+
+    def stored_keywords(self):
+        return dict(Job.objects.values_list('id', 'keywords'))
+
+    # Cụm từ chỉ có ở 1 job không được chọn; từ đơn hiếm vẫn được giữ
+    def test_min_df_filtering(self):
+        self.assertIsNone(keywords.rare_term_mask(self.index, min_df=1))
+        mask = keywords.rare_term_mask(self.index)
+        names = self.index.feature_names
+        self.assertTrue(mask.any())
+        self.assertTrue(all(' ' in names[column] for column in np.flatnonzero(mask)))
+
+        document_frequency = dict(zip(names, self.index.document_frequency))
+        for job_id, tokens in zip(*load_job_tokens(Job.objects.all())):
+            for keyword in keywords.extract_keywords(tokens, top_n=20, index=self.index):
+                term = next(name for name in names if name.replace('_', ' ') == keyword)
+                if ' ' in term:
+                    self.assertGreaterEqual(document_frequency[term], keywords.KEYWORD_MIN_DF, keyword)
+
+    # Chỉ job có tokens đổi được tính lại; sau khi fit lại index (force) mọi job
+    # được tính lại theo IDF mới
+    def test_recompute_after_refit(self):
+        self.assertEqual(keywords.refresh_job_keywords(), Job.objects.count())
+        self.assertEqual(keywords.refresh_job_keywords(), 0)
+
+        Job.objects.update(keywords=['cũ'])
+        make_job(Job.objects.first().company, 'Kế toán kho', 'Kiểm kê kho, báo cáo tài chính hằng tháng')
+        refresh_job_tokens(Job.objects.values_list('id', flat=True))
+        self.assertEqual(keywords.refresh_job_keywords(), 1)
+        self.assertEqual(list(self.stored_keywords().values()).count(['cũ']), Job.objects.count() - 1)
+
+        # Job mới được tính với từ vựng cũ (chưa có "kho"): fit lại cũng đổi từ khóa của nó
+        refitted = self.fitted_index()
+        self.assertEqual(keywords.refresh_job_keywords(force=True), Job.objects.count())
+        for job_id, tokens in zip(*load_job_tokens(Job.objects.all())):
+            self.assertEqual(self.stored_keywords()[job_id], keywords.extract_keywords(tokens, index=refitted))
+        self.assertEqual(keywords.refresh_job_keywords(force=True), 0)
+
+
+# ============================================================
+# ENGLISH TOKENIZATION
+# ============================================================
+
+ENGLISH_LINES = [
+    'Senior Python Developer (Django/REST) - 3+ years',
+    "We're hiring: Data Analyst, SQL & Power BI!",
+    'Contact hr@company.com or visit https://company.com/jobs',
+    'Managing pipelines, running reports and planned releases',
+]
+
+class EnglishTokenizerTests(SimpleTestCase):
+    # Mặc định giống quy trình cũ: clean_text rồi TextBlob.words (văn bản đã làm
+    # sạch chỉ còn chữ thường và khoảng trắng nên TextBlob cho kết quả như split())
+    def test_default_matches_baseline(self):
+        self.assertEqual(nlp_processor.tokenize_text(ENGLISH_LINES[0]),
+                         ['senior', 'python', 'developer', 'django', 'rest', 'years'])
+        self.assertEqual(nlp_processor.tokenize_text(ENGLISH_LINES[1]),
+                         ['we', 're', 'hiring', 'data', 'analyst', 'sql', 'power', 'bi'])
+        self.assertEqual(nlp_processor.tokenize_text(ENGLISH_LINES[2]), ['contact', 'or', 'visit'])
+        self.assertEqual(nlp_processor.tokenize_text(ENGLISH_LINES[3]),
+                         ['managing', 'pipelines', 'running', 'reports', 'and', 'planned', 'releases'])
+
+    @skipUnless(nlp_processor.TEXTBLOB_AVAILABLE, 'cần textblob')
+    def test_default_matches_textblob(self):
+        textblob = import_optional('textblob')
+        for line in ENGLISH_LINES:
+            cleaned = nlp_processor.clean_text(line)
+            self.assertEqual(nlp_processor.tokenize_cleaned(cleaned, 'en'),
+                             [str(word) for word in textblob.TextBlob(cleaned).words])
+
+    def test_fast_mode_on_raw_text(self):
+        self.assertEqual(nlp_processor.tokenize_english('Senior C++/Python dev, Node.js & AWS.'),
+                         ['senior', 'c', 'python', 'dev', 'node', 'js', 'aws'])
+        self.assertEqual(nlp_processor.tokenize_english(''), [])
+        with mock.patch.object(nlp_processor, 'TEXTBLOB_AVAILABLE', False):
+            self.assertEqual(nlp_processor.tokenize_english('Node.js & AWS', mode='textblob'),
+                             ['node', 'js', 'aws'])
+
+    # Bỏ stopwords / stem chỉ khi bật ENGLISH_REMOVE_STOPWORDS / ENGLISH_STEM
+    def test_stemming_and_stopwords_are_opt_in(self):
+        cleaned = nlp_processor.clean_text(ENGLISH_LINES[3])
+        self.assertEqual(nlp_processor.tokenize_cleaned(cleaned, 'en'), cleaned.split())
+        with mock.patch.object(nlp_processor, 'ENGLISH_STEM', True), \
+                mock.patch.object(nlp_processor, 'ENGLISH_REMOVE_STOPWORDS', True):
+            self.assertEqual(nlp_processor.tokenize_cleaned(cleaned, 'en'),
+                             ['manag', 'pipelin', 'run', 'report', 'plan', 'releas'])
+
+    def test_stem_english(self):
+        for words in (('skill', 'skills'), ('manage', 'managed', 'managing'), ('run', 'running'),
+                      ('study', 'studies'), ('employee', 'employees'), ('plan', 'planned')):
+            stems = {nlp_processor.stem_english(word) for word in words}
+            self.assertEqual(len(stems), 1, words)
+        # Từ ngắn, từ kết thúc bằng -ss / -us / -is và từ không phải ASCII giữ nguyên
+        for word in ('css', 'java', 'class', 'status', 'analysis', 'kế_toán'):
+            self.assertEqual(nlp_processor.stem_english(word), word)
+
+
+# ============================================================
+# VIETNAMESE SEGMENTER
+# ============================================================
+
+class VietnameseSegmenterTests(SimpleTestCase):
+    def setUp(self):
+        self.segmenter = VietnameseSegmenter(['kế toán', 'Kế toán thuế', 'báo cáo', 'báo cáo tài chính', 'thuế',
+                                              'KẾ TOÁN!'])
+
+    # Từ 1 âm tiết bị bỏ qua, từ được làm sạch (clean_text) trước khi thêm
+    def test_vocabulary(self):
+        self.assertEqual(len(self.segmenter), 4)
+
+    # Khớp dài nhất từ trái sang phải, phần còn lại giữ từng âm tiết
+    def test_longest_match(self):
+        self.assertEqual(self.segmenter.segment('kế toán thuế lập báo cáo tài chính'),
+                         ['kế_toán_thuế', 'lập', 'báo_cáo_tài_chính'])
+        self.assertEqual(self.segmenter.segment('kế toán báo cáo tài liệu kế hoạch'),
+                         ['kế_toán', 'báo_cáo', 'tài', 'liệu', 'kế', 'hoạch'])
+        self.assertEqual(self.segmenter.segment(''), [])
+
+    # Chỉ dùng từ điển khi chọn mode 'dictionary' (VIETNAMESE_TOKENIZER)
+    @mock.patch.object(nlp_processor, 'UNDERTHESEA_AVAILABLE', False)
+    def test_dictionary_mode_is_opt_in(self):
+        text = 'kế toán thuế'
+        with mock.patch('jobs.vi_segmenter.get_vietnamese_segmenter', return_value=self.segmenter):
+            self.assertEqual(nlp_processor.tokenize_vietnamese(text), ['kế', 'toán', 'thuế'])
+            self.assertEqual(nlp_processor.tokenize_vietnamese(text, mode='dictionary'), ['kế_toán_thuế'])
+            with mock.patch.object(nlp_processor, 'VIETNAMESE_TOKENIZER', 'dictionary'):
+                self.assertEqual(nlp_processor.tokenize_text('Kế toán thuế'), ['kế_toán_thuế'])
+
+        with mock.patch('jobs.vi_segmenter.get_vietnamese_segmenter', side_effect=RuntimeError('no db')), \
+                redirect_stdout(io.StringIO()):
+            self.assertEqual(nlp_processor.tokenize_vietnamese(text, mode='dictionary'), ['kế', 'toán', 'thuế'])
+
+
+# Từ điển của process gồm tên skill / alias / ngành nghề trong database
+class DomainVocabularyTests(TestCase):
+    def setUp(self):
+        reset_vietnamese_segmenter()
+        self.addCleanup(reset_vietnamese_segmenter)
+
+    def test_domain_words(self):
+        skill = Skill.objects.create(name='Phân tích nghiệp vụ')
+        SkillAlias.objects.create(skill=skill, alias='Phân tích hệ thống')
+        JobCategory.objects.create(name='Xuất nhập khẩu')
+        segmenter = get_vietnamese_segmenter()
+        self.assertEqual(segmenter.segment('phân tích nghiệp vụ phân tích hệ thống xuất nhập khẩu'),
+                         ['phân_tích_nghiệp_vụ', 'phân_tích_hệ_thống', 'xuất_nhập_khẩu'])
+
+
+# ============================================================
+# TEXT NORMALIZATION
+# ============================================================
+
+# clean_text / detect_language trước khi gộp thành normalize_text (6 lượt re.sub)
+def baseline_clean_text(text):
+    if not text:
+        return ''
+    text = text.lower()
+    text = re.sub(r'http\S+|www\S+|https\S+', '', text)
+    text = re.sub(r'\S+@\S+', '', text)
+    text = re.sub(r'\b\d{9,11}\b', '', text)
+    text = re.sub(r'[^\w\sÀ-ỹ]', ' ', text)
+    text = re.sub(r'\d+', '', text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+def baseline_detect_language(text):
+    if not text:
+        return 'vi'
+    vietnamese_chars = set(nlp_processor.VIETNAMESE_CHARS)
+    vietnamese_chars.update([char.upper() for char in vietnamese_chars])
+    count = sum(1 for char in text.lower() if char in vietnamese_chars)
+    return 'vi' if count / len(text) > 0.02 else 'en'
+
+NORMALIZE_SAMPLES = [
+    'Kế toán tổng hợp (3 năm kinh nghiệm), lương 15-20 triệu!',
+    'ĐÀO TẠO & PHÁT TRIỂN NHÂN SỰ - Hồ Chí Minh',
+    'Liên hệ: 0901234567 / hr@congty.vn / https://congty.vn/tuyen-dung?id=1',
+    'Senior Python Developer, www.example.com, C++/C#, node_js',
+    'Trưởng phòng\tkinh doanh\n\nKhu vực Đà Nẵng',
+    'é' + 'a' * 48,
+    '',
+]
+
+class NormalizeTextTests(SimpleTestCase):
+    # Cùng kết quả với clean_text / detect_language cũ (trên dạng NFC) cho văn
+    # bản NFC, NFD (dấu tách rời) và chữ hoa / thường lẫn lộn
+    def test_matches_baseline(self):
+        for sample in NORMALIZE_SAMPLES:
+            for text in (sample, unicodedata.normalize('NFD', sample), sample.swapcase(), sample.upper()):
+                nfc = unicodedata.normalize('NFC', text)
+                expected = (baseline_detect_language(nfc), baseline_clean_text(nfc))
+                self.assertEqual(nlp_processor.normalize_text(text), expected, repr(text))
+                self.assertEqual(nlp_processor.clean_text(text), expected[1])
+                self.assertEqual(nlp_processor.detect_language(text), expected[0])
+
+    def test_nfd_input_gives_nfc_output(self):
+        language, cleaned = nlp_processor.normalize_text(unicodedata.normalize('NFD', 'Kế Toán'))
+        self.assertEqual((language, cleaned), ('vi', 'kế toán'))
+        self.assertTrue(unicodedata.is_normalized('NFC', cleaned))
+
+    def test_normalize_iter(self):
+        results = nlp_processor.normalize_iter(iter(NORMALIZE_SAMPLES))
+        self.assertNotIsInstance(results, list)
+        self.assertEqual(list(results), [nlp_processor.normalize_text(text) for text in NORMALIZE_SAMPLES])
+
+
+# ============================================================
+# MATCH INDEX ARTIFACT
+# ============================================================
+
+# Mảng là view (không copy) của file đã map (csr_matrix bỏ lớp np.memmap nhưng giữ bộ nhớ)
+def is_file_mapped(array) -> bool:
+    while isinstance(array, np.ndarray):
+        if isinstance(array, np.memmap):
+            return True
+        array = array.base
+    return isinstance(array, mmap.mmap)
+
+
+@skipUnless(SKLEARN_AVAILABLE, 'cần numpy, scipy và scikit-learn')
+class MatchArtifactTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        root = os.path.join(directory.name, 'match_index')
+        for patcher in (
+            mock.patch.object(match_artifact, 'MATCH_INDEX_DIR', root),
+            mock.patch.object(match_artifact, 'MATCH_INDEX_VERSIONS_DIR', os.path.join(root, 'versions')),
+            mock.patch.object(match_artifact, 'MATCH_INDEX_CURRENT_FILE', os.path.join(root, 'CURRENT')),
+            mock.patch.object(match_artifact, '_current', (None, None)),
+            mock.patch.object(match_store, 'MATCH_REFRESH_WORKERS', 0),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        company = make_company()
+        skills = [Skill.objects.create(name=name) for name in ('Excel', 'Kế toán thuế', 'Python')]
+        category = JobCategory.objects.create(name='Kế toán')
+        make_job(company, 'Kế toán thuế', 'Kê khai thuế, báo cáo tài chính', skills=skills[:2], category=category)
+        make_job(company, 'Kế toán tổng hợp', 'Lập báo cáo tài chính bằng Excel', skills=skills[:1])
+        make_job(company, 'Lập trình viên Python', 'Phát triển backend Python', skills=skills[2:])
+        refresh_job_tokens(Job.objects.values_list('id', flat=True))
+
+    def test_empty_catalog(self):
+        Job.objects.all().delete()
+        version, index = match_artifact.build_match_artifact()
+        self.assertIsNone(version)
+        self.assertIsNone(match_artifact.current_artifact_version())
+
+    # Build -> CURRENT trỏ sang phiên bản mới -> nạp lại bằng memmap cho cùng kết quả
+    def test_build_and_memmap_reload(self):
+        version, fitted = match_artifact.build_match_artifact()
+        self.assertEqual(match_artifact.current_artifact_version(), version)
+        self.assertEqual(match_artifact.list_versions(), [version])
+        self.assertEqual(os.listdir(match_artifact.MATCH_INDEX_DIR), ['CURRENT', 'versions'])
+
+        index, (job_ids, skill_indptr, skill_ids, category_ids) = match_artifact.load_match_artifact(version)
+        for array in (index.base.data, index.base.indices, index.base.indptr):
+            self.assertTrue(is_file_mapped(array))
+        self.assertEqual(index.row_by_id, fitted.row_by_id)
+        self.assertEqual(index.row_hashes, fitted.row_hashes)
+        self.assertEqual(index.artifact_version, version)
+        np.testing.assert_array_equal(index.document_frequency, fitted.document_frequency)
+        query = 'kế toán thuế excel'
+        np.testing.assert_allclose(index.similarities(query), fitted.similarities(query), rtol=1e-6)
+
+        inverted = JobInvertedIndex()
+        inverted.load_arrays(job_ids, skill_indptr, skill_ids, category_ids, index.watermark)
+        expected = JobInvertedIndex()
+        expected.sync()
+        self.assertEqual({job_id: set(skills) for job_id, skills in inverted.job_skills.items()},
+                         {job_id: set(skills) for job_id, skills in expected.job_skills.items()})
+        self.assertEqual(inverted.job_category, expected.job_category)
+
+        # Index nạp từ artifact vẫn đồng bộ dần theo database (document_frequency là bản sao)
+        job = Job.objects.get(title='Kế toán tổng hợp')
+        job.is_active = False
+        job.save()
+        index.sync()
+        self.assertNotIn(job.pk, index)
+
+    # CURRENT chỉ đổi sau khi phiên bản mới đã ghi xong; build lỗi giữa chừng
+    # thì process khác vẫn đọc phiên bản cũ
+    def test_failed_build_keeps_current(self):
+        version, _ = match_artifact.build_match_artifact()
+        with mock.patch.object(match_artifact.pickle, 'dump', side_effect=OSError('disk full')):
+            with self.assertRaises(OSError):
+                match_artifact.build_match_artifact()
+        self.assertEqual(match_artifact.current_artifact_version(), version)
+        self.assertEqual(match_artifact.list_versions(), [version])
+
+    def test_swap_and_cleanup(self):
+        versions = [match_artifact.build_match_artifact(keep=2)[0] for _ in range(3)]
+        self.assertEqual(len(set(versions)), 3)
+        self.assertEqual(match_artifact.current_artifact_version(), versions[-1])
+        self.assertEqual(match_artifact.list_versions(), versions[1:])
+
+        # Phiên bản đang dùng không bao giờ bị xóa
+        with open(match_artifact.MATCH_INDEX_CURRENT_FILE, 'w') as f:
+            f.write(versions[1])
+        self.assertEqual(match_artifact.remove_old_versions(keep=1), [])
+        self.assertEqual(match_artifact.current_artifact_version(), versions[1])
+
+    def test_unreadable_artifact(self):
+        version, _ = match_artifact.build_match_artifact()
+        meta_path = os.path.join(match_artifact.MATCH_INDEX_VERSIONS_DIR, version, 'meta.json')
+        with open(meta_path) as f:
+            meta = json.load(f)
+        with open(meta_path, 'w') as f:
+            json.dump(dict(meta, format=match_artifact.ARTIFACT_FORMAT_VERSION + 1), f)
+        with redirect_stdout(io.StringIO()) as output:
+            self.assertIsNone(match_artifact.load_match_artifact(version))
+            self.assertIsNone(match_artifact.load_match_artifact('missing'))
+        self.assertIn('outdated', output.getvalue())
+
+    # Index TF-IDF của process chuyển sang artifact khi CURRENT đổi
+    def test_process_index_follows_current(self):
+        with mock.patch.object(match_index, '_text_index', JobTextIndex()), \
+                mock.patch.object(match_index, '_failed_artifact_version', None), \
+                mock.patch.object(match_index, '_schedule_text_index_maintenance'):
+            self.assertIsNone(match_index.get_job_text_index().artifact_version)
+            version, _ = match_artifact.build_match_artifact()
+            self.assertEqual(match_index.get_job_text_index().artifact_version, version)
+            newer, _ = match_artifact.build_match_artifact()
+            self.assertEqual(match_index.get_job_text_index().artifact_version, newer)
+
+
+# ============================================================
+# MATCH SIDECAR
+# ============================================================
+
+# Sidecar thật trên Unix socket tạm (event loop trong thread riêng). Chỉ dùng
+# các op không đọc database: thread của sidecar không thấy transaction của test.
+class SidecarProtocolTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'sidecar.sock')
+        for patcher in (
+            mock.patch.object(sidecar, '_unavailable_until', 0.0),
+            mock.patch.dict(sidecar_server.HANDLERS, {'echo': lambda **args: args}),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.server = sidecar_server.SidecarServer(self.path, workers=2)
+        self.loop = asyncio.new_event_loop()
+        started = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(self.loop)
+            self.listener = self.loop.run_until_complete(
+                asyncio.start_unix_server(self.server.handle_connection, path=self.path))
+            started.set()
+            self.loop.run_forever()
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        self.assertTrue(started.wait(5))
+        self.addCleanup(self.stop_server, thread)
+
+    def stop_server(self, thread):
+        sidecar._close_connection()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        thread.join(5)
+        self.loop.run_until_complete(self.close_listener())
+        self.loop.close()
+        self.server.executor.shutdown(wait=True)
+
+    async def close_listener(self):
+        self.listener.close()
+        tasks = asyncio.all_tasks() - {asyncio.current_task()}
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self.listener.wait_closed()
+
+    ARGS = {'params': {'provinces': ['1', '2']}, 'text': 'Kế toán thuế', 'k': None, 'ratio': 0.5}
+
+    @mock.patch.object(sidecar, 'MSGPACK_AVAILABLE', False)
+    def test_json_round_trip(self):
+        self.assertEqual(sidecar.call_sidecar('echo', self.ARGS, path=self.path), self.ARGS)
+        # Nhiều request nối tiếp trên cùng 1 kết nối của thread
+        connection = sidecar._local.connection
+        self.assertEqual(sidecar.call_sidecar('ping', path=self.path)['pid'], os.getpid())
+        self.assertIs(sidecar._local.connection, connection)
+
+    @skipUnless(sidecar.MSGPACK_AVAILABLE, 'cần msgpack')
+    def test_msgpack_round_trip(self):
+        self.assertEqual(sidecar.call_sidecar('echo', self.ARGS, path=self.path), self.ARGS)
+        self.assertEqual(sidecar.call_sidecar('echo', {'counts': {1: 2}}, path=self.path), {'counts': {1: 2}})
+
+    def test_error_response(self):
+        with redirect_stdout(io.StringIO()) as output:
+            self.assertIsNone(sidecar.call_sidecar('missing', path=self.path))
+            self.assertIsNone(sidecar.call_sidecar('search', {'params': {}, 'sort_by': 'bogus'}, path=self.path))
+        self.assertIn("Unknown op 'missing'", output.getvalue())
+        self.assertIn("Unsupported sort 'bogus'", output.getvalue())
+
+    # Codec không hỗ trợ: server trả lỗi bằng JSON, kết nối vẫn dùng tiếp được
+    def test_unsupported_codec(self):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+            connection.settimeout(5)
+            connection.connect(self.path)
+            connection.sendall(sidecar.HEADER.pack(2, 9) + b'{}')
+            length, codec = sidecar.HEADER.unpack(sidecar._recv_exactly(connection, sidecar.HEADER.size))
+            response = sidecar.decode_payload(codec, sidecar._recv_exactly(connection, length))
+            self.assertEqual(codec, sidecar.CODEC_JSON)
+            self.assertFalse(response['ok'])
+            self.assertIn('Unsupported codec 9', response['error'])
+
+            connection.sendall(sidecar.encode_frame({'op': 'echo', 'args': {'a': 1}}))
+            length, codec = sidecar.HEADER.unpack(sidecar._recv_exactly(connection, sidecar.HEADER.size))
+            self.assertEqual(sidecar.decode_payload(codec, sidecar._recv_exactly(connection, length)),
+                             {'ok': True, 'result': {'a': 1}})
+
+
+class SidecarFrameTests(SimpleTestCase):
+    def test_json_frame(self):
+        frame = sidecar.encode_frame({'op': 'ping', 'args': {}})
+        length, codec = sidecar.HEADER.unpack(frame[:sidecar.HEADER.size])
+        self.assertEqual((length, codec), (len(frame) - sidecar.HEADER.size, sidecar.CODEC_JSON))
+        self.assertEqual(sidecar.decode_payload(codec, frame[sidecar.HEADER.size:]), {'op': 'ping', 'args': {}})
+
+    @skipUnless(sidecar.MSGPACK_AVAILABLE, 'cần msgpack')
+    def test_msgpack_frame(self):
+        frame = sidecar.encode_frame({'ids': [1, 2], 'counts': {3: 4}}, sidecar.CODEC_MSGPACK)
+        length, codec = sidecar.HEADER.unpack(frame[:sidecar.HEADER.size])
+        self.assertEqual(codec, sidecar.CODEC_MSGPACK)
+        self.assertEqual(sidecar.decode_payload(codec, frame[sidecar.HEADER.size:]), {'ids': [1, 2], 'counts': {3: 4}})
+
+    def test_unsupported_codec(self):
+        with self.assertRaises(ValueError):
+            sidecar.decode_payload(9, b'{}')
+        with mock.patch.object(sidecar, 'MSGPACK_AVAILABLE', False), self.assertRaises(ValueError):
+            sidecar.decode_payload(sidecar.CODEC_MSGPACK, b'\x80')
+
+
+# Sidecar được cấu hình nhưng không chạy (socket không tồn tại): trang việc làm
+# và bảng điểm matching tính trong process / bằng SQL
+class SidecarFallbackTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        for patcher in (
+            override_settings(MATCH_SIDECAR_SOCKET=os.path.join(directory.name, 'missing.sock')),
+            mock.patch.object(sidecar, '_unavailable_until', 0.0),
+            mock.patch.object(match_store, 'MATCH_REFRESH_WORKERS', 0),
+            mock.patch('jobs.match_artifact.current_artifact_version', return_value=None),
+            mock.patch('jobs.match_index._schedule_text_index_maintenance'),
+        ):
+            patcher.enable() if hasattr(patcher, 'enable') else patcher.start()
+            self.addCleanup(patcher.disable if hasattr(patcher, 'disable') else patcher.stop)
+        self.addCleanup(sidecar._close_connection)
+
+        company = make_company()
+        self.skill = Skill.objects.create(name='Kế toán thuế')
+        self.jobs = [make_job(company, f'Kế toán {i}', skills=[self.skill]) for i in range(3)]
+        make_job(company, 'Đã ẩn', is_active=False)
+
+    def test_missing_socket_is_silent_and_backs_off(self):
+        with redirect_stdout(io.StringIO()) as output:
+            self.assertIsNone(sidecar.remote_facet_counts(QueryDict()))
+        self.assertEqual(output.getvalue(), '')
+        self.assertGreater(sidecar._unavailable_until, time.monotonic())
+        with mock.patch.object(sidecar.socket, 'socket', side_effect=AssertionError('connected')):
+            self.assertIsNone(sidecar.remote_ranked_ids(QueryDict(), 'newest'))
+
+    def test_job_list_falls_back(self):
+        expected = {job.id for job in self.jobs}
+        response = self.client.get(reverse('jobs:list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({job.id for job in response.context['jobs']}, expected)
+
+        # Không có index trong process (thiếu numpy): lọc / đếm bằng SQL
+        with mock.patch('jobs.views.get_job_filter_index', return_value=None):
+            response = self.client.get(reverse('jobs:list'))
+        self.assertEqual({job.id for job in response.context['jobs']}, expected)
+
+    def test_profile_matches_fall_back(self):
+        user = User.objects.create_user(username='candidate', password='pw')
+        profile = UserSkillProfile.objects.create(user=user)
+        profile.skills.add(self.skill)
+        with redirect_stdout(io.StringIO()) as output:
+            match_store.refresh_profile_matches(profile)
+        self.assertEqual(output.getvalue(), '')
+        self.assertEqual(set(UserJobMatch.objects.filter(profile=profile).values_list('job_id', flat=True)),
+                         {job.id for job in self.jobs})
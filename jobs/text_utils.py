@@ -0,0 +1,13 @@
+import unicodedata
+
+
+# Chuẩn hóa chuỗi để so sánh/tìm kiếm không dấu:
+# NFC -> chữ thường -> bỏ dấu (kể cả đ -> d) -> gộp khoảng trắng.
+# "Kế  Toán" và "ke toan" (NFC hoặc NFD) cho cùng kết quả "ke toan".
+def fold_text(text) -> str:
+    if not text:
+        return ''
+    text = unicodedata.normalize('NFD', unicodedata.normalize('NFC', str(text)).lower())
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    text = text.replace('đ', 'd')
+    return ' '.join(text.split())
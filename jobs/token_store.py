@@ -0,0 +1,183 @@
+import hashlib
+from typing import Iterable, List, Tuple
+
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from .models import Job, UserSkillProfile
+from .nlp_processor import TOKENIZER_VERSION, detect_language, normalize_text, tokenize_cleaned, tokenize_many
+
+
+# ============================================================
+# DOCUMENTS
+# ============================================================
+
+# Ghép các trường văn bản của job thành 1 document dùng cho TF-IDF.
+def build_job_text(title: str, description: str, requirements: str,
+                   responsibilities: str, skill_names: List[str]) -> str:
+    parts = [title or '', description or '']
+    if requirements:
+        parts.append(requirements)
+    if responsibilities:
+        parts.append(responsibilities)
+    parts.append(' '.join(skill_names))
+    return ' '.join(parts)
+
+# Lấy document của các job trong queryset (2 queries cho cả queryset).
+def load_job_documents(jobs: QuerySet) -> Tuple[List[int], List[str]]:
+    skill_names = {}
+    skill_rows = (
+        Job.required_skills.through.objects
+        .filter(job__in=jobs.values('id'))
+        .order_by('skill__name')
+        .values_list('job_id', 'skill__name')
+    )
+    for job_id, skill_name in skill_rows:
+        skill_names.setdefault(job_id, []).append(skill_name)
+
+    job_ids = []
+    texts = []
+    rows = jobs.values_list('id', 'title', 'description', 'requirements', 'responsibilities')
+    for job_id, title, description, requirements, responsibilities in rows:
+        job_ids.append(job_id)
+        texts.append(build_job_text(
+            title, description, requirements, responsibilities,
+            skill_names.get(job_id, []),
+        ))
+    return job_ids, texts
+
+# Document của hồ sơ kỹ năng: bio + tên skills + tên ngành nghề + text CV (nếu có).
+def build_profile_text(profile: UserSkillProfile, skill_names: List[str] = None,
+                       category_names: List[str] = None) -> str:
+    if skill_names is None:
+        skill_names = profile.skills.values_list('name', flat=True)
+    if category_names is None:
+        category_names = profile.categories.values_list('name', flat=True)
+    parts = []
+    if profile.bio:
+        parts.append(profile.bio)
+    parts.append(' '.join(skill_names))
+    parts.append(' '.join(category_names))
+    if profile.cv_text:
+        parts.append(profile.cv_text)
+    return ' '.join(parts)
+
+
+# ============================================================
+# TOKENS
+# ============================================================
+
+# Mã hash của nội dung (để biết tokens đã lưu còn đúng hay không).
+def content_hash(text: str) -> str:
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+# Mã hash của document kèm phiên bản bộ tách từ: đổi bộ tách từ thì mọi
+# tokens đã lưu đều được tách lại ở lần dùng tiếp theo.
+def document_hash(text: str) -> str:
+    return content_hash(f'{TOKENIZER_VERSION}\n{text}')
+
+# Phát hiện ngôn ngữ + làm sạch + tách từ một document.
+def tokenize_document(text: str) -> Tuple[str, str]:
+    language, cleaned = normalize_text(text)
+    return language, ' '.join(tokenize_cleaned(cleaned, language))
+
+# Văn bản đã tách từ (đã lưu sẵn) của các job, theo thứ tự của queryset.
+# Chỉ đọc Job.tokens - không tách từ trong request: tokens được tính khi ghi
+# (hàng đợi tính lại điểm gọi refresh_job_tokens sau mỗi lần job / skills đổi).
+def load_job_tokens(jobs: QuerySet) -> Tuple[List[int], List[str]]:
+    job_ids = []
+    tokens_list = []
+    for job_id, tokens in jobs.values_list('id', 'tokens'):
+        job_ids.append(job_id)
+        tokens_list.append(tokens)
+    return job_ids, tokens_list
+
+# Tách từ lại các job có nội dung thay đổi (tokens_hash không khớp) và lưu vào
+# Job.tokens. Job có tokens mới được cập nhật updated_at để các index trong bộ
+# nhớ đọc lại ở lần sync sau. Trả về id các job đã tách từ lại.
+def refresh_job_tokens(job_ids: Iterable[int]) -> List[int]:
+    jobs = Job.objects.filter(id__in=list(job_ids))
+    stored = dict(jobs.values_list('id', 'tokens_hash'))
+
+    changed = []
+    for job_id, text in zip(*load_job_documents(jobs)):
+        text_hash = document_hash(text)
+        if stored.get(job_id) != text_hash:
+            language, tokens = tokenize_document(text)
+            changed.append(Job(id=job_id, tokens=tokens, language=language, tokens_hash=text_hash))
+
+    if changed:
+        Job.objects.bulk_update(changed, ['tokens', 'language', 'tokens_hash'], batch_size=500)
+        Job.objects.filter(id__in=[job.id for job in changed]).update(updated_at=timezone.now())
+    return [job.id for job in changed]
+
+# Văn bản đã tách từ (đã lưu sẵn) của hồ sơ - chỉ đọc, như load_job_tokens.
+def get_profile_tokens(profile: UserSkillProfile) -> str:
+    return profile.tokens
+
+# Tách từ lại các hồ sơ có nội dung thay đổi (bio, skills hoặc ngành nghề).
+# Gọi ở hàng đợi tính lại điểm, trước khi tính bảng điểm của hồ sơ.
+def refresh_profile_tokens(profile_ids: Iterable[int]):
+    for profile in UserSkillProfile.objects.filter(id__in=list(profile_ids)):
+        text = build_profile_text(profile)
+        text_hash = document_hash(text)
+        if profile.tokens_hash != text_hash:
+            language, tokens = tokenize_document(text)
+            UserSkillProfile.objects.filter(pk=profile.pk).update(
+                tokens=tokens, language=language, tokens_hash=text_hash,
+            )
+
+
+# ============================================================
+# BATCH RETOKENIZATION
+# ============================================================
+
+# Tách từ lại các job bằng process pool (nlp_processor.tokenize_many).
+# Mặc định chỉ các job có nội dung thay đổi (tokens_hash không khớp); force=True
+# thì tách lại tất cả (ví dụ sau khi đổi bộ tách từ). Trả về số job đã cập nhật.
+def retokenize_jobs(jobs: QuerySet, workers: int = None, chunksize: int = 64,
+                    force: bool = False, batch_size: int = 500) -> int:
+    pending = []
+    job_ids = list(jobs.values_list('id', flat=True))
+    for start in range(0, len(job_ids), 2000):
+        batch = Job.objects.filter(id__in=job_ids[start:start + 2000])
+        stored = dict(batch.values_list('id', 'tokens_hash'))
+        for job_id, text in zip(*load_job_documents(batch)):
+            text_hash = document_hash(text)
+            if force or stored.get(job_id) != text_hash:
+                pending.append((job_id, text, text_hash))
+
+    changed = []
+    tokens_list = tokenize_many((text for _, text, _ in pending), workers, chunksize)
+    for (job_id, text, text_hash), tokens in zip(pending, tokens_list):
+        changed.append(Job(id=job_id, tokens=tokens, language=detect_language(text), tokens_hash=text_hash))
+        if len(changed) >= batch_size:
+            Job.objects.bulk_update(changed, ['tokens', 'language', 'tokens_hash'])
+            changed = []
+    if changed:
+        Job.objects.bulk_update(changed, ['tokens', 'language', 'tokens_hash'])
+    return len(pending)
+
+# Tách từ lại các hồ sơ kỹ năng (như retokenize_jobs).
+def retokenize_profiles(profiles: QuerySet, workers: int = None, chunksize: int = 64,
+                        force: bool = False) -> int:
+    pending = []
+    for profile in profiles.prefetch_related('skills', 'categories'):
+        text = build_profile_text(
+            profile,
+            [skill.name for skill in profile.skills.all()],
+            [category.name for category in profile.categories.all()],
+        )
+        text_hash = document_hash(text)
+        if force or profile.tokens_hash != text_hash:
+            pending.append((profile, text, text_hash))
+
+    tokens_list = tokenize_many((text for _, text, _ in pending), workers, chunksize)
+    for (profile, text, text_hash), tokens in zip(pending, tokens_list):
+        profile.tokens = tokens
+        profile.language = detect_language(text)
+        profile.tokens_hash = text_hash
+    UserSkillProfile.objects.bulk_update(
+        [profile for profile, _, _ in pending], ['tokens', 'language', 'tokens_hash'], batch_size=500,
+    )
+    return len(pending)
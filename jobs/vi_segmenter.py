@@ -0,0 +1,109 @@
+import os
+from functools import lru_cache
+from typing import Iterable, List
+
+from .nlp_processor import clean_text
+
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Từ điển từ ghép chung đi kèm project
+WORDS_FILE = os.path.join(APP_DIR, 'data', 'vi_words.txt')
+
+# Khóa đánh dấu "kết thúc 1 từ" trong node của trie (âm tiết không bao giờ rỗng)
+_END = ''
+
+
+# ============================================================
+# SEGMENTER
+# ============================================================
+
+# Tách từ tiếng Việt theo từ điển: trie theo âm tiết + khớp dài nhất từ trái
+# sang phải. Từ ghép được nối bằng "_" giống underthesea (format="text").
+# Nhanh hơn CRF nhiều lần nhưng chỉ nhận ra các từ ghép có trong từ điển.
+class VietnameseSegmenter:
+    def __init__(self, words: Iterable[str] = ()):
+        self.trie = {}
+        self.word_count = 0
+        for word in words:
+            self.add_word(word)
+
+    def __len__(self):
+        return self.word_count
+
+    # Thêm 1 từ (đã qua clean_text để giống văn bản cần tách); bỏ qua từ 1 âm tiết.
+    def add_word(self, word: str):
+        syllables = clean_text(word).split()
+        if len(syllables) < 2:
+            return
+        node = self.trie
+        for syllable in syllables:
+            node = node.setdefault(syllable, {})
+        if _END not in node:
+            node[_END] = True
+            self.word_count += 1
+
+    # Tách văn bản đã làm sạch (clean_text) thành các từ.
+    def segment(self, text: str) -> List[str]:
+        syllables = text.split()
+        trie = self.trie
+        tokens = []
+        position = 0
+        count = len(syllables)
+        while position < count:
+            node = trie
+            end = position
+            match_end = 0
+            while end < count:
+                node = node.get(syllables[end])
+                if node is None:
+                    break
+                end += 1
+                if _END in node:
+                    match_end = end
+            if match_end:
+                tokens.append('_'.join(syllables[position:match_end]))
+                position = match_end
+            else:
+                tokens.append(syllables[position])
+                position += 1
+        return tokens
+
+
+# ============================================================
+# VOCABULARY
+# ============================================================
+
+# Từ ghép chung trong jobs/data/vi_words.txt (bỏ dòng trống và dòng "#").
+def load_general_words() -> List[str]:
+    try:
+        with open(WORDS_FILE, encoding='utf-8') as f:
+            return [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    except OSError as e:
+        print(f"Error loading Vietnamese dictionary: {e}")
+        return []
+
+# Tên skill, alias, ngành nghề và tỉnh / thành trong database. Không lấy tên vị
+# trí và yêu cầu: đó là cụm từ dài (ví dụ "kế toán tổng hợp") mà khớp dài nhất
+# sẽ gộp thành 1 token, làm mất từ "kế toán" khi so khớp với skill của hồ sơ.
+# Ngoài Django (chưa setup) hoặc database chưa migrate thì trả về danh sách rỗng.
+def load_domain_words() -> List[str]:
+    words = []
+    try:
+        from .models import JobCategory, Province, Skill, SkillAlias
+
+        for model, field in ((Skill, 'name'), (SkillAlias, 'alias'), (JobCategory, 'name'),
+                             (Province, 'name')):
+            words.extend(model.objects.values_list(field, flat=True))
+    except Exception as e:
+        print(f"Error loading vocabulary from database: {e}")
+    return words
+
+# Bộ tách từ của process (build 1 lần). Sau khi thêm nhiều skill / ngành nghề mới:
+# reset_vietnamese_segmenter() rồi `manage.py retokenize --force`.
+@lru_cache(maxsize=None)
+def get_vietnamese_segmenter() -> VietnameseSegmenter:
+    return VietnameseSegmenter(load_general_words() + load_domain_words())
+
+def reset_vietnamese_segmenter():
+    get_vietnamese_segmenter.cache_clear()
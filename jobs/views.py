@@ -5,16 +5,51 @@ from django.views.decorators.http import require_http_methods
 from django.http import JsonResponse
 from django.db.models import Q
 from .models import Job, Application, Skill, Province, District, Ward, SavedJob
+from .cv_extraction import enqueue_application_cv
+from .facets import get_facet_counts
+from .filter_index import INDEX_SORTS, get_job_filter_index
+from .filters import apply_job_filters
+from .pagination import KEYSET_SORTS, paginate_keyset, paginate_ranked_ids
+from .search import fts_available, search_jobs
+from .sidecar import remote_facet_counts, remote_ranked_ids
+from .text_utils import fold_text
 from accounts.models import UserProfile
 
+# Số việc làm mỗi trang
+JOBS_PER_PAGE = 20
+
+# Khóa chuẩn hóa của bộ lọc hiện tại (không phụ thuộc thứ tự tham số)
+def get_filter_key(params, ignore=('cursor', 'page')) -> str:
+    return '&'.join(
+        f'{key}={",".join(sorted(params.getlist(key)))}'
+        for key in sorted(params)
+        if key not in ignore
+    )
+
+# Điều kiện "cột không dấu bắt đầu bằng text" dạng khoảng [prefix, prefix + U+FFFF)
+# để SQLite dùng được index (LIKE 'x%' không dùng index vì không phân biệt hoa thường)
+def folded_prefix_q(field: str, text: str) -> Q:
+    prefix = fold_text(text)
+    if not prefix:
+        return Q()
+    return Q(**{f'{field}__gte': prefix, f'{field}__lt': prefix + '\uffff'})
+
+# Số trang từ query string (mặc định 1)
+def get_page_number(value) -> int:
+    try:
+        return max(int(value), 1)
+    except (TypeError, ValueError):
+        return 1
+
 # Trang chủ
 def home(request):
     from .models import JobCategory, UserSkillProfile
-    from .matching_service import JobMatcher, get_user_skill_profile
+    from .match_store import ensure_profile_matches, get_top_matches
     
     # Lấy jobs mới nhất
     latest_jobs = Job.objects.filter(is_active=True).order_by('-created_at')[:12]
-    provinces = Province.objects.all().order_by('name')
+    # Sắp xếp theo tên không dấu để "Đà Nẵng" nằm cùng các tỉnh chữ D (không bị xếp cuối)
+    provinces = Province.objects.all().order_by('name_folded', 'name')
     categories = JobCategory.objects.all().order_by('name')
     
     # Check skill profile và lấy matching jobs
@@ -28,22 +63,13 @@ def home(request):
             if skill_profile.skills.exists() or skill_profile.categories.exists():
                 has_skill_profile = True
                 
-                # Lấy matching jobs
-                matcher = JobMatcher(skill_profile)
-                all_jobs = Job.objects.filter(is_active=True)
-                matched_results = matcher.calculate_jobs_match(all_jobs)
-                
-                # Sắp xếp theo score giảm dần và lấy top 6 jobs có score > 0
-                sorted_jobs = sorted(
-                    [(job, matched_results[job.id]['matching_score']) for job in all_jobs if job.id in matched_results],
-                    key=lambda x: x[1],
-                    reverse=True
-                )
+                # Lấy top 6 jobs có score > 0 từ bảng điểm đã tính sẵn
+                # (hồ sơ chưa có bảng điểm: đưa vào hàng đợi, tạm chưa có gợi ý)
+                ensure_profile_matches(skill_profile)
                 matching_jobs = [
-                    {'job': job, 'score': score} 
-                    for job, score in sorted_jobs 
-                    if score > 0
-                ][:6]
+                    {'job': match.job, 'score': match.matching_score}
+                    for match in get_top_matches(skill_profile, 6)
+                ]
         except UserSkillProfile.DoesNotExist:
             pass
     
@@ -58,10 +84,11 @@ def home(request):
 # Danh sách việc làm
 def job_list(request):
     from .models import JobCategory, Requirement
-    from .matching_service import JobMatcher, get_user_skill_profile
+    from .matching_service import get_user_skill_profile
+    from .match_store import ensure_profile_matches, get_match_scores, get_ranked_job_ids
     
     jobs = Job.objects.filter(is_active=True)
-    provinces = Province.objects.all().order_by('name')
+    provinces = Province.objects.all().order_by('name_folded', 'name')
     categories = JobCategory.objects.all()
     
     # Lấy các loại kinh nghiệm từ Requirement model
@@ -72,89 +99,120 @@ def job_list(request):
     
     # Tìm kiếm
     search_query = request.GET.get('q', '')
-    if search_query:
-        # Tìm kiếm trong title, description, requirements
+    has_search_rank = False
+    if search_query and fts_available():
+        # Full-text search (FTS5) trên title, mô tả, yêu cầu, trách nhiệm, skills - xếp hạng bằng bm25
+        jobs = search_jobs(jobs, search_query)
+        has_search_rank = 'search_rank' in jobs.query.annotations
+    elif search_query and fold_text(search_query):
+        # Không có FTS5: tìm không dấu trong tiêu đề, mô tả, yêu cầu (cột đã chuẩn
+        # hóa sẵn, LIKE '%...%' quét bảng như trước) hoặc theo tiền tố tên skill (có index)
+        folded_query = fold_text(search_query)
+        skill_job_ids = Job.required_skills.through.objects.filter(
+            folded_prefix_q('skill__name_folded', search_query)
+        ).values('job_id')
         jobs = jobs.filter(
-            Q(title__icontains=search_query) |
-            Q(description__icontains=search_query) |
-            Q(requirements__icontains=search_query)
+            Q(title_folded__contains=folded_query)
+            | Q(description_folded__contains=folded_query)
+            | Q(requirements_folded__contains=folded_query)
+            | Q(id__in=skill_job_ids)
         )
     
-    # Lọc theo nhiều tỉnh (cho thanh phan bên trái)
-    provinces_list = request.GET.getlist('provinces')
-    if provinces_list:
-        jobs = jobs.filter(province_id__in=provinces_list)
+    # Không có từ khóa: lọc/đếm/sắp xếp bằng bitmap index - ở sidecar nếu đang
+    # chạy, ngược lại trong bộ nhớ của process
+    facet_counts = None
+    filter_index = None
+    if not search_query:
+        facet_counts = remote_facet_counts(request.GET)
+        if facet_counts is None:
+            filter_index = get_job_filter_index()
+    use_filter_index = facet_counts is not None or filter_index is not None
+    
+    # Số việc làm theo từng giá trị facet (tỉnh, ngành nghề, kinh nghiệm, hình thức)
+    if filter_index is not None:
+        facet_counts = filter_index.facet_counts(request.GET)
+    elif facet_counts is None:
+        facet_counts = get_facet_counts(
+            jobs, request.GET, get_filter_key(request.GET, ignore=('cursor', 'page', 'sort'))
+        )
     
-    # Lọc theo tỉnh (cho thanh phan trên thanh menu)
+    # Lọc theo tỉnh, ngành nghề, kinh nghiệm, mức lương, loại công việc
+    jobs = apply_job_filters(jobs, request.GET)
+    provinces_list = request.GET.getlist('provinces')
     province_filter = request.GET.get('province_filter', '')
-    if province_filter:
-        jobs = jobs.filter(province_id=province_filter)
-    
-    # Lọc theo ngành nghề
     category_list = request.GET.getlist('category')
-    if category_list:
-        jobs = jobs.filter(category_id__in=category_list)
-    
-    # Lọc theo kinh nghiệm
     experience_list = request.GET.getlist('experience')
-    if experience_list:
-        jobs = jobs.filter(experience_level__in=experience_list)
-    
-    # Lọc theo mức lương
     salary_min = request.GET.get('salary_min', '')
     salary_max = request.GET.get('salary_max', '')
-    if salary_min:
-        jobs = jobs.filter(salary_min__gte=int(salary_min))
-    if salary_max:
-        jobs = jobs.filter(salary_max__lte=int(salary_max))
-    
-    # Lọc theo loại công việc (chế độ làm việc)
     job_types_list = request.GET.getlist('job_type')
-    if job_types_list:
-        jobs = jobs.filter(job_type__in=job_types_list)
     
     # Lấy các việc làm đã lưu và điểm phù hợp
     saved_job_ids = []
     matching_scores = {}  # Dict: job_id -> matching_info
     has_skill_profile = False
+    user_profile = None
     
     if request.user.is_authenticated:
         saved_job_ids = list(SavedJob.objects.filter(user=request.user).values_list('job_id', flat=True))
         
-        # Tính điểm phù hợp nếu user có skill profile
+        # Điểm phù hợp đọc từ bảng UserJobMatch nếu user có skill profile
+        # (chưa có bảng điểm thì tính ở nền, trang hiện điểm 0)
         user_profile = get_user_skill_profile(request.user)
         if user_profile and user_profile.skills.count() > 0:
             has_skill_profile = True
-            matcher = JobMatcher(user_profile)
-            matching_scores = matcher.calculate_jobs_match(jobs)
+            ensure_profile_matches(user_profile)
     
-    # Sắp xếp
-    sort_by = request.GET.get('sort', 'newest')
+    # Sắp xếp và phân trang
+    sort_by = request.GET.get('sort', 'relevance' if has_search_rank else 'newest')
+    jobs = jobs.select_related('company', 'province', 'district', 'category').prefetch_related('required_skills')
     
+    next_cursor = None
+    next_page = None
     if sort_by == 'matching' and has_skill_profile:
-        # Sắp xếp theo điểm phù hợp (giá trị cao nhất)
-        jobs_list = list(jobs)
-        jobs_list.sort(key=lambda j: matching_scores.get(j.id, {}).get('matching_score', 0), reverse=True)
-        jobs = jobs_list
-    elif sort_by == 'oldest':
-        jobs = jobs.order_by('created_at')
-    elif sort_by == 'salary_high':
-        jobs = jobs.order_by('-salary_max')
-    elif sort_by == 'salary_low':
-        jobs = jobs.order_by('salary_min')
-    elif sort_by == 'city':
-        jobs = jobs.order_by('province__name')
-    else:  # newest (mặc định)
-        jobs = jobs.order_by('-created_at')
+        # Sắp xếp theo điểm phù hợp: phân trang trên danh sách id đã xếp hạng
+        ranked_ids = get_ranked_job_ids(user_profile, jobs, get_filter_key(request.GET))
+        jobs_count = len(ranked_ids)
+        page_number = get_page_number(request.GET.get('page'))
+        page_jobs, has_next = paginate_ranked_ids(jobs, ranked_ids, page_number, JOBS_PER_PAGE)
+        if has_next:
+            next_page = page_number + 1
+    elif use_filter_index:
+        # Id đã lọc và sắp xếp trong index, SQL chỉ load các job của trang
+        if sort_by not in INDEX_SORTS:
+            sort_by = 'newest'
+        ranked_ids = remote_ranked_ids(request.GET, sort_by) if filter_index is None else None
+        if ranked_ids is None:
+            filter_index = filter_index if filter_index is not None else get_job_filter_index()
+            ranked_ids = filter_index.ranked_ids(request.GET, sort_by)
+        jobs_count = len(ranked_ids)
+        page_number = get_page_number(request.GET.get('page'))
+        page_jobs, has_next = paginate_ranked_ids(jobs, ranked_ids, page_number, JOBS_PER_PAGE)
+        if has_next:
+            next_page = page_number + 1
+    else:
+        if sort_by not in KEYSET_SORTS or (sort_by == 'relevance' and not has_search_rank):
+            sort_by = 'newest'
+        jobs_count = jobs.count()
+        page_jobs, next_cursor = paginate_keyset(jobs, sort_by, request.GET.get('cursor'), JOBS_PER_PAGE)
+    
+    if has_skill_profile:
+        matching_scores = get_match_scores(user_profile, [job.id for job in page_jobs])
+    
+    # Query string của bộ lọc hiện tại (không gồm vị trí trang) cho link phân trang
+    page_params = request.GET.copy()
+    page_params.pop('cursor', None)
+    page_params.pop('page', None)
     
     context = {
-        'jobs': jobs,
+        'jobs': page_jobs,
         'provinces': provinces,
         'categories': categories,
         'experience_options': experience_options,
         'job_type_options': job_type_options,
-        'jobs_count': len(jobs) if isinstance(jobs, list) else jobs.count(),
+        'jobs_count': jobs_count,
         'search_query': search_query,
+        'facet_counts': facet_counts,
+        'has_search_rank': has_search_rank,
         'province_filter': province_filter,
         'sort_by': sort_by,
         'selected_categories': category_list,
@@ -166,6 +224,10 @@ def job_list(request):
         'saved_job_ids': saved_job_ids,
         'matching_scores': matching_scores,
         'has_skill_profile': has_skill_profile,
+        'page_query': page_params.urlencode(),
+        'is_first_page': not (request.GET.get('cursor') or request.GET.get('page')),
+        'next_cursor': next_cursor,
+        'next_page': next_page,
     }
     
     return render(request, 'jobs/list.html', context)
@@ -275,9 +337,14 @@ def apply_job(request, pk):
         
         if request.FILES.get('cv_file'):
             application.cv_file = request.FILES['cv_file']
+            application.cv_status = 'pending'
         
         application.save()
         
+        # Trích xuất text CV chạy nền, không làm chậm request
+        if application.cv_status == 'pending':
+            enqueue_application_cv(application.pk)
+        
         messages.success(request, 'Đã gửi đơn ứng tuyển! Người tuyển dụng sẽ xem xét đơn của bạn.')
         return redirect('jobs:detail', pk=job.pk)
     
@@ -362,7 +429,7 @@ def create_job(request):
         messages.success(request, 'Đăng việc thành công!')
         return redirect('dashboard:index')
     
-    provinces = Province.objects.all().order_by('name')
+    provinces = Province.objects.all().order_by('name_folded', 'name')
     context = {
         'job_types': Job.JOB_TYPE_CHOICES,
         'provinces': provinces
@@ -409,7 +476,7 @@ def edit_job(request, pk):
         messages.success(request, 'Đã cập nhật thông tin việc làm!')
         return redirect('dashboard:index')
     
-    provinces = Province.objects.all().order_by('name')
+    provinces = Province.objects.all().order_by('name_folded', 'name')
     context = {
         'job': job,
         'job_types': Job.JOB_TYPE_CHOICES,
@@ -434,8 +501,10 @@ def delete_job(request, pk):
     return redirect('dashboard:index')
 
 # Lấy danh sách Quận/Huyện theo mã Tỉnh/Thành phố
+# Tham số q (tùy chọn): lọc theo tiền tố tên, không phân biệt dấu ("ba d" -> "Ba Đình")
 def get_districts(request, province_code):
-    districts = District.objects.filter(parent_code=province_code).order_by('name')
+    districts = District.objects.filter(parent_code=province_code).order_by('name_folded', 'name')
+    districts = districts.filter(folded_prefix_q('name_folded', request.GET.get('q', '')))
     data = [
         {
             'code': d.code,
@@ -447,8 +516,10 @@ def get_districts(request, province_code):
     return JsonResponse({'districts': data})
 
 # Lấy danh sách Xã/Phường theo mã Quận/Huyện
+# Tham số q (tùy chọn): lọc theo tiền tố tên, không phân biệt dấu
 def get_wards(request, district_code):
-    wards = Ward.objects.filter(parent_code=district_code).order_by('name')
+    wards = Ward.objects.filter(parent_code=district_code).order_by('name_folded', 'name')
+    wards = wards.filter(folded_prefix_q('name_folded', request.GET.get('q', '')))
     data = [
         {
             'code': w.code,
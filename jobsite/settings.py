@@ -134,4 +134,9 @@ LOGOUT_REDIRECT_URL = '/'
 
 # Media files (Uploads)
 MEDIA_URL = '/media/'
-MEDIA_ROOT = BASE_DIR / 'media'
\ No newline at end of file
+MEDIA_ROOT = BASE_DIR / 'media'
+# Dữ liệu matching build offline (mô hình LSA, ...), không commit
+MATCH_DATA_DIR = BASE_DIR / 'var'
+# Unix socket của sidecar matching / tìm kiếm (`manage.py run_match_sidecar`).
+# Khi sidecar không chạy, web tự tính trong process; None: không dùng sidecar
+MATCH_SIDECAR_SOCKET = str(MATCH_DATA_DIR / 'match_sidecar.sock')
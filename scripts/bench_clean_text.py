@@ -0,0 +1,120 @@
+"""
+Micro-benchmark chuẩn hóa văn bản (nlp_processor.normalize_text / clean_text)
+trên dữ liệu mẫu (document của các job + tên skill, ngành nghề, vị trí):
+- bản cũ: 6 lượt re.sub + detect_language dựng lại bộ ký tự mỗi lần gọi
+- bản mới: normalize_text (1 regex + 1 bảng translate, bảng dựng sẵn ở module)
+- normalize_iter cho cả lô
+
+Kiểm tra luôn kết quả 2 bản có giống nhau không (văn bản NFC).
+
+Cách dùng:
+    python scripts/bench_clean_text.py [--repeat 5] [--scale 10]
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, PROJECT_DIR)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'jobsite.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from jobs import nlp_processor  # noqa: E402
+from jobs.models import Job, JobCategory, JobPosition, Skill  # noqa: E402
+from jobs.token_store import load_job_documents  # noqa: E402
+
+
+# Bản cũ của detect_language + clean_text (để so sánh)
+def legacy_detect_language(text):
+    if not text:
+        return 'vi'
+    vietnamese_chars = set('àáảãạăằắẳẵặâầấẩẫậèéẻẽẹêềếểễệìíỉĩịòóỏõọôồốổỗộơờớởỡợùúủũụưừứửữựỳýỷỹỵđ')
+    vietnamese_chars.update([c.upper() for c in vietnamese_chars])
+    text_lower = text.lower()
+    vietnamese_char_count = sum(1 for c in text_lower if c in vietnamese_chars)
+    if len(text) > 0 and (vietnamese_char_count / len(text)) > 0.02:
+        return 'vi'
+    return 'en'
+
+
+def legacy_clean_text(text):
+    if not text:
+        return ""
+    text = text.lower()
+    text = re.sub(r'http\S+|www\S+|https\S+', '', text)
+    text = re.sub(r'\S+@\S+', '', text)
+    text = re.sub(r'\b\d{9,11}\b', '', text)
+    text = re.sub(r'[^\w\sÀ-ỹ]', ' ', text)
+    text = re.sub(r'\d+', '', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    return text
+
+
+def legacy_normalize(text):
+    return legacy_detect_language(text), legacy_clean_text(text)
+
+
+def load_texts():
+    _, texts = load_job_documents(Job.objects.all())
+    for model in (Skill, JobCategory, JobPosition):
+        texts.extend(model.objects.values_list('name', flat=True))
+    # vài văn bản có URL / email / số điện thoại như CV và tin đăng thật
+    texts.extend([
+        'Liên hệ: hr@congty.vn hoặc 0912345678, website https://congty.vn/tuyen-dung',
+        'Apply via www.example.com/jobs or email jobs@example.com (Hotline: 02838123456)',
+    ])
+    return texts
+
+
+def best_time(function, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Micro-benchmark chuẩn hóa văn bản')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--scale', type=int, default=10, help='Nhân bản dữ liệu mẫu N lần')
+    args = parser.parse_args()
+
+    texts = load_texts() * args.scale
+    chars = sum(len(text) for text in texts)
+    print(f"{len(texts):,} văn bản, {chars:,} ký tự\n")
+
+    results = {}
+    timings = {
+        'cũ (detect_language + clean_text)':
+            lambda: results.__setitem__('legacy', [legacy_normalize(text) for text in texts]),
+        'normalize_text':
+            lambda: results.__setitem__('new', [nlp_processor.normalize_text(text) for text in texts]),
+        'normalize_iter':
+            lambda: results.__setitem__('iter', list(nlp_processor.normalize_iter(texts))),
+    }
+    baseline = None
+    for name, function in timings.items():
+        elapsed = best_time(function, args.repeat)
+        baseline = baseline or elapsed
+        print(f"  {name:36s} {elapsed * 1e6 / len(texts):8.1f} µs/văn bản  "
+              f"{chars / elapsed / 1e6:6.1f} MB/s  x{baseline / elapsed:.1f}")
+
+    different = [
+        (text, old, new) for text, old, new in zip(texts, results['legacy'], results['new']) if old != new
+    ]
+    print(f"\nKết quả khác bản cũ: {len(different)}/{len(texts)}")
+    for text, old, new in different[:5]:
+        print(f"  {text[:70]!r}\n    cũ:  {old[1][:80]!r} ({old[0]})\n    mới: {new[1][:80]!r} ({new[0]})")
+
+
+if __name__ == '__main__':
+    main()
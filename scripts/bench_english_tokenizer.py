@@ -0,0 +1,127 @@
+"""
+Benchmark bộ tách từ tiếng Anh trên phần tiếng Anh của dữ liệu việc làm:
+- tốc độ (tokens/giây) của bộ tách 'fast' (str.translate) và TextBlob (nếu đã cài)
+- tỉ lệ văn bản cho kết quả giống hệt nhau giữa 2 bộ tách (trên văn bản gốc và
+  văn bản đã qua clean_text như trong tokenize_text)
+- tỉ lệ văn bản mà quy trình mặc định (tokenize_cleaned với ENGLISH_STEM /
+  ENGLISH_REMOVE_STOPWORDS hiện tại) cho kết quả giống tách theo khoảng trắng
+  trên văn bản đã qua clean_text (quy trình cũ)
+
+Phần tiếng Anh: các đoạn (tách theo dòng và dấu , ; : ( ) / |) trong tiêu đề /
+mô tả / yêu cầu / trách nhiệm của job và bio của hồ sơ mà detect_language nhận
+là 'en' (dữ liệu mẫu chủ yếu là tiếng Việt xen thuật ngữ tiếng Anh).
+
+Cách dùng:
+    python scripts/bench_english_tokenizer.py [--repeat 5] [--show-diff 5]
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, PROJECT_DIR)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'jobsite.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from jobs import nlp_processor  # noqa: E402
+from jobs.models import Job, UserSkillProfile  # noqa: E402
+
+
+SEGMENT_SEPARATORS = re.compile(r'[\n,;:()/|]+')
+
+
+# Các đoạn tiếng Anh (có ít nhất 2 từ) của toàn bộ job và hồ sơ
+def load_english_lines():
+    lines = []
+    texts = []
+    for row in Job.objects.values_list('title', 'description', 'requirements', 'responsibilities'):
+        texts.extend(row)
+    texts.extend(UserSkillProfile.objects.values_list('bio', flat=True))
+    for text in texts:
+        for segment in SEGMENT_SEPARATORS.split(text or ''):
+            segment = segment.strip(' -•*.\t')
+            if (len(segment.split()) >= 2 and any(char.isalpha() for char in segment)
+                    and nlp_processor.detect_language(segment) == 'en'):
+                lines.append(segment)
+    return lines
+
+
+# Chạy tokenize trên mọi dòng, trả về (số tokens, tokens/giây tốt nhất, kết quả)
+def run(tokenize, lines, repeat):
+    best = None
+    results = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = [tokenize(line) for line in lines]
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    token_count = sum(len(tokens) for tokens in results)
+    return token_count, token_count / best if best else 0.0, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark bộ tách từ tiếng Anh')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--show-diff', type=int, default=5, help='Số ví dụ khác nhau in ra')
+    args = parser.parse_args()
+
+    lines = load_english_lines()
+    cleaned = [nlp_processor.clean_text(line) for line in lines]
+    print(f"{len(lines)} dòng tiếng Anh, {sum(len(line) for line in lines):,} ký tự")
+
+    modes = {
+        'split (cũ, khi thiếu TextBlob)': lambda text: text.split(),
+        'fast': lambda text: nlp_processor.tokenize_english(text, mode='fast'),
+        'mặc định (tokenize_cleaned)': lambda text: nlp_processor.tokenize_cleaned(text, 'en'),
+        'fast + stopwords + stem': lambda text: nlp_processor.tokenize_english(
+            text, mode='fast', remove_stopwords=True, stem=True),
+    }
+    textblob_available = nlp_processor.import_optional('textblob') is not None \
+        if nlp_processor.TEXTBLOB_AVAILABLE else False
+    if textblob_available:
+        modes['textblob'] = lambda text: nlp_processor.tokenize_english(text, mode='textblob')
+
+    outputs = {}
+    for source_name, source in (('gốc', lines), ('clean_text', cleaned)):
+        print(f"\nVăn bản {source_name}:")
+        for name, tokenize in modes.items():
+            nlp_processor.stem_english.cache_clear()
+            token_count, rate, results = run(tokenize, source, args.repeat)
+            outputs[source_name, name] = results
+            print(f"  {name:28s} {token_count:8,} tokens  {rate:12,.0f} tokens/s")
+
+    baseline = outputs['clean_text', 'split (cũ, khi thiếu TextBlob)']
+    default = outputs['clean_text', 'mặc định (tokenize_cleaned)']
+    same = sum(1 for a, b in zip(default, baseline) if a == b)
+    print(f"\nMặc định giống quy trình cũ (clean_text): {same}/{len(default)} dòng "
+          f"({same / max(len(default), 1):.1%})")
+    shown = 0
+    for line, a, b in zip(lines, default, baseline):
+        if a != b and shown < args.show_diff:
+            print(f"  {line[:70]!r}\n    mặc định: {a}\n    cũ:       {b}")
+            shown += 1
+
+    if not textblob_available:
+        print("\nTextBlob chưa được cài: bỏ qua so sánh kết quả với TextBlob")
+        return
+
+    for source_name in ('gốc', 'clean_text'):
+        fast = outputs[source_name, 'fast']
+        blob = outputs[source_name, 'textblob']
+        same = sum(1 for a, b in zip(fast, blob) if a == b)
+        print(f"\nGiống TextBlob ({source_name}): {same}/{len(fast)} dòng ({same / max(len(fast), 1):.1%})")
+        shown = 0
+        for line, a, b in zip(lines, fast, blob):
+            if a != b and shown < args.show_diff:
+                print(f"  {line[:70]!r}\n    fast:     {a}\n    textblob: {b}")
+                shown += 1
+
+
+if __name__ == '__main__':
+    main()
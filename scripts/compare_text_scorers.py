@@ -0,0 +1,137 @@
+"""
+So sánh các cách tính điểm văn bản của JobMatcher (matching_service.TEXT_SCORERS)
+trên toàn bộ việc làm đang hoạt động:
+- thời gian build index (lần gọi đầu) và độ trễ score_jobs cho 1 hồ sơ
+  (median / p95), kèm mốc cũ: fit TF-IDF cho từng cặp (calculate_text_similarity)
+- mức độ giống nhau của thứ hạng so với 'tfidf': tương quan Spearman của điểm
+  văn bản và tỉ lệ trùng top-K (điểm văn bản và điểm matching tổng)
+
+Ngoài các hồ sơ thật, dùng thêm hồ sơ giả lập từ job ngẫu nhiên (skills + 60
+từ đầu của văn bản job) để đủ --queries truy vấn.
+
+Cách dùng:
+    python scripts/compare_text_scorers.py [--queries 50] [--top-k 10] [--pairwise-jobs 50]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, PROJECT_DIR)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'jobsite.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+import numpy as np  # noqa: E402
+
+from jobs import matching_service  # noqa: E402
+from jobs.match_index import get_catalog_state  # noqa: E402
+from jobs.models import Job, UserSkillProfile  # noqa: E402
+from jobs.token_store import load_job_tokens  # noqa: E402
+
+
+# Hàm tạo JobMatcher cho từng truy vấn: hồ sơ thật trước, sau đó hồ sơ giả lập
+def load_queries(count, seed):
+    queries = []
+    for profile in UserSkillProfile.objects.filter(skills__isnull=False).distinct()[:count]:
+        queries.append(lambda scorer, profile=profile: matching_service.JobMatcher(profile, scorer))
+
+    jobs = list(Job.objects.filter(is_active=True).prefetch_related('required_skills'))
+    random.Random(seed).shuffle(jobs)
+    job_ids, texts = load_job_tokens(Job.objects.filter(id__in=[job.id for job in jobs]))
+    text_by_id = dict(zip(job_ids, texts))
+    for job in jobs[:max(count - len(queries), 0)]:
+        skills = {skill.id: skill.name for skill in job.required_skills.all()}
+        text = ' '.join(text_by_id.get(job.id, '').split()[:60])
+
+        def make(scorer, skills=skills, text=text):
+            matcher = matching_service.JobMatcher(text_scorer=scorer)
+            matcher._user_skill_names = skills
+            matcher._user_skill_ids = set(skills)
+            matcher._user_text = text
+            return matcher
+        queries.append(make)
+    return queries
+
+
+def top_overlap(a, b, k):
+    return len(set(a[:k]) & set(b[:k])) / k if k else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='So sánh các cách tính điểm văn bản')
+    parser.add_argument('--queries', type=int, default=50, help='Số hồ sơ (thật + giả lập)')
+    parser.add_argument('--top-k', type=int, default=10)
+    parser.add_argument('--pairwise-jobs', type=int, default=50,
+                        help='Số job dùng để đo cách cũ (fit TF-IDF cho từng cặp)')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    jobs = Job.objects.filter(is_active=True)
+    queries = load_queries(args.queries, args.seed)
+    state = get_catalog_state()
+    print(f"{state[0]} job đang hoạt động, {len(queries)} truy vấn\n")
+
+    spearmanr = None
+    try:
+        from scipy.stats import spearmanr
+    except ImportError:
+        pass
+
+    outputs = {}
+    print("Độ trễ score_jobs (toàn bộ catalog, 1 hồ sơ):")
+    for scorer in matching_service.TEXT_SCORERS:
+        start = time.perf_counter()
+        queries[0](scorer).score_jobs(jobs)
+        build = time.perf_counter() - start
+
+        latencies = []
+        outputs[scorer] = []
+        for make in queries:
+            matcher = make(scorer)
+            start = time.perf_counter()
+            batch = matcher.score_jobs(jobs, prune=False)
+            latencies.append(time.perf_counter() - start)
+            text_scores = dict(zip(batch.job_ids, batch.text_scores.tolist()))
+            outputs[scorer].append((text_scores, batch.ranked_ids(args.top_k)))
+        latencies = np.array(latencies) * 1000
+        print(f"  {scorer:8s} build + lần đầu {build:6.3f}s   median {np.median(latencies):7.2f} ms"
+              f"   p95 {np.percentile(latencies, 95):7.2f} ms")
+
+    # Cách cũ: fit TF-IDF cho từng cặp (hồ sơ, job)
+    _, texts = load_job_tokens(jobs.order_by('id')[:args.pairwise_jobs])
+    profile_text = queries[0]('tfidf')._user_text
+    start = time.perf_counter()
+    for text in texts:
+        matching_service.calculate_text_similarity(profile_text, text)
+    per_pair = (time.perf_counter() - start) / max(len(texts), 1)
+    print(f"  {'pairwise':8s} {per_pair * 1000:.2f} ms / job  -> ~{per_pair * state[0] * 1000:,.0f} ms cho catalog")
+
+    baseline = outputs['tfidf']
+    print(f"\nSo với 'tfidf' (trung bình trên các truy vấn, top-{args.top_k}):")
+    for scorer in matching_service.TEXT_SCORERS:
+        if scorer == 'tfidf':
+            continue
+        correlations, text_overlaps, match_overlaps = [], [], []
+        for (base_scores, base_ranked), (scores, ranked) in zip(baseline, outputs[scorer]):
+            job_ids = sorted(base_scores)
+            a = np.array([base_scores[job_id] for job_id in job_ids])
+            b = np.array([scores[job_id] for job_id in job_ids])
+            if spearmanr is not None and a.std() > 0 and b.std() > 0:
+                correlations.append(spearmanr(a, b).statistic)
+            base_text_top = sorted(job_ids, key=lambda job_id: -base_scores[job_id])
+            text_top = sorted(job_ids, key=lambda job_id: -scores[job_id])
+            text_overlaps.append(top_overlap(base_text_top, text_top, args.top_k))
+            match_overlaps.append(top_overlap(base_ranked, ranked, args.top_k))
+        correlation = f"{np.mean(correlations):.3f}" if correlations else 'n/a'
+        print(f"  {scorer:8s} Spearman điểm văn bản {correlation}   "
+              f"trùng top-K văn bản {np.mean(text_overlaps):.1%}   trùng top-K matching {np.mean(match_overlaps):.1%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+"""
+So sánh các bộ tách từ tiếng Việt trên văn bản việc làm (đã qua clean_text):
+- tốc độ (văn bản/giây, âm tiết/giây) của 'dictionary', 'underthesea' (nếu đã
+  cài) và 'whitespace' (mốc so sánh)
+- độ chính xác của 'dictionary' so với underthesea: precision / recall / F1 trên
+  các từ (khoảng âm tiết) và riêng trên các từ ghép (>= 2 âm tiết)
+- với mọi bộ tách (không cần underthesea): các lần xuất hiện trong văn bản của
+  tên skill / alias / ngành nghề (>= 2 âm tiết, là thứ hồ sơ ứng viên so khớp)
+  được giữ nguyên thành 1 token, bị gộp vào từ dài hơn (ví dụ "kế toán" trong
+  "kế_toán_tổng_hợp") hay bị tách rời. 'dictionary + vị trí / yêu cầu' là từ
+  điển có thêm tên vị trí và yêu cầu, để so sánh.
+
+Dùng để chọn bộ tách từ cho từng loại việc (nlp_processor.VIETNAMESE_TOKENIZER).
+
+Cách dùng:
+    python scripts/compare_vi_segmenters.py [--limit 1000] [--repeat 3] [--show-diff 5]
+"""
+import argparse
+import os
+import sys
+import time
+from collections import Counter
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, PROJECT_DIR)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'jobsite.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from jobs import nlp_processor  # noqa: E402
+from jobs.models import Job, JobCategory, JobPosition, Requirement, Skill, SkillAlias  # noqa: E402
+from jobs.token_store import load_job_documents  # noqa: E402
+from jobs.vi_segmenter import (  # noqa: E402
+    VietnameseSegmenter, get_vietnamese_segmenter, load_domain_words, load_general_words,
+)
+
+
+# Văn bản tiếng Việt đã làm sạch của các job
+def load_documents(limit):
+    _, texts = load_job_documents(Job.objects.order_by('id')[:limit])
+    return [cleaned for language, cleaned in nlp_processor.normalize_iter(texts) if language == 'vi']
+
+
+# Các khoảng (âm tiết bắt đầu, âm tiết kết thúc) của 1 kết quả tách từ
+def spans(tokens):
+    result = set()
+    position = 0
+    for token in tokens:
+        length = len(token.split('_'))
+        result.add((position, position + length))
+        position += length
+    return result
+
+
+# Tên skill / alias / ngành nghề (đã làm sạch, >= 2 âm tiết)
+def load_reference_terms():
+    terms = set()
+    for model, field in ((Skill, 'name'), (SkillAlias, 'alias'), (JobCategory, 'name')):
+        for name in model.objects.values_list(field, flat=True):
+            cleaned = nlp_processor.clean_text(name)
+            if len(cleaned.split()) > 1:
+                terms.add(cleaned)
+    return terms
+
+
+# Các khoảng âm tiết của văn bản trùng với 1 tên trong terms
+def term_spans(document, terms, max_length):
+    syllables = document.split()
+    result = set()
+    for start in range(len(syllables)):
+        for end in range(start + 2, min(start + max_length, len(syllables)) + 1):
+            if ' '.join(syllables[start:end]) in terms:
+                result.add((start, end))
+    return result
+
+
+# Số lần xuất hiện của tên (giữ nguyên, bị gộp vào từ dài hơn, bị tách rời)
+def term_retention(outputs, documents, terms):
+    max_length = max((len(term.split()) for term in terms), default=0)
+    kept = absorbed = split = 0
+    for tokens, document in zip(outputs, documents):
+        predicted = spans(tokens)
+        for start, end in term_spans(document, terms, max_length):
+            if (start, end) in predicted:
+                kept += 1
+            elif any(first <= start and end <= last for first, last in predicted):
+                absorbed += 1
+            else:
+                split += 1
+    return kept, absorbed, split
+
+
+def scores(predicted, reference):
+    correct = len(predicted & reference)
+    precision = correct / len(predicted) if predicted else 0.0
+    recall = correct / len(reference) if reference else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return precision, recall, f1
+
+
+def main():
+    parser = argparse.ArgumentParser(description='So sánh bộ tách từ tiếng Việt')
+    parser.add_argument('--limit', type=int, default=1000, help='Số job tối đa')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--show-diff', type=int, default=5, help='Số ví dụ khác nhau in ra')
+    args = parser.parse_args()
+
+    documents = load_documents(args.limit)
+    syllable_count = sum(len(document.split()) for document in documents)
+    start = time.perf_counter()
+    segmenter = get_vietnamese_segmenter()
+    print(f"{len(documents)} văn bản, {syllable_count:,} âm tiết; "
+          f"từ điển {len(segmenter)} từ ghép (build {time.perf_counter() - start:.3f}s)\n")
+
+    modes = ['whitespace', 'dictionary']
+    if nlp_processor.UNDERTHESEA_AVAILABLE and nlp_processor.import_optional('underthesea') is not None:
+        modes.append('underthesea')
+
+    outputs = {}
+    rates = {}
+    for mode in modes:
+        best = None
+        for _ in range(1 if mode == 'underthesea' else args.repeat):
+            start = time.perf_counter()
+            outputs[mode] = [nlp_processor.tokenize_vietnamese(document, mode) for document in documents]
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        rates[mode] = syllable_count / best if best else 0.0
+        compounds = sum(1 for tokens in outputs[mode] for token in tokens if '_' in token)
+        print(f"  {mode:12s} {len(documents) / best:10,.0f} văn bản/s  "
+              f"{rates[mode]:12,.0f} âm tiết/s  {compounds:8,} từ ghép")
+
+    # Từ điển cũ (có thêm tên vị trí và yêu cầu), chỉ để so sánh
+    extended = VietnameseSegmenter(
+        load_general_words() + load_domain_words()
+        + list(JobPosition.objects.values_list('name', flat=True))
+        + list(Requirement.objects.values_list('name', flat=True))
+    )
+    outputs['dictionary + vị trí / yêu cầu'] = [extended.segment(document) for document in documents]
+
+    terms = load_reference_terms()
+    print(f"\nTên skill / alias / ngành nghề trong văn bản ({len(terms)} tên >= 2 âm tiết):")
+    for mode, tokens in outputs.items():
+        kept, absorbed, split = term_retention(tokens, documents, terms)
+        total = max(kept + absorbed + split, 1)
+        print(f"  {mode:30s} giữ nguyên {kept:6,} ({kept / total:6.1%})  "
+              f"bị gộp {absorbed:6,} ({absorbed / total:6.1%})  bị tách {split:6,} ({split / total:6.1%})")
+
+    top = Counter(token for tokens in outputs['dictionary'] for token in tokens if '_' in token)
+    print("\nTừ ghép 'dictionary' gặp nhiều nhất:",
+          ', '.join(f"{token} ({count})" for token, count in top.most_common(15)))
+
+    if 'underthesea' not in outputs:
+        print("\nunderthesea chưa được cài: bỏ qua so sánh độ chính xác")
+        return
+
+    print(f"\n'dictionary' nhanh hơn underthesea {rates['dictionary'] / rates['underthesea']:.0f} lần")
+    for mode in ('whitespace', 'dictionary'):
+        all_predicted, all_reference, compound_predicted, compound_reference = set(), set(), set(), set()
+        for index, (tokens, reference_tokens) in enumerate(zip(outputs[mode], outputs['underthesea'])):
+            predicted = {(index, *span) for span in spans(tokens)}
+            reference = {(index, *span) for span in spans(reference_tokens)}
+            all_predicted |= predicted
+            all_reference |= reference
+            compound_predicted |= {span for span in predicted if span[2] - span[1] > 1}
+            compound_reference |= {span for span in reference if span[2] - span[1] > 1}
+        precision, recall, f1 = scores(all_predicted, all_reference)
+        print(f"  {mode:12s} từ:     P {precision:.3f}  R {recall:.3f}  F1 {f1:.3f}")
+        precision, recall, f1 = scores(compound_predicted, compound_reference)
+        print(f"  {mode:12s} từ ghép: P {precision:.3f}  R {recall:.3f}  F1 {f1:.3f}")
+
+    shown = 0
+    for tokens, reference_tokens in zip(outputs['dictionary'], outputs['underthesea']):
+        if tokens != reference_tokens and shown < args.show_diff:
+            print(f"\n  dictionary:  {' '.join(tokens[:25])}\n  underthesea: {' '.join(reference_tokens[:25])}")
+            shown += 1
+
+
+if __name__ == '__main__':
+    main()
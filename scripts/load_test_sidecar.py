@@ -0,0 +1,160 @@
+"""
+Load test sidecar matching / tìm kiếm (`manage.py run_match_sidecar`) trên máy local:
+- --concurrency client (thread, mỗi thread 1 kết nối) gửi tổng cộng --requests
+  truy vấn ngẫu nhiên: đếm facet và lọc + sắp xếp với tổ hợp bộ lọc ngẫu nhiên,
+  top-K matching của các hồ sơ có sẵn
+- in thông lượng (truy vấn/giây), độ trễ median / p95 / p99 theo từng loại
+  truy vấn và số truy vấn lỗi (client trả về None)
+- --in-process: chạy cùng các truy vấn bằng sidecar_server.dispatch ngay trong
+  process này để so sánh (không qua socket)
+
+Với --spawn, script tự chạy sidecar trong process con rồi dừng nó khi xong.
+
+Cách dùng:
+    python scripts/load_test_sidecar.py [--spawn] [--socket PATH] [--concurrency 8]
+        [--requests 2000] [--mix facets=4,search=4,match=1] [--in-process]
+"""
+import argparse
+import os
+import random
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, PROJECT_DIR)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'jobsite.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+import numpy as np  # noqa: E402
+from django.conf import settings  # noqa: E402
+
+from jobs import sidecar  # noqa: E402
+from jobs.filter_index import INDEX_SORTS  # noqa: E402
+from jobs.models import Job, UserSkillProfile  # noqa: E402
+
+
+# Các truy vấn ngẫu nhiên theo tỉ lệ trong --mix: danh sách (op, args)
+def make_requests(count, mix, seed):
+    rng = random.Random(seed)
+    jobs = Job.objects.filter(is_active=True)
+    provinces = list(jobs.exclude(province=None).values_list('province_id', flat=True).distinct())
+    categories = list(jobs.exclude(category=None).values_list('category_id', flat=True).distinct())
+    experiences = list(jobs.exclude(experience_level='').values_list('experience_level', flat=True).distinct())
+    job_types = [value for value, _ in Job.JOB_TYPE_CHOICES]
+    profile_ids = list(UserSkillProfile.objects.filter(skills__isnull=False).distinct().values_list('id', flat=True))
+    if not profile_ids:
+        mix.pop('match', None)
+
+    def random_params():
+        params = {}
+        for key, values, chance in (('provinces', provinces, 0.5), ('category', categories, 0.5),
+                                    ('experience', experiences, 0.3), ('job_type', job_types, 0.3)):
+            if values and rng.random() < chance:
+                params[key] = [str(value) for value in rng.sample(values, min(len(values), rng.randint(1, 2)))]
+        if rng.random() < 0.2:
+            params['salary_min'] = [str(rng.choice([5, 10, 15, 20]) * 1_000_000)]
+        return params
+
+    ops = list(mix)
+    weights = [mix[op] for op in ops]
+    requests = []
+    for op in rng.choices(ops, weights, k=count):
+        if op == 'facets':
+            args = {'params': random_params()}
+        elif op == 'search':
+            args = {'params': random_params(), 'sort_by': rng.choice(list(INDEX_SORTS))}
+        else:
+            args = {'profile_id': rng.choice(profile_ids), 'k': 20, 'text_scorer': None}
+        requests.append((op, args))
+    return requests
+
+
+def run(requests, concurrency, call):
+    def timed(request):
+        start = time.perf_counter()
+        ok = call(*request) is not None
+        return request[0], time.perf_counter() - start, ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(timed, requests))
+    elapsed = time.perf_counter() - start
+
+    print(f"  {len(results)} truy vấn trong {elapsed:.2f}s -> {len(results) / elapsed:,.0f} truy vấn/s")
+    for op in sorted({op for op, _, _ in results}):
+        latencies = np.array([latency for name, latency, _ in results if name == op]) * 1000
+        errors = sum(1 for name, _, ok in results if name == op and not ok)
+        print(f"  {op:8s} {len(latencies):6d} truy vấn   median {np.median(latencies):7.2f} ms   "
+              f"p95 {np.percentile(latencies, 95):7.2f} ms   p99 {np.percentile(latencies, 99):7.2f} ms"
+              f"   lỗi {errors}")
+
+
+def wait_for_sidecar(path, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        sidecar._unavailable_until = 0.0
+        if sidecar.call_sidecar('ping', path=path) is not None:
+            return True
+        time.sleep(0.2)
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test sidecar matching / tìm kiếm')
+    parser.add_argument('--socket', default=settings.MATCH_SIDECAR_SOCKET)
+    parser.add_argument('--spawn', action='store_true', help='Tự chạy sidecar trong process con')
+    parser.add_argument('--workers', type=int, default=4, help='Số worker của sidecar (với --spawn)')
+    parser.add_argument('--concurrency', type=int, default=8, help='Số client đồng thời')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--mix', default='facets=4,search=4,match=1',
+                        help='Tỉ lệ các loại truy vấn')
+    parser.add_argument('--in-process', action='store_true',
+                        help='So sánh với chạy cùng truy vấn trong process này')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    mix = {op: float(weight) for op, weight in (item.split('=') for item in args.mix.split(','))}
+    requests = make_requests(args.requests, mix, args.seed)
+
+    server = None
+    if args.spawn:
+        server = subprocess.Popen(
+            [sys.executable, 'manage.py', 'run_match_sidecar', '--socket', args.socket,
+             '--workers', str(args.workers)],
+            cwd=PROJECT_DIR,
+        )
+    try:
+        if not wait_for_sidecar(args.socket, 60 if args.spawn else 2):
+            print(f"Sidecar không trả lời trên {args.socket}")
+            sys.exit(1)
+        # Làm nóng (index trong sidecar đã build khi khởi động)
+        for op, request_args in requests[:20]:
+            sidecar.call_sidecar(op, request_args, timeout=sidecar.SIDECAR_MATCH_TIMEOUT, path=args.socket)
+
+        print(f"Sidecar {args.socket}, {args.concurrency} client:")
+        run(requests, args.concurrency, lambda op, request_args: sidecar.call_sidecar(
+            op, request_args, timeout=sidecar.SIDECAR_MATCH_TIMEOUT, path=args.socket,
+        ))
+
+        if args.in_process:
+            from jobs.sidecar_server import dispatch, warm_up
+
+            warm_up()
+            print(f"\nTrong process, {args.concurrency} thread:")
+            run(requests, args.concurrency, lambda op, request_args: dispatch(
+                {'op': op, 'args': request_args}
+            ).get('result'))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Đo thời gian khởi động lạnh (cold start) của project:
+- `python manage.py check`
+- boot 1 worker WSGI: get_wsgi_application() + import URLconf (views, signals)
+
+Mỗi lần đo chạy trong process Python mới. Script báo lỗi (exit code 1) nếu
+trung vị vượt ngân sách, hoặc nếu sklearn/scipy/underthesea/textblob bị import
+ngay khi boot (các thư viện này chỉ được import khi dùng lần đầu).
+
+Cách dùng:
+    python scripts/measure_cold_start.py [--runs 5] [--check-budget 1.5] [--boot-budget 1.0]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(SCRIPT_DIR)
+
+# Ngân sách mặc định (giây), đo trên máy dev: check ~0.5s, boot worker ~0.35s
+# (trước khi import lười sklearn/scipy: ~1.7s và ~1.2s)
+CHECK_BUDGET_SECONDS = 1.5
+BOOT_BUDGET_SECONDS = 1.0
+
+# Các thư viện nặng không được import khi boot
+LAZY_MODULES = ['sklearn', 'scipy', 'underthesea', 'textblob']
+
+# Code chạy trong process con: boot worker và in thời gian + module đã import
+BOOT_CODE = f"""
+import json, os, sys, time
+start = time.perf_counter()
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'jobsite.settings')
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+from django.urls import get_resolver
+get_resolver().url_patterns
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    'elapsed': elapsed,
+    'loaded': [name for name in {LAZY_MODULES!r} if name in sys.modules],
+}}))
+"""
+
+
+def measure_check():
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, 'manage.py', 'check'],
+        cwd=PROJECT_DIR, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    return time.perf_counter() - start
+
+
+def measure_boot():
+    output = subprocess.run(
+        [sys.executable, '-c', BOOT_CODE],
+        cwd=PROJECT_DIR, check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Đo thời gian cold start')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--check-budget', type=float, default=CHECK_BUDGET_SECONDS)
+    parser.add_argument('--boot-budget', type=float, default=BOOT_BUDGET_SECONDS)
+    args = parser.parse_args()
+
+    check_times = [measure_check() for _ in range(args.runs)]
+    boots = [measure_boot() for _ in range(args.runs)]
+    boot_times = [boot['elapsed'] for boot in boots]
+    loaded = sorted({name for boot in boots for name in boot['loaded']})
+
+    check_median = statistics.median(check_times)
+    boot_median = statistics.median(boot_times)
+    print(f"manage.py check : median {check_median:.3f}s  (min {min(check_times):.3f}s, "
+          f"budget {args.check_budget:.2f}s)")
+    print(f"worker boot     : median {boot_median:.3f}s  (min {min(boot_times):.3f}s, "
+          f"budget {args.boot_budget:.2f}s)")
+    print(f"lazy modules imported at boot: {', '.join(loaded) or 'none'}")
+
+    failed = check_median > args.check_budget or boot_median > args.boot_budget or loaded
+    if failed:
+        print("FAILED: cold start vượt ngân sách")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == '__main__':
+    main()